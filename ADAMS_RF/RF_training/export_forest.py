@@ -0,0 +1,57 @@
+# ------------------------
+# export_forest.py
+# Writes the trained Random Forest as a .adrf file for the Pi:
+# flattened trees, float32 thresholds, uint16/uint32 node indices and a
+# JSON metadata header, loaded there with numpy only (no sklearn/joblib).
+# The format and the loader live in ADAMS_alert_system/rf_fast.py.
+#
+# Called by train_random_forest_tuned.py, or standalone:
+#   python export_forest.py [model.joblib] [output.adrf]
+# ------------------------
+import os
+import sys
+import datetime
+
+import numpy as np
+import pandas as pd
+import joblib
+import sklearn
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', '..', 'ADAMS_alert_system'))
+from rf_fast import FlatForest, FORMAT_VERSION
+
+MODEL_PATH = 'driver_random_forest_model_tuned.joblib'
+ADRF_PATH = 'driver_random_forest_model_tuned.adrf'
+
+
+def export_forest(model, path=ADRF_PATH, check_csv='driver_test_features.csv', **metadata):
+    """
+    Save model as .adrf, then reload the file and check it predicts exactly
+    like model.predict on check_csv. Returns the number of rows checked.
+    """
+    metadata.update({
+        "exported_at": datetime.datetime.now().isoformat(timespec='seconds'),
+        "sklearn_version": sklearn.__version__,
+    })
+    FlatForest.from_sklearn(model, metadata).save(path)
+
+    # Verify the file itself, not the in-memory copy
+    forest = FlatForest.load(path)
+    X_check = pd.read_csv(check_csv)
+    expected = model.predict(X_check)
+    got = forest.predict(X_check.to_numpy())
+    mismatches = int((expected != got).sum())
+    if mismatches:
+        raise RuntimeError(f"{path}: {mismatches}/{len(X_check)} predictions differ from sklearn")
+
+    size_kb = os.path.getsize(path) / 1024
+    print(f"Exported {path} (format v{FORMAT_VERSION}, {forest.n_nodes} nodes, {size_kb:.0f} KB), "
+          f"identical to sklearn on {len(X_check)} rows.")
+    return len(X_check)
+
+
+if __name__ == "__main__":
+    model_path = sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH
+    out_path = sys.argv[2] if len(sys.argv) > 2 else ADRF_PATH
+    export_forest(joblib.load(model_path), out_path, source=os.path.basename(model_path))
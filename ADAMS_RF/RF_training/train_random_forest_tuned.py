@@ -5,6 +5,7 @@ import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score
 import joblib
+from export_forest import export_forest
 
 # Load datasets
 X_train = pd.read_csv('driver_train_features.csv')
@@ -46,4 +47,8 @@ final_model.fit(X_train, y_train)
 
 # Save final tuned model
 joblib.dump(final_model, 'driver_random_forest_model_tuned.joblib')
-print("Tuned Random Forest model saved.")
\ No newline at end of file
+print("Tuned Random Forest model saved.")
+
+# Compact copy for the Pi (numpy-only loader, see export_forest.py)
+export_forest(final_model, 'driver_random_forest_model_tuned.adrf',
+              best_params=best_params, val_accuracy=best_acc)
\ No newline at end of file
@@ -0,0 +1,258 @@
+# -----------------------------
+# actuator.py
+# ActuatorController:
+# - Drives the buzzer + vibration motor from its own timer thread
+# - Detection code only posts commands (continuous / pattern / stop),
+#   it never sleeps or touches GPIO itself
+# - Patterns are (on, off) second pairs; "continuous" stays on while it
+#   keeps being requested and switches off shortly after requests stop
+# - Optional external clock (replay): no thread, commands apply at once
+#   and poll() moves the hold / pattern deadlines along that clock
+# - Measures detection-to-actuation latency (command -> pins HIGH), also
+#   into a metrics.Metrics if given ("actuator", "frame_to_actuator")
+# -----------------------------
+
+# ========== Imports ==========
+import time
+import queue
+import threading
+
+
+# ========== Alert Patterns ==========
+# (on_seconds, off_seconds) per pulse
+PATTERNS = {
+    "pulse":  [(0.05, 0.0)],                            # one short beep
+    "triple": [(0.05, 0.05), (0.05, 0.05), (0.05, 0.0)],  # drowsiness: three quick buzzes
+}
+
+_CONTINUOUS = "continuous"
+_STOP = "stop"
+_CLOSE = "close"
+
+
+class ActuatorController:
+    """
+    Non-blocking alert output for the buzzer and vibration motor.
+
+    Usage:
+        actuator = ActuatorController(GPIO, pins=[BUZZER_PIN, MOTOR_PIN])
+        actuator.start()
+        actuator.continuous()          # call every alerting frame; returns at once
+        actuator.play("triple")        # or play([(0.2, 0.1), ...], repeat=True)
+        actuator.stop()
+        actuator.close()               # pins LOW, thread stopped
+
+    gpio is the RPi.GPIO module (or any object with output(), HIGH and LOW);
+    the pins must already be set up as outputs. All pins switch together.
+    metrics (optional metrics.Metrics) gets "actuator" (command posted ->
+    pins HIGH) and, when detected_at is given, "frame_to_actuator".
+
+    clock (e.g. fakes.ReplayClock) switches to driven mode for offline
+    replay: no timer thread, commands are applied in the caller's thread
+    and the caller calls poll() after moving the clock, so holds and
+    patterns last as long in recorded time as they would on the Pi.
+    Driven mode is single-threaded.
+    """
+
+    def __init__(self, gpio, pins, hold=0.25, max_commands=256, metrics=None, clock=None):
+        self.gpio = gpio
+        self.pins = list(pins)
+        self.hold = hold                # continuous output stays on this long after the last request
+        self.metrics = metrics
+        self.clock = clock or time.perf_counter     # hold / pattern deadlines
+        self._driven = clock is not None
+        self._commands = queue.Queue(maxsize=max_commands)
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # ---------- Timer-thread state ----------
+        self._level = False             # current pin level
+        self._mode = None               # None / "continuous" / "pattern"
+        self._steps = []                # pattern as [(level, seconds), ...]
+        self._step = 0
+        self._repeat = False
+        self._deadline = None           # perf_counter() of the next level change
+
+        # ---------- Counters (read via stats()) ----------
+        self._commands_total = 0
+        self._commands_dropped = 0
+        self._activations = 0
+        self._latency_last = 0.0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._output_errors = 0
+
+    # ================== Lifecycle ==================
+    def start(self):
+        """
+        Start the timer thread (idempotent).
+        """
+        if self._driven or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._run, name="actuator", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout=1.0):
+        """
+        Switch everything off and stop the timer thread.
+        """
+        if self._driven:
+            self._mode, self._deadline = None, None
+            self._set(False)
+            return
+        if self._thread is None:
+            return
+        self._post(_CLOSE, None, force=True)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ================== Commands (detection side, never block) ==================
+    def continuous(self, detected_at=None):
+        """
+        Keep the output on; repeat every frame while the condition lasts.
+        """
+        self._post(_CONTINUOUS, detected_at)
+
+    def play(self, pattern, repeat=False, detected_at=None):
+        """
+        Play a named pattern from PATTERNS or a list of (on, off) seconds.
+        Replaces whatever is playing.
+        """
+        steps = PATTERNS[pattern] if isinstance(pattern, str) else pattern
+        self._post(("pattern", tuple(steps), repeat), detected_at)
+
+    def stop(self):
+        self._post(_STOP, None)
+
+    def _post(self, command, detected_at, force=False):
+        # detected_at: time.perf_counter() of the detection (default: now)
+        posted_at = time.perf_counter()
+        if detected_at is None:
+            detected_at = posted_at
+        if self._driven:
+            with self._lock:
+                self._commands_total += 1
+            self.poll()
+            self._apply(command, posted_at, detected_at)
+            return
+        item = (command, posted_at, detected_at)
+        while True:
+            try:
+                self._commands.put_nowait(item)
+                break
+            except queue.Full:
+                if not force:
+                    with self._lock:
+                        self._commands_dropped += 1
+                    return
+                try:
+                    self._commands.get_nowait()
+                except queue.Empty:
+                    pass
+        with self._lock:
+            self._commands_total += 1
+
+    def poll(self):
+        """
+        Driven mode: apply every level change due by clock() (no-op otherwise).
+        """
+        if not self._driven:
+            return
+        while self._deadline is not None and self.clock() >= self._deadline:
+            self._advance()
+
+    # ================== Timer thread ==================
+    def _run(self):
+        while True:
+            timeout = None
+            if self._deadline is not None:
+                timeout = max(0.0, self._deadline - self.clock())
+            try:
+                command, posted_at, detected_at = self._commands.get(timeout=timeout)
+            except queue.Empty:
+                command = None
+
+            if command == _CLOSE:
+                self._set(False)
+                return
+            if command is not None:
+                self._apply(command, posted_at, detected_at)
+            if self._deadline is not None and self.clock() >= self._deadline:
+                self._advance()
+
+    def _apply(self, command, posted_at, detected_at):
+        now = self.clock()
+        if command == _STOP:
+            self._mode, self._deadline = None, None
+            self._set(False)
+        elif command == _CONTINUOUS:
+            # refreshing a running continuous output only moves its deadline
+            self._mode, self._deadline = _CONTINUOUS, now + self.hold
+            if not self._level:
+                self._set(True, posted_at, detected_at)
+        else:
+            _, pulses, repeat = command
+            self._steps = [(level, seconds) for on, off in pulses
+                           for level, seconds in ((True, on), (False, off)) if seconds > 0]
+            if not self._steps:
+                return
+            self._mode, self._repeat, self._step = "pattern", repeat, 0
+            self._deadline = now + self._steps[0][1]
+            self._set(self._steps[0][0], posted_at, detected_at)
+
+    def _advance(self):
+        if self._mode == "pattern":
+            self._step += 1
+            if self._step >= len(self._steps) and self._repeat:
+                self._step = 0
+            if self._step < len(self._steps):
+                level, seconds = self._steps[self._step]
+                self._deadline += seconds
+                self._set(level)
+                return
+        # continuous hold expired or pattern finished
+        self._mode, self._deadline = None, None
+        self._set(False)
+
+    def _set(self, level, posted_at=None, detected_at=None):
+        if level and detected_at is not None:
+            now = time.perf_counter()
+            latency = now - detected_at
+            if self.metrics is not None:
+                self.metrics.add("actuator", now - posted_at)
+                if detected_at != posted_at:
+                    self.metrics.add("frame_to_actuator", latency)
+            with self._lock:
+                self._activations += 1
+                self._latency_last = latency
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+        if level == self._level:
+            return
+        self._level = level
+        try:
+            value = self.gpio.HIGH if level else self.gpio.LOW
+            for pin in self.pins:
+                self.gpio.output(pin, value)
+        except Exception:
+            with self._lock:
+                self._output_errors += 1
+            if level:
+                print("[BEEP]")
+
+    # ================== Stats ==================
+    def stats(self):
+        """
+        Command counts and detection-to-actuation latency (ms).
+        """
+        with self._lock:
+            n = self._activations
+            return {
+                "commands": self._commands_total,
+                "commands_dropped": self._commands_dropped,
+                "activations": n,
+                "latency_last_ms": round(self._latency_last * 1000, 2),
+                "latency_avg_ms": round(self._latency_total / n * 1000, 2) if n else 0.0,
+                "latency_max_ms": round(self._latency_max * 1000, 2),
+                "output_errors": self._output_errors,
+            }
@@ -0,0 +1,112 @@
+# -----------------------------
+# bench_features.py
+# Micro-benchmark for the per-frame feature step:
+# - Reference: the original list/tuple helpers from driver_webcam_RF.py
+# - FeatureExtractor from features.py
+# - Checks both give identical EAR / MAR / pitch / yaw / roll first
+#
+# Needs numpy only (synthetic landmarks, no camera / Mediapipe), so it can
+# be run on the Pi itself:
+#   python bench_features.py --frames 5000
+# -----------------------------
+
+# ========== Imports ==========
+import time
+import random
+import argparse
+import platform
+from collections import namedtuple
+
+import numpy as np
+
+from features import FeatureExtractor, LEFT_EYE_IDX, RIGHT_EYE_IDX, MOUTH_IDX, NOSE_IDX
+
+Landmark = namedtuple("Landmark", "x y z")
+FACE_MESH_POINTS = 478          # refine_landmarks=True
+
+
+# ========== Reference (original loop code) ==========
+def eye_aspect_ratio(eye):
+    A = np.linalg.norm(np.array(eye[1]) - np.array(eye[5]))
+    B = np.linalg.norm(np.array(eye[2]) - np.array(eye[4]))
+    C = np.linalg.norm(np.array(eye[0]) - np.array(eye[3]))
+    return (A + B) / (2.0 * C)
+
+
+def mouth_aspect_ratio(mouth):
+    A = np.linalg.norm(np.array(mouth[13]) - np.array(mouth[19]))
+    C = np.linalg.norm(np.array(mouth[0]) - np.array(mouth[6]))
+    return A / C if C != 0 else 0.0
+
+
+def reference_features(lm, w, h):
+    left_eye = [(int(lm[i].x * w), int(lm[i].y * h)) for i in LEFT_EYE_IDX]
+    right_eye = [(int(lm[i].x * w), int(lm[i].y * h)) for i in RIGHT_EYE_IDX]
+    mouth = [(int(lm[i].x * w), int(lm[i].y * h)) for i in MOUTH_IDX]
+
+    ear = (eye_aspect_ratio(left_eye) + eye_aspect_ratio(right_eye)) / 2.0
+    mar = mouth_aspect_ratio(mouth)
+
+    left_eye_center = np.mean(left_eye, axis=0)
+    right_eye_center = np.mean(right_eye, axis=0)
+    dx = right_eye_center[0] - left_eye_center[0]
+    dy = right_eye_center[1] - left_eye_center[1]
+    roll = np.degrees(np.arctan2(dy, dx)) if dx != 0 else 0.0
+
+    nose = lm[NOSE_IDX]
+    nose_pt = np.array([int(nose.x * w), int(nose.y * h)])
+    pitch = np.degrees(np.arctan2(nose_pt[1] - (left_eye_center[1] + right_eye_center[1]) / 2.0, max(abs(dx), 1)))
+    yaw = np.degrees(np.arctan2(nose_pt[0] - (left_eye_center[0] + right_eye_center[0]) / 2.0, max(abs(dx), 1)))
+    return float(ear), float(mar), float(pitch), float(yaw), float(roll)
+
+
+# ========== Synthetic faces ==========
+def make_face(rng):
+    """
+    478 landmarks jittered around a frontal face (normalised coordinates).
+    """
+    cx, cy = rng.uniform(0.35, 0.65), rng.uniform(0.35, 0.65)
+    pts = [Landmark(cx + rng.gauss(0, 0.08), cy + rng.gauss(0, 0.08), 0.0) for _ in range(FACE_MESH_POINTS)]
+    # keep the eye corners apart so EAR is finite, like a real face
+    for idx, off in ((LEFT_EYE_IDX, -0.06), (RIGHT_EYE_IDX, 0.06)):
+        pts[idx[0]] = Landmark(cx + off - 0.02, cy - 0.05, 0.0)
+        pts[idx[3]] = Landmark(cx + off + 0.02, cy - 0.05, 0.0)
+    return pts
+
+
+def same(a, b):
+    return all(x == y or (np.isnan(x) and np.isnan(y)) for x, y in zip(a, b))
+
+
+def time_per_frame(fn, faces, w, h):
+    start = time.perf_counter()
+    for lm in faces:
+        fn(lm, w, h)
+    return (time.perf_counter() - start) / len(faces) * 1e6
+
+
+# ========== Main ==========
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-frame feature extraction cost")
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    faces = [make_face(rng) for _ in range(args.frames)]
+    extractor = FeatureExtractor()
+    w, h = args.width, args.height
+
+    mismatches = sum(not same(reference_features(lm, w, h), extractor.compute(lm, w, h)) for lm in faces)
+    print(f"[INFO] {platform.machine()} / {platform.processor() or platform.platform()}, numpy {np.__version__}")
+    print(f"[INFO] {args.frames} frames, {w}x{h}, mismatches: {mismatches}")
+
+    for name, fn in (("reference", reference_features), ("FeatureExtractor", extractor.compute)):
+        fn(faces[0], w, h)                      # warm-up
+        best = min(time_per_frame(fn, faces, w, h) for _ in range(3))
+        print(f"  {name:<17} {best:8.1f} us/frame")
+
+    if mismatches:
+        raise SystemExit(1)
@@ -0,0 +1,62 @@
+# -----------------------------
+# bench_model_load.py
+# Cold-start cost of getting the Random Forest ready, each measured in a
+# fresh Python process (imports included, like driver_webcam_RF.py boot):
+# - numpy only          : interpreter + numpy baseline
+# - joblib.load         : the old startup (imports sklearn)
+# - FlatForest.load     : the .adrf export (numpy + mmap only)
+# Reports wall time and peak RSS (ru_maxrss) per variant.
+#
+#   python bench_model_load.py --runs 5
+# -----------------------------
+
+# ========== Imports ==========
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Each snippet runs in its own interpreter and prints {"seconds", "rss_kb"}
+_PROBE = """
+import time, json, resource
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+VARIANTS = [
+    ("numpy only", "import numpy"),
+    ("joblib.load", "import warnings; warnings.filterwarnings('ignore')\n"
+                    "import joblib\n"
+                    "model = joblib.load('driver_random_forest_model_tuned.joblib')"),
+    ("FlatForest.load", "from rf_fast import FlatForest\n"
+                        "forest = FlatForest.load('driver_random_forest_model_tuned.adrf')"),
+]
+
+
+def probe(body):
+    out = subprocess.run([sys.executable, "-c", _PROBE.format(body=body)], cwd=HERE,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+# ========== Main ==========
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model cold-start time and memory")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = {ext: os.path.getsize(os.path.join(HERE, 'driver_random_forest_model_tuned' + ext)) / 1024
+             for ext in ('.joblib', '.adrf')}
+    print(f"[INFO] model files: joblib {sizes['.joblib']:.0f} KB, adrf {sizes['.adrf']:.0f} KB")
+
+    for name, body in VARIANTS:
+        probe(body)                             # warm the page cache
+        results = [probe(body) for _ in range(args.runs)]
+        seconds = sorted(r["seconds"] for r in results)[len(results) // 2]
+        rss_mb = max(r["rss_kb"] for r in results) / 1024
+        print(f"  {name:<16} {seconds * 1000:8.1f} ms (median)  {rss_mb:7.1f} MB peak RSS")
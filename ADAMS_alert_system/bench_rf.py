@@ -0,0 +1,93 @@
+# -----------------------------
+# bench_rf.py
+# Single-sample Random Forest latency:
+# - sklearn: model.predict([feature_vector])[0] (what the loop used to call)
+# - FlatForest from rf_fast.py, flattened in memory and loaded from the
+#   .adrf export
+# - Checks all give identical predictions (and probabilities) on the
+#   RF_training test set first, plus a few rows with a NaN EAR
+#
+# Needs sklearn + joblib to load the trained model:
+#   python bench_rf.py
+#   python bench_rf.py --test-csv ../ADAMS_RF/RF_training/driver_test_features.csv --rows 200
+# -----------------------------
+
+# ========== Imports ==========
+import os
+import csv
+import time
+import argparse
+import platform
+import warnings
+
+import numpy as np
+import joblib
+
+from rf_fast import FlatForest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(HERE, 'driver_random_forest_model_tuned.joblib')
+ADRF_PATH = os.path.join(HERE, 'driver_random_forest_model_tuned.adrf')
+TEST_CSV = os.path.join(HERE, '..', 'ADAMS_RF', 'RF_training', 'driver_test_features.csv')
+FEATURES = ['ear', 'mar', 'perclos', 'pitch', 'yaw', 'roll']
+
+
+# ========== Helpers ==========
+def load_rows(path):
+    with open(path, newline='') as f:
+        return [[float(row[name]) for name in FEATURES] for row in csv.DictReader(f)]
+
+
+def time_per_call(fn, rows):
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+# ========== Main ==========
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Random Forest single-sample latency")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--adrf", default=ADRF_PATH)
+    parser.add_argument("--test-csv", default=TEST_CSV)
+    parser.add_argument("--rows", type=int, default=200, help="rows used for timing")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")           # version / feature-name warnings from sklearn
+    model = joblib.load(args.model)
+    model.n_jobs = None                         # as in the loop: no parallel dispatch
+    forests = {"FlatForest": FlatForest.from_sklearn(model)}
+    if os.path.exists(args.adrf):
+        forests[".adrf"] = FlatForest.load(args.adrf)
+    forest = forests["FlatForest"]
+
+    rows = load_rows(args.test_csv)
+    nan_rows = [[float('nan')] + row[1:] for row in rows[:20]]
+    check = rows + nan_rows
+
+    expected = model.predict(check)
+    expected_proba = model.predict_proba(check)
+
+    print(f"[INFO] {platform.machine()} / {platform.processor() or platform.platform()}, numpy {np.__version__}")
+    print(f"[INFO] {len(model.estimators_)} trees, {forest.n_nodes} nodes, max depth {forest.max_depth}")
+    print(f"[INFO] {len(check)} rows ({len(nan_rows)} with NaN EAR)")
+
+    failed = False
+    for name, candidate in forests.items():
+        got = candidate.predict(check)
+        got_proba = np.array([candidate.predict_proba_one(row) for row in check])
+        mismatches = int((expected != got).sum())
+        proba_mismatches = int((expected_proba != got_proba).any(axis=1).sum())
+        failed |= bool(mismatches or proba_mismatches)
+        print(f"  {name:<14} prediction mismatches: {mismatches}, probability mismatches: {proba_mismatches}")
+
+    timed = rows[:args.rows]
+    for name, fn in [("model.predict", lambda row: model.predict([row])[0])] + \
+                    [(name, candidate.predict_one) for name, candidate in forests.items()]:
+        fn(timed[0])                            # warm-up
+        best = min(time_per_call(fn, timed) for _ in range(3))
+        print(f"  {name:<14} {best:10.1f} us/sample")
+
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,128 @@
+# -----------------------------
+# bench_smoothing.py
+# Checks and times the AI-state smoothing:
+# - Reference: the original loop code (deque of 30 labels, Counter +
+#   most_common every frame, 60% rule, "normal" otherwise)
+# - VoteSmoother(LABELS, window=30, enter=0.6) from smoothing.py
+# Fixed cases run first (exactly 18/30 votes, 17/30, fewer than 30 votes,
+# ties, leaving a state), then both must give the same state on every frame
+# of random label streams (short flickers and long runs mixed, like real
+# predictions).
+#
+#   python bench_smoothing.py --frames 200000
+#   python bench_smoothing.py --cases-only          # fixed cases, no timing
+# -----------------------------
+
+# ========== Imports ==========
+import time
+import random
+import argparse
+from collections import deque, Counter
+
+from smoothing import VoteSmoother
+
+LABELS = ["normal", "drowsy", "distracted"]
+STATE_WINDOW = 30
+
+
+# ========== Reference (original loop code) ==========
+def reference_states(labels):
+    predicted_states = deque(maxlen=STATE_WINDOW)
+    out = []
+    for predicted_state_str in labels:
+        stable_state = "normal"
+        predicted_states.append(predicted_state_str)
+        if len(predicted_states) == STATE_WINDOW:
+            counts = Counter(predicted_states)
+            dominant_state, dominant_count = counts.most_common(1)[0]
+            dominant_ratio = dominant_count / STATE_WINDOW
+            if dominant_ratio >= 0.6:
+                stable_state = dominant_state
+        out.append(stable_state)
+    return out
+
+
+def smoother_states(labels):
+    smoother = VoteSmoother(LABELS, window=STATE_WINDOW, enter=0.6)
+    return [smoother.push(label) for label in labels]
+
+
+# ========== Fixed cases ==========
+def run(*parts):
+    """
+    run(("normal", 12), ("drowsy", 18)) -> 12 x "normal" then 18 x "drowsy"
+    """
+    return [label for label, count in parts for _ in range(count)]
+
+
+# (name, labels, smoother options, expected state after the last frame);
+# cases with the default options must also match the reference on every frame
+CASES = [
+    ("18/30 votes (exactly 60%)", run(("normal", 12), ("drowsy", 18)), {}, "drowsy"),
+    ("17/30 votes (below 60%)", run(("distracted", 13), ("drowsy", 17)), {}, "normal"),
+    ("29 votes (window not full)", run(("drowsy", 29)), {}, "normal"),
+    ("30 votes (window just full)", run(("drowsy", 30)), {}, "drowsy"),
+    ("15/15 tie, 60% rule", run(("drowsy", 15), ("distracted", 15)), {}, "normal"),
+    ("15/15 tie, enter=0.5 -> first label", run(("distracted", 15), ("drowsy", 15)), {"enter": 0.5}, "drowsy"),
+    ("leave at 17/30", run(("drowsy", 30), ("normal", 13)), {}, "normal"),
+    ("stay at 18/30", run(("drowsy", 30), ("normal", 12)), {}, "drowsy"),
+]
+
+
+def check_cases():
+    failures = 0
+    for name, labels, options, expected in CASES:
+        smoother = VoteSmoother(LABELS, window=STATE_WINDOW, **{"enter": 0.6, **options})
+        states = [smoother.push(label) for label in labels]
+        ok = states[-1] == expected
+        if not options:
+            ok = ok and states == reference_states(labels)
+        failures += not ok
+        print(f"  [{'OK' if ok else 'FAIL'}] {name}: {states[-1]}")
+    return failures
+
+
+# ========== Synthetic predictions ==========
+def make_labels(rng, n):
+    """
+    Runs of one state (1-90 frames) with 0-40% single-frame flicker.
+    """
+    labels = []
+    while len(labels) < n:
+        state = rng.choice(LABELS)
+        noise = rng.uniform(0.0, 0.4)
+        for _ in range(rng.randint(1, 90)):
+            labels.append(rng.choice(LABELS) if rng.random() < noise else state)
+    return labels[:n]
+
+
+# ========== Main ==========
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="State smoothing equivalence + cost")
+    parser.add_argument("--frames", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases-only", action="store_true", help="only run the fixed cases")
+    args = parser.parse_args()
+
+    print("[INFO] Fixed cases")
+    failed = check_cases()
+    if failed or args.cases_only:
+        raise SystemExit(1 if failed else 0)
+
+    labels = make_labels(random.Random(args.seed), args.frames)
+
+    timings = {}
+    for name, fn in (("reference", reference_states), ("VoteSmoother", smoother_states)):
+        start = time.perf_counter()
+        states = fn(labels)
+        timings[name] = ((time.perf_counter() - start) / len(labels) * 1e6, states)
+
+    expected, got = timings["reference"][1], timings["VoteSmoother"][1]
+    mismatches = sum(a != b for a, b in zip(expected, got))
+    changes = sum(a != b for a, b in zip(expected, expected[1:]))
+    print(f"[INFO] {len(labels)} frames, {changes} state changes, mismatches: {mismatches}")
+    for name, (us, _) in timings.items():
+        print(f"  {name:<13} {us:6.2f} us/frame")
+
+    if mismatches:
+        raise SystemExit(1)
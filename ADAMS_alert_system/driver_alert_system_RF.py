@@ -3,22 +3,23 @@
 # DriverAlertSystem:
 # - Monitors EAR / MAR / PERCLOS / head pose + AI state
 # - Detects: prolonged eye closure, yawning, drowsy, distracted
-# - Controls buzzer + vibration motor
+# - Controls buzzer + vibration motor (via ActuatorController, non-blocking)
 # - Logs events and sends them to backend server
 # -----------------------------
 
 # ========== Imports ==========
 import time
 import json
-import RPi.GPIO as GPIO
-GPIO.setwarnings(False)     # Ignore GPIO warnings (e.g., reusing pins)
-
 import warnings
 warnings.filterwarnings(action='ignore', category=UserWarning)
 
 from datetime import datetime
 from pathlib import Path
 
+from uplink import EventUplink   # background sender (queue + keep-alive session)
+from spool import EventSpool     # durable on-disk buffer for payloads
+from actuator import ActuatorController   # buzzer / motor patterns on a timer thread
+
 
 class DriverAlertSystem:
     """
@@ -32,10 +33,19 @@ class DriverAlertSystem:
     SERVER_IP = "172.19.23.220"  # IP address of backend server
     RES_URL   = f"http://{SERVER_IP}:5000/api/kucing-event"   # event endpoint
     STATE_URL = f"http://{SERVER_IP}:5000/api/kucing-state"   # state endpoint
+    BATCH_URL = f"http://{SERVER_IP}:5000/api/kucing-batch"   # bulk events + states
     HARDWARE_ID = "ADAMS-001"  # Unique ID of this device
 
     # ================== Constructor ==================
-    def __init__(self, log_dir="./logs"):
+    def __init__(self, log_dir="./logs", spool_dir=None, gpio=None, uplink=None, clock=None,
+                 metrics=None):
+        """
+        gpio, uplink and clock default to the real hardware / backend / time.time;
+        pass stand-ins (see fakes.py) to run without a Pi or a server.
+        metrics (metrics.Metrics, optional) receives the actuator latencies.
+        """
+        self.clock = clock or time.time  # all alert timers read this clock
+        self.detected_at = None          # perf_counter() of the frame being handled (latency metrics)
 
         # ---------- Driver state ----------
         self.current_state = "normal"
@@ -80,40 +90,74 @@ class DriverAlertSystem:
         self.BUZZER_PIN = 17             # GPIO17 -> buzzer
         self.MOTOR_PIN  = 18             # GPIO18 -> vibration motor
 
-        GPIO.setmode(GPIO.BCM)           # Use BCM pin numbering
-        GPIO.setup(self.MOTOR_PIN,  GPIO.OUT, initial=GPIO.LOW)
-        GPIO.setup(self.BUZZER_PIN, GPIO.OUT, initial=GPIO.LOW)
+        if gpio is None:
+            import RPi.GPIO as gpio      # only importable on the Pi
+            gpio.setwarnings(False)      # Ignore GPIO warnings (e.g., reusing pins)
+        self.gpio = gpio
+        gpio.setmode(gpio.BCM)           # Use BCM pin numbering
+        gpio.setup(self.MOTOR_PIN,  gpio.OUT, initial=gpio.LOW)
+        gpio.setup(self.BUZZER_PIN, gpio.OUT, initial=gpio.LOW)
+
+        # ---------- Buzzer + motor (never sleeps in the frame loop) ----------
+        # an injected clock (replay) also drives the buzzer hold / pattern timing
+        self.actuator = ActuatorController(gpio, pins=[self.BUZZER_PIN, self.MOTOR_PIN],
+                                           metrics=metrics, clock=clock)
+        self.actuator.start()
+
+        # ---------- Backend uplink (never blocks the frame loop) ----------
+        # Payloads are written to the spool first; the uplink drains it and
+        # replays anything left over from a previous drive without Wi-Fi.
+        if uplink is None:
+            self.spool  = EventSpool(spool_dir or self.log_dir / "spool")
+            uplink = EventUplink(self.RES_URL, self.STATE_URL, batch_url=self.BATCH_URL,
+                                 spool=self.spool)
+        self.uplink = uplink
+        self.uplink.start()
 
     # ================== System ON/OFF event ==================
     def send_system_status(self, status: str):
         """
-        Send system ON/OFF event to backend with timestamp and device_id.
+        Queue system ON/OFF event for the backend with timestamp and device_id.
         """
-        import requests
-
-        payload = {
-            "event": {
-                "timestamp": datetime.now().isoformat(),
-                "type": status,          # "ON" or "OFF"
-                "device_id": self.HARDWARE_ID
-            }
+        event = {
+            "timestamp": datetime.now().isoformat(),
+            "type": status,          # "ON" or "OFF"
+            "device_id": self.HARDWARE_ID
         }
+        self.uplink.submit("event", event)
+        print(f"[{event['timestamp']}] System {status} queued")
+
+    def close(self, timeout=5.0):
+        """
+        Flush pending payloads to the backend, stop the uplink worker and
+        switch the buzzer / motor off.
+        """
+        self.actuator.close()
+        print("[INFO] Actuator stats:", self.actuator.stats())
+        self.uplink.close(timeout=timeout)
+        print("[INFO] Uplink stats:", self.uplink.stats())
 
-        try:
-            response = requests.post(self.RES_URL, json=payload)
-            print(f"[{datetime.now().isoformat()}] System {status} sent ({response.status_code})")
-        except Exception as e:
-            print(f"[WARN] Failed to send system {status} event:", e)
+    def save_log(self, name):
+        """
+        Write this session's alert_log to <log_dir>/<name>_<timestamp>.json.
+        """
+        path = self.log_dir / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.alert_log, f, indent=2)
+        print(f"[INFO] Session log saved to {path}")
+        return path
 
     # =========================================================
     #   MAIN UPDATE (called once per frame)
     # =========================================================
-    def update(self, ear, mar, perclos, pitch, yaw, roll, ai_state=None):
+    def update(self, ear, mar, perclos, pitch, yaw, roll, ai_state=None, detected_at=None):
         """
         Main entry point per frame.
         Inputs:
         - raw metrics: EAR, MAR, PERCLOS, pitch, yaw, roll
         - ai_state: "normal", "drowsy", or "distracted" (from Random Forest)
+        - detected_at: time.perf_counter() of the frame (optional, for the
+          frame -> buzzer latency metric)
 
         This will:
         - check prolonged eye closure,
@@ -121,7 +165,8 @@ class DriverAlertSystem:
         - apply AI-based state handling,
         - and return the current state.
         """
-        now = time.time()
+        now = self.clock()
+        self.detected_at = detected_at
 
         # 1) Check if eyes have been closed for too long
         self.check_eyes_closed(now, ear, mar, perclos, pitch, roll, yaw)
@@ -185,7 +230,7 @@ class DriverAlertSystem:
         - distraction alerts (continuous buzzer),
         - and recovery logs when returning to normal.
         """
-        now = time.time()
+        now = self.clock()
 
         # ---------- DROWSY ----------
         if ai_state == "drowsy":
@@ -284,33 +329,20 @@ class DriverAlertSystem:
     # =========================================================
     #   SOUND ALERTS (buzzer + vibration motor)
     # =========================================================
-    def play_continuous_buzzer(self):
+    def play_continuous_buzzer(self, detected_at=None):
         """
-        Single beep+vibration pulse.
-        Caller (e.g., main loop) can call this repeatedly to create continuous effect.
+        Keep buzzer + vibration on.
+        Caller (e.g., main loop) calls this repeatedly while the condition lasts;
+        the output switches off shortly after the calls stop. Returns immediately.
         """
-        try:
-            GPIO.output(self.BUZZER_PIN, GPIO.HIGH)
-            GPIO.output(self.MOTOR_PIN, GPIO.HIGH)
-            time.sleep(0.05)
-            GPIO.output(self.BUZZER_PIN, GPIO.LOW)
-            GPIO.output(self.MOTOR_PIN, GPIO.LOW)
-        except Exception:
-            print("[BEEP]")
+        self.actuator.continuous(self.detected_at if detected_at is None else detected_at)
 
     def sound_drowsy_buzzer(self):
         """
         Short pattern: three quick buzzes + vibrations to indicate drowsiness.
+        Played by the actuator thread; returns immediately.
         """
-        for _ in range(3):
-            try:
-                GPIO.output(self.BUZZER_PIN, GPIO.HIGH)
-                GPIO.output(self.MOTOR_PIN, GPIO.HIGH)
-                time.sleep(0.05)
-                GPIO.output(self.BUZZER_PIN, GPIO.LOW)
-                GPIO.output(self.MOTOR_PIN, GPIO.LOW)
-            except Exception:
-                print("[BEEP]")
+        self.actuator.play("triple", detected_at=self.detected_at)
 
     # =========================================================
     #   LOGGING + BACKEND COMMUNICATION
@@ -318,7 +350,7 @@ class DriverAlertSystem:
     def log_state_change(self, state, reason=None, ear=None, mar=None, perclos=None,
                          pitch=None, yaw=None, roll=None, force_log_state=False):
         """
-        Add a log entry to alert_log and send it to backend.
+        Add a log entry to alert_log and queue it for the backend.
         Two modes:
         - If reason is provided: log an event with metrics.
         - If reason is None: log the overall driver_state.
@@ -353,42 +385,16 @@ class DriverAlertSystem:
             self.alert_log.append(log_entry)
             self._last_logged_state = state
 
-            # ---- Send to backend REST API ----
-            try:
-                SERVER_IP  = "172.19.23.220"  # local override (could reuse class constants)
-                RES_URL    = f"http://{SERVER_IP}:5000/api/kucing-event"
-                STATE_URL  = f"http://{SERVER_IP}:5000/api/kucing-state"
-                import requests
-
-                if reason:
-                    # Event payload (with metrics)
-                    result_payload = {
-                        "event": {
-                            "timestamp": timestamp,
-                            "type":      reason,
-                            "device_id": self.HARDWARE_ID,
-                            "ear":      round(ear, 3)   if ear      is not None else None,
-                            "mar":      round(mar, 3)   if mar      is not None else None,
-                            "perclos":  round(perclos, 3) if perclos  is not None else None,
-                            "pitch":    round(pitch, 2) if pitch    is not None else None,
-                            "yaw":      round(yaw, 2)   if yaw      is not None else None,
-                            "roll":     round(roll, 2)  if roll     is not None else None,
-                        }
-                    }
-                    response = requests.post(RES_URL, json=result_payload)
-                    print(f"[{timestamp}] Sent result payload ({response.status_code})")
-
-                else:
-                    # State payload (no metrics, just driver_state)
-                    state_payload = {
-                        "state": {
-                            "timestamp":    timestamp,
-                            "driver_state": state,
-                            "device_id":    self.HARDWARE_ID
-                        }
-                    }
-                    response = requests.post(STATE_URL, json=state_payload)
-                    print(f"[{timestamp}] Sent state payload ({response.status_code})")
-
-            except Exception as e:
-                print("[WARN] Failed to send payload:", e)
\ No newline at end of file
+            # ---- Queue for backend REST API (sent by uplink worker) ----
+            if reason:
+                # Event payload (with metrics)
+                event = {"timestamp": timestamp, "type": reason}
+                event.update({k: v for k, v in log_entry.items() if k not in ("timestamp", "event")})
+                self.uplink.submit("event", event)
+            else:
+                # State payload (no metrics, just driver_state)
+                self.uplink.submit("state", {
+                    "timestamp":    timestamp,
+                    "driver_state": state,
+                    "device_id":    self.HARDWARE_ID
+                })
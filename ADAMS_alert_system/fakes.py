@@ -0,0 +1,119 @@
+# -----------------------------
+# fakes.py
+# In-memory stand-ins for the Pi hardware and the backend, so the
+# detection stack runs on any Linux box (replay.py, benchmarks):
+# - FakeGPIO   : RPi.GPIO subset used by DriverAlertSystem / actuator
+# - FakeADC    : ADS1115 read_adc() for fsr.read_fsr(adc=...)
+# - FakeUplink : EventUplink that only records submitted documents
+# - ReplayClock: settable clock for recorded timestamps
+# -----------------------------
+
+# ========== Imports ==========
+import time
+import threading
+from collections import Counter
+
+
+class FakeGPIO:
+    """
+    Records every output change as (perf_counter, pin, level).
+    """
+    BCM = "BCM"
+    OUT = "OUT"
+    IN = "IN"
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.levels = {}            # pin -> current level
+        self.changes = []           # (time, pin, level)
+        self.mode = None
+
+    def setwarnings(self, flag):
+        pass
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setup(self, pin, direction, initial=LOW):
+        self.levels[pin] = initial
+
+    def output(self, pin, level):
+        with self._lock:
+            if self.levels.get(pin) != level:
+                self.changes.append((time.perf_counter(), pin, level))
+            self.levels[pin] = level
+
+    def cleanup(self):
+        self.levels.clear()
+
+    def activations(self, pin):
+        """
+        Number of LOW -> HIGH switches on pin.
+        """
+        with self._lock:
+            return sum(1 for _, p, level in self.changes if p == pin and level == self.HIGH)
+
+
+class FakeADC:
+    """
+    ADS1115 stand-in: read_adc() returns `value` (or values from `sequence`,
+    repeating the last one when it runs out).
+    """
+
+    def __init__(self, value=500, sequence=None):
+        self.value = value
+        self._sequence = list(sequence) if sequence else None
+        self.reads = 0
+
+    def read_adc(self, channel, gain=1):
+        self.reads += 1
+        if self._sequence:
+            self.value = self._sequence.pop(0)
+        return self.value
+
+
+class FakeUplink:
+    """
+    EventUplink interface (start / submit / close / stats), nothing is sent.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = []         # (kind, doc)
+
+    def start(self):
+        pass
+
+    def submit(self, kind, doc):
+        with self._lock:
+            self.documents.append((kind, doc))
+        return True
+
+    def close(self, timeout=0):
+        pass
+
+    def event_counts(self):
+        with self._lock:
+            return Counter(doc.get("type") for kind, doc in self.documents if kind == "event")
+
+    def stats(self):
+        with self._lock:
+            kinds = Counter(kind for kind, _ in self.documents)
+        return {"enqueued": len(self.documents), "events": kinds.get("event", 0), "states": kinds.get("state", 0)}
+
+
+class ReplayClock:
+    """
+    Callable clock (like time.time) that replay moves to each recorded timestamp.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def set(self, now):
+        self.now = now
@@ -0,0 +1,131 @@
+# -----------------------------
+# features.py
+# FeatureExtractor:
+# - Converts the Face Mesh landmarks the model needs into one
+#   preallocated float32 array per frame (pixel coordinates)
+# - Computes all EAR / MAR distances, both eye centres and the three
+#   head angles with a handful of array operations
+# - Same numbers as the original per-point helpers: coordinates are
+#   truncated to whole pixels like int(), distances/angles in float64
+# -----------------------------
+
+# ========== Imports ==========
+import numpy as np
+
+
+# ========== Face Landmark Indices (Mediapipe) ==========
+LEFT_EYE_IDX  = [33, 160, 158, 133, 153, 144]
+RIGHT_EYE_IDX = [362, 385, 387, 263, 373, 380]
+MOUTH_IDX = [
+    78, 308, 13, 14, 87, 317, 82, 312, 81, 311,
+    80, 310, 95, 324, 88, 318, 178, 402, 191, 415
+]
+NOSE_IDX = 1  # Nose tip landmark (used for head pose approximation)
+
+# Row layout of the points array: left eye, right eye, mouth, nose
+LANDMARK_IDX = LEFT_EYE_IDX + RIGHT_EYE_IDX + MOUTH_IDX + [NOSE_IDX]
+DRAWN = slice(0, 32)         # eyes + mouth (drawn on the preview)
+NOSE_ROW = 32
+
+# ---------- Distance pairs (rows in the points array) ----------
+# EAR per eye = (|p1-p5| + |p2-p4|) / (2 * |p0-p3|), lower = eyes more closed
+# MAR = |mouth[13]-mouth[19]| / |mouth[0]-mouth[6]|, higher = mouth more open
+_PAIR_A = [1, 2, 0,  7, 8, 6,  12 + 13, 12 + 0]
+_PAIR_B = [5, 4, 3, 11, 10, 9, 12 + 19, 12 + 6]
+
+# One 0/+1/-1 matrix gives every pair difference and both eye-point sums
+# in a single matmul (whole-pixel inputs, so all of it is exact)
+_COMBINE = np.zeros((len(_PAIR_A) + 2, len(LANDMARK_IDX)), dtype=np.float64)
+for _row, (_a, _b) in enumerate(zip(_PAIR_A, _PAIR_B)):
+    _COMBINE[_row, _a] = 1.0
+    _COMBINE[_row, _b] = -1.0
+_COMBINE[len(_PAIR_A), 0:6] = 1.0       # left eye sum
+_COMBINE[len(_PAIR_A) + 1, 6:12] = 1.0  # right eye sum
+
+
+class FeatureExtractor:
+    """
+    Per-frame geometric features from Face Mesh landmarks.
+
+    Usage:
+        extractor = FeatureExtractor()
+        ear, mar, pitch, yaw, roll = extractor.compute(landmarks, w, h)
+        extractor.points_int()      # (32, 2) eye + mouth pixels for drawing
+
+    Buffers are allocated once; compute() only fills them.
+    """
+
+    def __init__(self):
+        n = len(LANDMARK_IDX)
+        self._raw = np.empty((n, 2), dtype=np.float64)     # normalised x, y from Mediapipe
+        self.points = np.empty((n, 2), dtype=np.float32)   # whole-pixel coordinates
+        self._scale = np.empty(2, dtype=np.float64)
+        self._comb = np.empty((len(_PAIR_A) + 2, 2), dtype=np.float64)
+        self._sq = np.empty((len(_PAIR_A), 2), dtype=np.float64)
+        self._dist = np.empty(len(_PAIR_A), dtype=np.float64)
+        self._ang_y = np.empty(3, dtype=np.float64)         # roll, pitch, yaw arguments
+        self._ang_x = np.empty(3, dtype=np.float64)
+        self._ang = np.empty(3, dtype=np.float64)
+
+    # ================== Landmarks -> pixel array ==================
+    def load(self, landmarks, w, h):
+        """
+        Copy the landmarks used by the model into self.points (pixels).
+        """
+        raw = self._raw
+        for row, i in enumerate(LANDMARK_IDX):
+            p = landmarks[i]
+            raw[row, 0] = p.x
+            raw[row, 1] = p.y
+        self._scale[0] = w
+        self._scale[1] = h
+        np.multiply(raw, self._scale, out=raw)
+        np.trunc(raw, out=raw)                  # int() truncation, kept for model fidelity
+        self.points[:] = raw
+        return self.points
+
+    # ================== Features ==================
+    def compute(self, landmarks, w, h):
+        """
+        Returns (ear, mar, pitch, yaw, roll) for one face.
+        ear is the average of both eyes (unsmoothed).
+        """
+        self.load(landmarks, w, h)
+        raw = self._raw                         # same whole-pixel values, float64
+
+        # All eight distances (and the eye sums) in one go
+        comb = np.matmul(_COMBINE, raw, out=self._comb)
+        sq = np.multiply(comb[:8], comb[:8], out=self._sq)
+        dist = np.sqrt(np.add(sq[:, 0], sq[:, 1], out=self._dist), out=self._dist)
+        A_l, B_l, C_l, A_r, B_r, C_r, mouth_v, mouth_h = dist.tolist()
+
+        if C_l and C_r:
+            ear = ((A_l + B_l) / (2.0 * C_l) + (A_r + B_r) / (2.0 * C_r)) / 2.0
+        else:
+            # degenerate eye (corners on one pixel): inf / nan, as numpy gave before
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ear = float((np.float64(A_l + B_l) / (2.0 * C_l) + np.float64(A_r + B_r) / (2.0 * C_r)) / 2.0)
+        mar = mouth_v / mouth_h if mouth_h != 0 else 0.0
+
+        # Head pose from eye centres and nose tip
+        (lx, ly), (rx, ry) = (comb[8:] / 6.0).tolist()
+        nose_x, nose_y = raw[NOSE_ROW].tolist()
+        dx = rx - lx
+        dy = ry - ly
+        base = max(abs(dx), 1)
+
+        # numpy's arctan2 (not math.atan2) so angles match the original to the last bit
+        ang_y, ang_x = self._ang_y, self._ang_x
+        ang_y[0], ang_y[1], ang_y[2] = dy, nose_y - (ly + ry) / 2.0, nose_x - (lx + rx) / 2.0
+        ang_x[0], ang_x[1], ang_x[2] = dx, base, base
+        roll, pitch, yaw = np.degrees(np.arctan2(ang_y, ang_x, out=self._ang), out=self._ang).tolist()
+        if dx == 0:
+            roll = 0.0
+
+        return ear, mar, pitch, yaw, roll
+
+    def points_int(self):
+        """
+        Eye and mouth points as integer pixels (for cv2.circle).
+        """
+        return self.points[DRAWN].astype(np.int32)
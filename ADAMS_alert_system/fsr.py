@@ -1,12 +1,19 @@
-import Adafruit_ADS1x15
-
-adc = Adafruit_ADS1x15.ADS1115(address=0x48, busnum=1)
+# ADS1115 is opened on first use, so importing this module needs no I2C bus
+# (replay / tests pass their own adc, see fakes.py)
+_adc = None
 GAIN = 1
 
-def read_fsr(threshold=72):
+def get_adc():
+    global _adc
+    if _adc is None:
+        import Adafruit_ADS1x15
+        _adc = Adafruit_ADS1x15.ADS1115(address=0x48, busnum=1)
+    return _adc
+
+def read_fsr(threshold=72, adc=None):
     """
     Reads the FSR sensor value.
     Returns True if hand is detected (pressure above threshold).
     """
-    value = adc.read_adc(0, gain=GAIN)
+    value = (adc or get_adc()).read_adc(0, gain=GAIN)
     return value > threshold, value
@@ -0,0 +1,216 @@
+# -----------------------------
+# metrics.py
+# Latency instrumentation for the edge loop:
+# - LatencyHistogram: log-spaced buckets (1 us .. 100 s, ~6% wide), fixed
+#   memory however long the drive -> count / mean / p50 / p95 / p99 / max
+# - Metrics: one histogram per stage (capture, face_mesh, features,
+#   inference, smoothing, fsr, alert_decision, actuator, frame_to_alert,
+#   frame_to_actuator, ...), a one-line summary for periodic logs, an
+#   end-of-session table / JSON file and a local HTTP endpoint
+# - Metrics(enabled=False): add() is a no-op, nothing is allocated
+# -----------------------------
+
+# ========== Imports ==========
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class LatencyHistogram:
+    """
+    Streaming latency distribution in constant memory.
+
+    Usage:
+        hist = LatencyHistogram()
+        hist.add(0.0123)                # seconds
+        hist.percentile(95)             # seconds (bucket midpoint)
+
+    Percentiles are accurate to about half a bucket (~3% with the default
+    20 buckets per decade) and clamped to the observed min / max.
+    """
+
+    def __init__(self, low=1e-6, high=100.0, per_decade=20):
+        self.low = low
+        self.per_decade = per_decade
+        self.n_buckets = int(math.ceil(math.log10(high / low) * per_decade))
+        self.counts = [0] * (self.n_buckets + 2)     # [under low] + buckets + [over high]
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds):
+        if seconds < self.low:
+            i = 0
+        else:
+            i = int(math.log10(seconds / self.low) * self.per_decade) + 1
+            if i > self.n_buckets:
+                i = self.n_buckets + 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        """
+        Latency below which p percent of the samples fall (seconds).
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(self.count * p / 100.0)))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                break
+        if i == 0:
+            value = self.low
+        else:
+            value = self.low * 10 ** ((i - 0.5) / self.per_decade)     # geometric bucket midpoint
+        return min(max(value, self.min), self.max)
+
+    def summary(self):
+        """
+        count + milliseconds, as used by the log line / report / endpoint.
+        """
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean() * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+def _skip(stage, seconds):
+    pass
+
+
+class Metrics:
+    """
+    Per-stage latency histograms shared by all threads.
+
+    Usage:
+        metrics = Metrics()                     # Metrics(enabled=False) -> no-op
+        metrics.add("inference", seconds)
+        metrics.serve(port=9108)                # GET /metrics (text) or /metrics.json
+        print(metrics.log_line())               # periodic one-liner
+        print(metrics.report())                 # end of session
+        metrics.close()
+
+    Stages appear in the order they are first recorded.
+    """
+
+    def __init__(self, enabled=True, **histogram_args):
+        self.enabled = enabled
+        self._histogram_args = histogram_args
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._server = None
+        if not enabled:
+            self.add = _skip            # instance attribute: one cheap call, no lock
+
+    def add(self, stage, seconds):
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                hist = self._histograms[stage] = LatencyHistogram(**self._histogram_args)
+            hist.add(seconds)
+
+    def snapshot(self):
+        """
+        {stage: summary dict} (see LatencyHistogram.summary).
+        """
+        with self._lock:
+            return {stage: hist.summary() for stage, hist in self._histograms.items()}
+
+    # ================== Output ==================
+    def log_line(self, stages=None):
+        """
+        One line with p50 / p95 / p99 (ms) per stage.
+        """
+        parts = []
+        for stage, s in self.snapshot().items():
+            if stages is None or stage in stages:
+                parts.append(f"{stage} {s['p50_ms']:.1f}/{s['p95_ms']:.1f}/{s['p99_ms']:.1f}")
+        return "[METRICS] p50/p95/p99 ms: " + (" | ".join(parts) if parts else "no samples")
+
+    def report(self):
+        """
+        Multi-line table for the end-of-session summary.
+        """
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "  (no latency samples)"
+        lines = [f"  {'stage':<18} {'n':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}   (ms)"]
+        for stage, s in snapshot.items():
+            lines.append(f"  {stage:<18} {s['count']:>8} {s['mean_ms']:8.2f} {s['p50_ms']:8.2f} "
+                         f"{s['p95_ms']:8.2f} {s['p99_ms']:8.2f} {s['max_ms']:8.2f}")
+        return "\n".join(lines)
+
+    def to_prometheus(self):
+        """
+        Prometheus text exposition (summary type, seconds).
+        """
+        lines = ["# TYPE adams_stage_latency_seconds summary"]
+        with self._lock:
+            for stage, hist in self._histograms.items():
+                for q in (50, 95, 99):
+                    lines.append(f'adams_stage_latency_seconds{{stage="{stage}",quantile="{q / 100}"}} '
+                                 f"{hist.percentile(q):.6f}")
+                lines.append(f'adams_stage_latency_seconds_sum{{stage="{stage}"}} {hist.total:.6f}')
+                lines.append(f'adams_stage_latency_seconds_count{{stage="{stage}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        return path
+
+    # ================== HTTP endpoint ==================
+    def serve(self, port=9108, host="127.0.0.1"):
+        """
+        Serve the metrics on a daemon thread (local only by default).
+        Returns the bound (host, port); port=0 picks a free one.
+        """
+        if not self.enabled or self._server is not None:
+            return None
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, kind = metrics.to_prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path in ("/", "/metrics.json"):
+                    body, kind = json.dumps(metrics.snapshot()).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass                    # keep the terminal for alerts
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[INFO] Metrics on http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server.server_address
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
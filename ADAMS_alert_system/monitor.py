@@ -0,0 +1,219 @@
+# -----------------------------
+# monitor.py
+# Per-frame driver monitoring steps, independent of threads / camera:
+# - FrameProcessor: frame -> Face Mesh -> EAR / MAR / head pose ->
+#   smoothing + PERCLOS (last 60 s, time-based) -> Random Forest ->
+#   1-second state vote
+# - HandMonitor: FSR "hand on steering wheel" check + alert
+# Both were inline in driver_webcam_RF.py's main loop; pipeline.py runs
+# them on separate threads.
+# -----------------------------
+
+# ========== Imports ==========
+import time
+from collections import deque
+
+import numpy as np
+try:
+    import cv2              # only needed for camera / video frames (not feature replay)
+except ImportError:
+    cv2 = None
+
+from features import FeatureExtractor
+from rolling import RollingWindow
+from smoothing import VoteSmoother
+
+
+LABEL_MAP = {0: "normal", 1: "drowsy", 2: "distracted"}
+LABELS = [LABEL_MAP[i] for i in sorted(LABEL_MAP)]
+
+
+class FrameResult:
+    """
+    Output of FrameProcessor.process() for one frame.
+    timings holds seconds spent per stage (see FrameProcessor.STAGES).
+    """
+
+    __slots__ = ("frame", "captured_at", "face", "ear", "mar", "perclos",
+                 "pitch", "yaw", "roll", "state", "points", "timings")
+
+    def __init__(self, frame, captured_at):
+        self.frame = frame                  # mirrored BGR frame (drawn on by the display)
+        self.captured_at = captured_at      # time.perf_counter() when the frame was read
+        self.face = False
+        self.ear = self.mar = self.perclos = 0.0
+        self.pitch = self.yaw = self.roll = 0.0
+        self.state = "normal"               # smoothed AI state
+        self.points = None                  # (32, 2) int eye + mouth pixels
+        self.timings = {}
+
+    def metrics(self):
+        return dict(ear=self.ear, mar=self.mar, perclos=self.perclos,
+                    pitch=self.pitch, yaw=self.yaw, roll=self.roll)
+
+
+class FrameProcessor:
+    """
+    Everything the old main loop did between cap.read() and system.update().
+
+    Usage:
+        processor = FrameProcessor(face_mesh, forest)
+        result = processor.process(frame, time.perf_counter())
+
+    captured_at is the frame's timestamp in seconds (any monotonic clock);
+    the time-based windows use it, so replays can pass recorded times.
+
+    Keeps the smoothing / PERCLOS / state-vote history between calls, so one
+    instance must only be fed from one thread.
+    """
+
+    STAGES = ("preprocess", "face_mesh", "features", "inference", "smoothing")
+
+    def __init__(self, face_mesh, forest, smoothing_window=5, state_window=30,
+                 perclos_seconds=60.0, perclos_ear=0.2, state_ratio=0.6, smoother=None):
+        self.face_mesh = face_mesh          # mediapipe FaceMesh (or anything with .process(rgb))
+        self.forest = forest                # FlatForest (or anything with .predict_one(vector))
+        self.extractor = FeatureExtractor()
+
+        # ---------- Metric smoothing (EAR / MAR) ----------
+        self.ear_values = deque(maxlen=smoothing_window)
+        self.mar_values = deque(maxlen=smoothing_window)
+
+        # ---------- PERCLOS ----------
+        # fraction of face frames in the last perclos_seconds with eyes closed
+        self.perclos_ear = perclos_ear          # "closed" when smoothed EAR below this
+        self.perclos_window = RollingWindow(perclos_seconds)
+
+        # ---------- AI state vote (1 second at 30 FPS) ----------
+        # default: state_ratio of the last state_window predictions, else
+        # "normal"; pass a VoteSmoother for time windows / hysteresis / soft votes
+        self.smoother = smoother or VoteSmoother(LABELS, window=state_window, enter=state_ratio)
+        self.soft_votes = False     # set True to vote with class probabilities
+
+    # ================== One frame ==================
+    def process(self, frame, captured_at):
+        """
+        Mirror, run Face Mesh and (if a face is found) compute the metrics
+        and smoothed AI state. Returns a FrameResult.
+        """
+        timings = {}
+        t0 = time.perf_counter()
+
+        # ----- Preprocess: mirror + RGB for Mediapipe -----
+        frame = cv2.flip(frame, 1)
+        h, w, _ = frame.shape
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t1 = time.perf_counter()
+        timings["preprocess"] = t1 - t0
+
+        results = self.face_mesh.process(rgb)
+        t2 = time.perf_counter()
+        timings["face_mesh"] = t2 - t1
+
+        result = FrameResult(frame, captured_at)
+        result.timings = timings
+        if not results.multi_face_landmarks:
+            return result
+
+        lm = results.multi_face_landmarks[0].landmark
+        result.face = True
+
+        # ----- Features: EAR / MAR / head pose, smoothing, PERCLOS -----
+        ear_raw, mar_raw, result.pitch, result.yaw, result.roll = self.extractor.compute(lm, w, h)
+        self.ear_values.append(ear_raw)
+        self.mar_values.append(mar_raw)
+        result.ear = ear = np.mean(self.ear_values)
+        result.mar = np.mean(self.mar_values)
+        result.perclos = self.update_perclos(captured_at, ear)
+        result.points = self.extractor.points_int()
+        timings["features"] = time.perf_counter() - t2
+
+        return self.classify(result)
+
+    def classify(self, result):
+        """
+        Random Forest + state vote on result's metrics (sets result.state).
+        Also used directly by replay.py for recorded feature streams.
+        """
+        t0 = time.perf_counter()
+        feature_vector = [result.ear, result.mar, result.perclos, result.pitch, result.yaw, result.roll]
+        if self.soft_votes:
+            proba = self.forest.predict_proba_one(feature_vector)
+            t1 = time.perf_counter()
+            result.state = self.smoother.push_proba(proba, result.captured_at)
+        else:
+            predicted_state = LABEL_MAP[self.forest.predict_one(feature_vector)]
+            t1 = time.perf_counter()
+            result.state = self.smoother.push(predicted_state, result.captured_at)
+        result.timings["inference"] = t1 - t0
+        result.timings["smoothing"] = time.perf_counter() - t1
+        return result
+
+    # ================== History helpers ==================
+    def update_perclos(self, timestamp, ear):
+        """
+        PERCLOS = closed samples / samples within the last perclos_seconds.
+        Time-based, so it stays correct when the frame rate changes.
+        """
+        self.perclos_window.push(timestamp, 1.0 if ear < self.perclos_ear else 0.0)
+        return self.perclos_window.mean()
+
+
+class HandMonitor:
+    """
+    FSR check: alert once when no hand is on the wheel for more than
+    `limit` seconds, keep buzzing while it stays off.
+
+    Usage:
+        hands = HandMonitor(system, read_fsr)
+        fsr_value = hands.check(result.metrics())   # None if no FSR
+
+    detected_at (time.perf_counter() of the frame) is passed on to the
+    buzzer so the actuator can time frame -> output.
+    """
+
+    def __init__(self, system, read_fsr, limit=5.0, clock=None):
+        self.system = system
+        self.read_fsr = read_fsr
+        self.limit = limit
+        self.clock = clock or time.time
+        self.no_hand_start = None       # when the hand first left the wheel
+        self.alert_sent = False
+        self.missing_reported = False   # print the "No FSR" message once
+        self.value = None               # last raw FSR reading (for the overlay)
+
+    def check(self, metrics, detected_at=None):
+        try:
+            hand_on_wheel, self.value = self.read_fsr()
+        except Exception as e:
+            self.value = None
+            if not self.missing_reported:
+                print("No FSR detected:", e)
+                self.missing_reported = True
+            return None
+        self.missing_reported = False
+
+        # --- Hand is NOT on wheel ---
+        if not hand_on_wheel:
+            if self.no_hand_start is None:
+                self.no_hand_start = self.clock()
+            else:
+                elapsed = self.clock() - self.no_hand_start
+                if elapsed > self.limit:
+                    # Send one-time alert and log event
+                    if not self.alert_sent:
+                        print(f"[ALERT] No hand detected for {elapsed:.1f}s!")
+                        self.system.log_state_change("no_hand", reason="Hands off steering >5s", **metrics)
+                        self.alert_sent = True
+
+                    # Keep buzzer sounding as long as hand is off
+                    self.system.play_continuous_buzzer(detected_at)
+
+        # --- Hand returns to wheel ---
+        else:
+            if self.alert_sent:
+                print("[INFO] Hand returned to steering wheel — stopping buzzer.")
+                self.alert_sent = False
+            self.no_hand_start = None
+
+        return self.value
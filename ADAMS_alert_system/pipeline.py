@@ -0,0 +1,257 @@
+# -----------------------------
+# pipeline.py
+# MonitorPipeline: the webcam monitor as separate stages
+# - capture thread : cap.read() into a latest-frame-wins slot (never waits
+#                    for inference; stale frames are replaced, not queued)
+# - process thread : FrameProcessor (Face Mesh, features, RF, state vote)
+# - alert thread   : FSR check + DriverAlertSystem.update(), fed by a
+#                    bounded queue (oldest result dropped if it falls behind)
+# - display        : overlay + imshow on the main thread (OpenCV GUI calls
+#                    must stay there), latest result only; optional
+# Each stage is timed into metrics.Metrics histograms; a one-line p50 /
+# p95 / p99 summary is printed periodically and a full report on stop.
+# -----------------------------
+
+# ========== Imports ==========
+import time
+import queue
+import threading
+
+import cv2
+
+from metrics import Metrics
+
+
+class LatestSlot:
+    """
+    One-item buffer: put() replaces whatever is still waiting, get() takes
+    the newest item. Used where only the freshest frame matters.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.replaced = 0           # items overwritten before anyone took them
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.replaced += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Newest item, or None on timeout / after close().
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class MonitorPipeline:
+    """
+    Usage:
+        pipeline = MonitorPipeline(cap, processor, system, hands)
+        pipeline.run()          # blocks until 'q', end of stream or Ctrl+C
+
+    cap       : cv2.VideoCapture (or anything with .read())
+    processor : monitor.FrameProcessor
+    system    : DriverAlertSystem (only the alert thread calls update())
+    hands     : monitor.HandMonitor or None
+    metrics   : metrics.Metrics (default: a new enabled one)
+    """
+
+    def __init__(self, cap, processor, system, hands=None, display=True,
+                 alert_queue_size=64, stats_interval=30.0, window_name="ADAMS", metrics=None):
+        self.cap = cap
+        self.processor = processor
+        self.system = system
+        self.hands = hands
+        self.display = display
+        self.window_name = window_name
+        self.stats_interval = stats_interval    # seconds between summaries (0 = only on stop)
+
+        # ---------- Hand-off between stages ----------
+        self.frames = LatestSlot()                                  # capture -> process
+        self.alerts = queue.Queue(maxsize=alert_queue_size)         # process -> alert
+        self.latest = LatestSlot()                                  # process -> display
+
+        # ---------- Shared state ----------
+        self.stop_event = threading.Event()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.fsr_value = None               # last FSR reading, shown on the overlay
+        self.captured = 0
+        self.processed = 0
+        self.alerts_dropped = 0
+        self.error = None
+        self._threads = []
+
+    # ================== Lifecycle ==================
+    def start(self):
+        self.started_at = time.perf_counter()
+        for name, target in (("capture", self._capture_loop),
+                             ("process", self._process_loop),
+                             ("alert", self._alert_loop)):
+            thread = threading.Thread(target=self._guard, args=(name, target), name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        self.stop_event.set()
+        self.frames.close()
+        self.latest.close()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run(self):
+        """
+        Start the worker threads and run the display (or an idle wait) on
+        the calling thread until stopped.
+        """
+        self.start()
+        last_report = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                if self.display:
+                    self._show(self.latest.get(timeout=0.1))
+                else:
+                    self.stop_event.wait(0.5)
+                if self.stats_interval and time.perf_counter() - last_report >= self.stats_interval:
+                    last_report = time.perf_counter()
+                    print(self.summary(final=False))
+        except KeyboardInterrupt:
+            print("[INFO] Interrupted.")
+        finally:
+            self.stop()
+        print(self.summary())
+        if self.error is not None:
+            raise self.error
+
+    def _guard(self, name, target):
+        # a failing stage stops the whole pipeline instead of dying silently
+        try:
+            target()
+        except Exception as e:
+            print(f"[ERROR] {name} thread: {e}")
+            self.error = e
+            self.stop_event.set()
+            self.frames.close()
+            self.latest.close()
+
+    # ================== Stages ==================
+    def _capture_loop(self):
+        while not self.stop_event.is_set():
+            t0 = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                print("[INFO] No more frames from the camera.")
+                break
+            captured_at = time.perf_counter()
+            self.metrics.add("capture", captured_at - t0)
+            self.captured += 1
+            self.frames.put((frame, captured_at))
+        self.stop_event.set()
+        self.frames.close()
+
+    def _process_loop(self):
+        while not self.stop_event.is_set():
+            item = self.frames.get(timeout=0.5)
+            if item is None:
+                continue
+            result = self.processor.process(*item)
+            if self.metrics.enabled:
+                for stage, seconds in result.timings.items():
+                    self.metrics.add(stage, seconds)
+            self.processed += 1
+
+            if result.face:
+                self._put_alert(result)
+            if self.display:
+                self.latest.put(result)
+
+    def _put_alert(self, result):
+        while True:
+            try:
+                self.alerts.put_nowait(result)
+                return
+            except queue.Full:
+                try:
+                    self.alerts.get_nowait()
+                    self.alerts_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _alert_loop(self):
+        while not (self.stop_event.is_set() and self.alerts.empty()):
+            try:
+                result = self.alerts.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            t0 = time.perf_counter()
+            metrics = result.metrics()
+            if self.hands is not None:
+                self.fsr_value = self.hands.check(metrics, detected_at=result.captured_at)
+            t1 = time.perf_counter()
+            # detected_at lets the actuator measure frame capture -> pins HIGH
+            self.system.update(ai_state=result.state, detected_at=result.captured_at, **metrics)
+            done = time.perf_counter()
+            self.metrics.add("fsr", t1 - t0)
+            self.metrics.add("alert_decision", done - t1)
+            self.metrics.add("frame_to_alert", done - result.captured_at)
+
+    # ================== Display (main thread) ==================
+    def _show(self, result):
+        if result is not None:
+            t0 = time.perf_counter()
+            draw_overlay(result.frame, result, self.fsr_value)
+            cv2.imshow(self.window_name, result.frame)
+            self.metrics.add("display", time.perf_counter() - t0)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.stop_event.set()
+
+    def summary(self, final=True):
+        """
+        FPS / drop counters plus the latency metrics: one line while running,
+        the full table at the end.
+        """
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        line = (f"[INFO] Pipeline: captured {self.captured / elapsed:.1f} FPS, processed "
+                f"{self.processed / elapsed:.1f} FPS, frames replaced {self.frames.replaced}, "
+                f"alert results dropped {self.alerts_dropped}")
+        if not self.metrics.enabled:
+            return line
+        if not final:
+            return line + "\n" + self.metrics.log_line()
+        return line + "\n" + self.metrics.report()
+
+
+# ========== Overlay (Driver will not see this) ==========
+def draw_overlay(frame, result, fsr_value=None):
+    """
+    Landmarks + metric text, as the old main loop drew them.
+    """
+    if result.points is not None:
+        for x, y in result.points.tolist():
+            cv2.circle(frame, (x, y), 1, (0, 255, 0), -1)
+
+    cv2.putText(frame, f"EAR: {result.ear:.2f}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(frame, f"MAR: {result.mar:.2f}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(frame, f"PERCLOS: {result.perclos:.2f}", (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    # Show FSR value if available, otherwise show fallback text
+    if fsr_value is not None:
+        cv2.putText(frame, f"FSR: {fsr_value:.2f}", (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    else:
+        cv2.putText(frame, "FSR: No FSR detected", (10, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    cv2.putText(frame, f"Pitch:{result.pitch:.1f} Yaw:{result.yaw:.1f} Roll:{result.roll:.1f}", (10, 150),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+    cv2.putText(frame, f"State: {result.state}", (10, 180), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
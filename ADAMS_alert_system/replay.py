@@ -0,0 +1,194 @@
+# -----------------------------
+# replay.py
+# Offline replay of a recorded drive through the detection stack:
+# - feature stream (CSV with ear, mar, perclos, pitch, yaw, roll and an
+#   optional timestamp / label, e.g. RF_training/driver_dataset.csv):
+#   Random Forest -> state vote -> FSR check -> DriverAlertSystem.update
+# - video file: the same plus mirror / Face Mesh / feature extraction
+#   (needs cv2 + mediapipe)
+# GPIO, the FSR ADC and the backend uplink are in-memory fakes (fakes.py)
+# and the alert timers and buzzer hold / patterns follow the recorded
+# timestamps, so a drive replays as fast as the CPU allows on any Linux
+# box with the same buzzer activations as live. Reports FPS, per-stage
+# latency (metrics.py histograms), the events raised and (with labels)
+# state agreement.
+#
+#   python replay.py ../ADAMS_RF/RF_training/driver_dataset.csv
+#   python replay.py drive.mp4 --fsr 20          # hands off the wheel
+# -----------------------------
+
+# ========== Imports ==========
+import os
+import csv
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from functools import partial
+
+from driver_alert_system_RF import DriverAlertSystem
+from fakes import FakeGPIO, FakeADC, FakeUplink, ReplayClock
+from fsr import read_fsr
+from metrics import Metrics
+from monitor import FrameProcessor, FrameResult, HandMonitor
+from rf_fast import FlatForest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(HERE, 'driver_random_forest_model_tuned.adrf')
+FEATURES = ['ear', 'mar', 'perclos', 'pitch', 'yaw', 'roll']
+
+
+# ========== Inputs ==========
+def read_feature_stream(path, fps):
+    """
+    [(timestamp_seconds, metrics_dict, label_or_None), ...] in time order.
+    Rows without a timestamp column are spaced 1/fps apart. Alert timers,
+    buzzer holds and PERCLOS need time to move forward, so out-of-order rows
+    (e.g. a shuffled training CSV) are sorted, with a warning.
+    """
+    rows = []
+    with open(path, newline='') as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if row.get('timestamp'):
+                t = datetime.fromisoformat(row['timestamp']).timestamp()
+            else:
+                t = i / fps
+            rows.append((t, {name: float(row[name]) for name in FEATURES}, row.get('label')))
+    backwards = sum(1 for a, b in zip(rows, rows[1:]) if b[0] < a[0])
+    if backwards:
+        print(f"[WARN] {path}: timestamps go backwards {backwards} time(s) — replaying rows sorted by time")
+        rows.sort(key=lambda row: row[0])
+    return rows
+
+
+def video_frames(path, fps):
+    """
+    (timestamp_seconds, BGR frame) from a video file.
+    """
+    import cv2
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open video: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or fps
+    i = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            yield i / fps, frame
+            i += 1
+    finally:
+        cap.release()
+
+
+def make_face_mesh():
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=False, max_num_faces=1, refine_landmarks=True,
+        min_detection_confidence=0.6, min_tracking_confidence=0.6)
+
+
+# ========== Replay ==========
+class Replay:
+    """
+    Detection stack wired to fakes. feed_features() / feed_frame() run one
+    frame synchronously and record per-stage latency into self.metrics.
+    """
+
+    def __init__(self, forest, fsr_value=500, face_mesh=None, log_dir=None, metrics=None):
+        self.clock = ReplayClock()
+        self.gpio = FakeGPIO()
+        self.uplink = FakeUplink()
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.system = DriverAlertSystem(log_dir=log_dir or tempfile.mkdtemp(prefix="adams_replay_"),
+                                        gpio=self.gpio, uplink=self.uplink, clock=self.clock,
+                                        metrics=self.metrics)
+        self.hands = HandMonitor(self.system, partial(read_fsr, adc=FakeADC(fsr_value)), clock=self.clock)
+        self.processor = FrameProcessor(face_mesh, forest)
+        self.frames = 0
+        self.spacing = 0.0              # median gap between frames (recorded time)
+        self.agree = self.labelled = 0
+
+    def _record(self, result, label, t0):
+        # t0 (perf_counter at frame start) stands in for the capture time
+        if self.metrics.enabled:
+            for stage, seconds in result.timings.items():
+                self.metrics.add(stage, seconds)
+        if result.face:
+            t1 = time.perf_counter()
+            metrics = result.metrics()
+            self.hands.check(metrics, detected_at=t0)
+            t2 = time.perf_counter()
+            self.system.update(ai_state=result.state, detected_at=t0, **metrics)
+            t3 = time.perf_counter()
+            self.metrics.add("fsr", t2 - t1)
+            self.metrics.add("alert_decision", t3 - t2)
+        self.metrics.add("frame_to_alert", time.perf_counter() - t0)
+        self.frames += 1
+        if label:
+            self.labelled += 1
+            self.agree += result.state == label
+
+    def _advance(self, t):
+        self.clock.set(t)
+        self.system.actuator.poll()     # buzzer holds / patterns expire in recorded time
+
+    def feed_features(self, t, metrics, label=None):
+        t0 = time.perf_counter()
+        self._advance(t)
+        result = FrameResult(None, t)
+        result.face = True
+        result.ear, result.mar, result.perclos = metrics['ear'], metrics['mar'], metrics['perclos']
+        result.pitch, result.yaw, result.roll = metrics['pitch'], metrics['yaw'], metrics['roll']
+        self._record(self.processor.classify(result), label, t0)
+
+    def feed_frame(self, t, frame):
+        t0 = time.perf_counter()
+        self._advance(t)
+        self._record(self.processor.process(frame, t), None, t0)
+
+
+# ========== Main ==========
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded drive without camera / Pi / backend")
+    parser.add_argument("source", help="feature CSV or video file")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--fps", type=float, default=30.0, help="frame spacing when the source has no timing")
+    parser.add_argument("--repeat", type=int, default=1, help="replay a feature CSV several times back to back")
+    parser.add_argument("--fsr", type=int, default=500, help="fake FSR reading (<= 72 means no hand on the wheel)")
+    parser.add_argument("--no-metrics", action="store_true", help="disable latency metrics (overhead check)")
+    parser.add_argument("--metrics-json", help="also write the latency summary to this file")
+    args = parser.parse_args()
+
+    replay = Replay(FlatForest.load(args.model), fsr_value=args.fsr, metrics=Metrics(enabled=not args.no_metrics))
+    started = time.perf_counter()
+
+    if args.source.lower().endswith(".csv"):
+        rows = read_feature_stream(args.source, args.fps)
+        span = rows[-1][0] - rows[0][0] + 1.0 / args.fps if rows else 0.0
+        gaps = sorted(b[0] - a[0] for a, b in zip(rows, rows[1:]))
+        replay.spacing = gaps[len(gaps) // 2] if gaps else 0.0
+        for n in range(args.repeat):
+            for t, metrics, label in rows:
+                replay.feed_features(t + n * span, metrics, label)
+    else:
+        replay.processor.face_mesh = make_face_mesh()
+        for t, frame in video_frames(args.source, args.fps):
+            replay.feed_frame(t, frame)
+
+    elapsed = time.perf_counter() - started
+    replay.system.close()
+
+    print(f"[INFO] {replay.frames} frames in {elapsed:.2f} s -> {replay.frames / max(elapsed, 1e-9):.0f} FPS")
+    if replay.metrics.enabled:
+        print(replay.metrics.report())
+        if args.metrics_json:
+            replay.metrics.write_json(args.metrics_json)
+    print(f"[INFO] events: {dict(replay.uplink.event_counts())}")
+    print(f"[INFO] buzzer activations: {replay.gpio.activations(replay.system.BUZZER_PIN)}")
+    if replay.spacing > replay.system.actuator.hold:
+        print(f"[WARN] median frame spacing {replay.spacing * 1000:.0f} ms > buzzer hold "
+              f"{replay.system.actuator.hold * 1000:.0f} ms: continuous alerts re-trigger on every frame")
+    if replay.labelled:
+        print(f"[INFO] smoothed state == label on {replay.agree / replay.labelled:.1%} of {replay.labelled} labelled frames")
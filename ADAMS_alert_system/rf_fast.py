@@ -0,0 +1,264 @@
+# -----------------------------
+# rf_fast.py
+# FlatForest:
+# - The trained RandomForestClassifier flattened into a few numpy arrays
+#   (split feature, threshold, children, leaf class votes)
+# - Predicts one sample by walking all trees at once, one tree level per
+#   step, without sklearn's per-call validation / joblib dispatch
+# - Same arithmetic as the installed sklearn: input cast to float32,
+#   per-tree votes summed in tree order, then argmax
+# - Saved as a versioned .adrf file that loads with numpy only (mmap),
+#   so the Pi never has to import sklearn / joblib at startup
+# -----------------------------
+
+# ========== Imports ==========
+import re
+import json
+import mmap
+import struct
+
+import numpy as np
+
+
+# ========== .adrf File Format ==========
+# [header][metadata JSON][pad to 64][section][pad to 64][section] ...
+#   header   : magic "ADRF", format version (u16), reserved (u16), JSON length (u32), little endian
+#   metadata : utf-8 JSON; "sections" maps array name -> dtype / shape / offset
+#              (offsets counted from the first aligned byte after the JSON)
+# Thresholds are stored as float32 rounded *down*: sklearn compares float32
+# inputs, and x <= t holds exactly when x <= float32_round_down(t).
+FORMAT_MAGIC = b"ADRF"
+FORMAT_VERSION = 1
+ALIGN = 64
+_HEADER = struct.Struct("<4sHHI")
+SECTIONS = ["roots", "feature", "threshold", "children", "nan_left", "leaf_row", "votes"]
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _sklearn_version():
+    """
+    (major, minor) of the installed sklearn (only needed when exporting).
+    """
+    import sklearn
+    return tuple(int(part) for part in re.findall(r"\d+", sklearn.__version__)[:2])
+
+
+def _round_down_f32(values):
+    """
+    Largest float32 <= each float64 value.
+    """
+    with np.errstate(over="ignore"):
+        rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+class FlatForest:
+    """
+    Drop-in replacement for model.predict() on single feature vectors.
+
+    Usage:
+        forest = FlatForest.load('driver_random_forest_model_tuned.adrf')
+        state = forest.predict_one([ear, mar, perclos, pitch, yaw, roll])
+
+    All trees live in one set of node arrays; roots[t] is the first node of
+    tree t. Leaves point to themselves, so extra steps past a leaf are no-ops.
+    Node indices use the narrowest unsigned type that fits (uint16 here).
+    """
+
+    def __init__(self, arrays, classes, max_depth, n_features, metadata=None):
+        self.arrays = arrays                    # compact arrays as stored in the .adrf file
+        self.nan_left = arrays["nan_left"]      # (nodes,)   where a NaN input goes (sklearn missing_go_to_left)
+        self.votes = arrays["votes"]            # (leaves, n_classes) float64 class votes
+
+        # Lookup arrays are widened once here: numpy converts narrow indices to
+        # intp (and mixed float32/float64 compares) on every call otherwise.
+        # float32 thresholds widen to float64 exactly, so results do not change.
+        self.roots = arrays["roots"].astype(np.intp)                    # (trees,)
+        self.feature = arrays["feature"].astype(np.intp)                # (nodes,) split feature (0 on leaves)
+        self.threshold = arrays["threshold"].astype(np.float64)         # (nodes,) go left if x[feature] <= threshold
+        self.children = arrays["children"].astype(np.intp).reshape(-1)  # [2n] right child, [2n+1] left child
+        self.leaf_row = arrays["leaf_row"].astype(np.intp)              # (nodes,) row in votes (leaves only)
+        self.classes = classes
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.metadata = metadata or {}
+
+    @property
+    def n_nodes(self):
+        return self.feature.size
+
+    # ================== Export from sklearn ==================
+    @classmethod
+    def from_sklearn(cls, model, metadata=None):
+        """
+        Flatten a fitted sklearn RandomForestClassifier (single output).
+        """
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("FlatForest supports single-output classifiers only")
+        if model.n_features_in_ > 256:
+            raise ValueError("FlatForest stores feature indices as uint8 (max 256 features)")
+        trees = [est.tree_ for est in model.estimators_]
+        n_classes = len(model.classes_)
+        counts = [t.node_count for t in trees]
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        total = int(offsets[-1])
+        index_dtype = np.uint16 if total <= np.iinfo(np.uint16).max else np.uint32
+
+        feature = np.zeros(total, dtype=np.uint8)
+        threshold = np.zeros(total, dtype=np.float64)
+        children = np.empty((total, 2), dtype=np.int64)
+        nan_left = np.zeros(total, dtype=bool)
+        is_leaf = np.empty(total, dtype=bool)
+        value = np.empty((total, n_classes), dtype=np.float64)
+
+        for tree, base, count in zip(trees, offsets, counts):
+            sl = slice(base, base + count)
+            nodes = np.arange(base, base + count, dtype=np.int64)
+            leaf = tree.children_left == -1
+            is_leaf[sl] = leaf
+            feature[sl] = np.where(leaf, 0, tree.feature)
+            threshold[sl] = np.where(leaf, 0.0, tree.threshold)
+            children[sl, 0] = np.where(leaf, nodes, tree.children_right + base)
+            children[sl, 1] = np.where(leaf, nodes, tree.children_left + base)
+            if hasattr(tree, "missing_go_to_left"):
+                nan_left[sl] = (tree.missing_go_to_left != 0) & ~leaf
+            value[sl] = tree.value[:, 0, :n_classes]
+
+        # Leaf votes exactly as DecisionTreeClassifier.predict_proba returns them:
+        # sklearn >= 1.4 uses tree_.value as stored (fractions when trained there,
+        # raw sample counts for older pickles such as the tuned model);
+        # older releases divide each leaf by its sum at predict time
+        votes = value[is_leaf]
+        if _sklearn_version() < (1, 4):
+            normalizer = votes.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            votes = votes / normalizer
+        leaf_row = np.zeros(total, dtype=index_dtype)
+        leaf_row[is_leaf] = np.arange(int(is_leaf.sum()))
+
+        arrays = {
+            "roots": offsets[:-1].astype(index_dtype),
+            "feature": feature,
+            "threshold": _round_down_f32(threshold),
+            "children": children.astype(index_dtype),
+            "nan_left": nan_left,
+            "leaf_row": leaf_row,
+            "votes": np.ascontiguousarray(votes),
+        }
+        meta = {"feature_names": [str(n) for n in getattr(model, "feature_names_in_", [])],
+                "n_trees": len(trees), "n_nodes": total, "n_leaves": int(is_leaf.sum())}
+        meta.update(metadata or {})
+        return cls(arrays, np.asarray(model.classes_), max(t.max_depth for t in trees),
+                   int(model.n_features_in_), meta)
+
+    # ================== .adrf save / load ==================
+    def save(self, path):
+        """
+        Write the forest as a .adrf file (see format notes at the top).
+        """
+        arrays = {name: np.ascontiguousarray(self.arrays[name]) for name in SECTIONS}
+        arrays["nan_left"] = arrays["nan_left"].view(np.uint8)
+
+        sections, offset = {}, 0
+        for name in SECTIONS:
+            arr = arrays[name]
+            sections[name] = {"dtype": arr.dtype.newbyteorder("<").str, "shape": list(arr.shape), "offset": offset}
+            offset = _align(offset + arr.nbytes)
+
+        meta = dict(self.metadata)
+        meta.update({
+            "classes": self.classes.tolist(),
+            "classes_dtype": self.classes.dtype.str,
+            "max_depth": int(self.max_depth),
+            "n_features": int(self.n_features),
+            "sections": sections,
+        })
+        blob = json.dumps(meta, sort_keys=True).encode("utf-8")
+
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, 0, len(blob)))
+            f.write(blob)
+            base = _align(f.tell())
+            for name in SECTIONS:
+                f.write(b"\0" * (base + sections[name]["offset"] - f.tell()))
+                f.write(arrays[name].astype(sections[name]["dtype"], copy=False).tobytes())
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """
+        Map a .adrf file read-only; the arrays are views into the mapping.
+        Needs numpy only.
+        """
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buf) < _HEADER.size:
+            raise ValueError(f"{path}: not an .adrf file (too short)")
+        magic, version, _, meta_len = _HEADER.unpack_from(buf, 0)
+        if magic != FORMAT_MAGIC:
+            raise ValueError(f"{path}: not an .adrf file")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path}: .adrf format {version} is newer than this reader ({FORMAT_VERSION})")
+
+        meta = json.loads(buf[_HEADER.size:_HEADER.size + meta_len].decode("utf-8"))
+        base = _align(_HEADER.size + meta_len)
+        arrays = {}
+        for name in SECTIONS:
+            spec = meta["sections"][name]
+            shape = tuple(spec["shape"])
+            arr = np.frombuffer(buf, dtype=spec["dtype"], count=int(np.prod(shape)), offset=base + spec["offset"])
+            arrays[name] = arr.reshape(shape)
+        arrays["nan_left"] = arrays["nan_left"].view(bool)
+
+        classes = np.array(meta.pop("classes"), dtype=meta.pop("classes_dtype"))
+        return cls(arrays, classes, meta.pop("max_depth"), meta.pop("n_features"), meta)
+
+    # ================== Traversal ==================
+    def _leaves(self, x):
+        """
+        Leaf node of every tree for one sample (float32 values held as float64).
+        """
+        node = self.roots
+        feature, threshold, children = self.feature, self.threshold, self.children
+        if np.isnan(x).any():
+            nan_left = self.nan_left
+            for _ in range(self.max_depth):
+                xf = x[feature[node]]
+                go_left = (xf <= threshold[node]) | (np.isnan(xf) & nan_left[node])
+                node = children[node * 2 + go_left]
+            return node
+        for _ in range(self.max_depth):
+            node = children[node * 2 + (x[feature[node]] <= threshold[node])]
+        return node
+
+    # ================== Prediction ==================
+    def predict_proba_one(self, features):
+        """
+        Class probabilities for one feature vector (== model.predict_proba([features])[0]).
+        """
+        # sklearn casts inputs to float32 before comparing with the thresholds
+        x = np.asarray(features, dtype=np.float32).astype(np.float64)
+        if x.shape != (self.n_features,):
+            raise ValueError(f"expected {self.n_features} features, got shape {x.shape}")
+        # summing down axis 0 adds the trees one after another, like sklearn
+        proba = self.votes[self.leaf_row[self._leaves(x)]].sum(axis=0)
+        proba /= len(self.roots)
+        return proba
+
+    def predict_one(self, features):
+        """
+        Predicted class for one feature vector (== model.predict([features])[0]).
+        """
+        return self.classes[np.argmax(self.predict_proba_one(features))]
+
+    def predict(self, X):
+        """
+        Predicted classes for a 2-D batch (used for verification).
+        """
+        X = np.asarray(X, dtype=np.float32)
+        return np.array([self.predict_one(row) for row in X], dtype=self.classes.dtype)
@@ -0,0 +1,137 @@
+# -----------------------------
+# rolling.py
+# RollingWindow:
+# - Time-based sliding window over (timestamp, value) samples
+# - Fixed-size ring buffer (memory allocated once), O(1) push
+# - Samples older than `seconds` are evicted exactly, whatever the FPS
+# - Running sum / sum of squares -> mean, variance, std
+# Used for PERCLOS (value = 1.0 eyes closed / 0.0 open), reusable for MAR,
+# head-pose variance or any other windowed metric.
+# -----------------------------
+
+
+class RollingWindow:
+    """
+    Mean / variance of the samples from the last `seconds`.
+
+    Usage:
+        perclos = RollingWindow(seconds=60)
+        perclos.push(timestamp, 1.0 if closed else 0.0)
+        perclos.mean()          # fraction of the last 60 s with eyes closed
+
+    Timestamps must not go backwards (time.perf_counter() / time.time(), or
+    recorded times in a replay). The buffer holds `capacity` samples
+    (default: seconds * max_rate); if samples arrive faster than that, the
+    oldest are dropped early and counted in `overflowed`.
+    """
+
+    def __init__(self, seconds, max_rate=60, capacity=None):
+        if seconds <= 0:
+            raise ValueError("seconds must be > 0")
+        self.seconds = float(seconds)
+        self.capacity = capacity or int(self.seconds * max_rate) + 1
+        self._times = [0.0] * self.capacity
+        self._values = [0.0] * self.capacity
+        self._start = 0             # index of the oldest sample
+        self._count = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._pushes = 0            # for the periodic exact re-sum
+        self.overflowed = 0
+
+    def __len__(self):
+        return self._count
+
+    # ================== Update ==================
+    def push(self, timestamp, value):
+        """
+        Add one sample and evict everything older than the window.
+        """
+        value = float(value)
+        if self._count == self.capacity:
+            self._pop()
+            self.overflowed += 1
+
+        end = self._start + self._count
+        if end >= self.capacity:
+            end -= self.capacity
+        self._times[end] = timestamp
+        self._values[end] = value
+        self._count += 1
+        self._sum += value
+        self._sumsq += value * value
+
+        self.evict(timestamp)
+
+        # float sums drift slowly when values are added and removed for
+        # hours; recompute them exactly once per buffer length (amortised O(1))
+        self._pushes += 1
+        if self._pushes >= self.capacity:
+            self._pushes = 0
+            self._resum()
+
+    def evict(self, now):
+        """
+        Drop samples with timestamp <= now - seconds.
+        """
+        cutoff = now - self.seconds
+        times = self._times
+        while self._count and times[self._start] <= cutoff:
+            self._pop()
+
+    def _pop(self):
+        value = self._values[self._start]
+        self._sum -= value
+        self._sumsq -= value * value
+        self._start += 1
+        if self._start == self.capacity:
+            self._start = 0
+        self._count -= 1
+        if self._count == 0:
+            self._sum = self._sumsq = 0.0
+
+    def _resum(self):
+        total = totalsq = 0.0
+        i = self._start
+        for _ in range(self._count):
+            v = self._values[i]
+            total += v
+            totalsq += v * v
+            i += 1
+            if i == self.capacity:
+                i = 0
+        self._sum, self._sumsq = total, totalsq
+
+    def clear(self):
+        self._start = self._count = 0
+        self._sum = self._sumsq = 0.0
+
+    # ================== Statistics ==================
+    def sum(self):
+        return self._sum
+
+    def mean(self, default=0.0):
+        return self._sum / self._count if self._count else default
+
+    def variance(self, default=0.0):
+        """
+        Population variance of the values in the window.
+        """
+        if not self._count:
+            return default
+        mean = self._sum / self._count
+        return max(0.0, self._sumsq / self._count - mean * mean)
+
+    def std(self, default=0.0):
+        return self.variance(default) ** 0.5
+
+    def span(self):
+        """
+        Seconds covered by the samples currently in the window.
+        """
+        if not self._count:
+            return 0.0
+        last = self._start + self._count - 1
+        if last >= self.capacity:
+            last -= self.capacity
+        return self._times[last] - self._times[self._start]
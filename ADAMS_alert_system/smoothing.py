@@ -0,0 +1,156 @@
+# -----------------------------
+# smoothing.py
+# VoteSmoother:
+# - Streaming majority vote over the last N predictions or last T seconds
+# - Per-class counts updated on push / evict (O(1) in the window length),
+#   no Counter rebuilt per frame
+# - Hysteresis: a state is entered at `enter` share of the window and kept
+#   until it drops below `exit` (both per state if needed)
+# - Accepts hard labels or class probabilities (soft votes)
+# Configured as VoteSmoother(LABELS, window=30, enter=0.6) it gives the same
+# output as the original "60% of the last 30 frames, else normal" rule.
+# -----------------------------
+
+# ========== Imports ==========
+from collections import deque
+
+
+class VoteSmoother:
+    """
+    Usage:
+        smoother = VoteSmoother(["normal", "drowsy", "distracted"], window=30, enter=0.6)
+        state = smoother.push("drowsy")                  # hard vote
+        state = smoother.push_proba([0.2, 0.7, 0.1])     # soft vote
+        # time-based: VoteSmoother(labels, seconds=1.0, min_samples=10)
+        #             smoother.push(label, timestamp)
+
+    enter / exit : share of the window (0..1) needed to switch to / stay in
+                   a state; a float for all states or a dict per label.
+                   exit defaults to enter (no hysteresis).
+    default      : state reported when no state qualifies.
+    min_samples  : votes needed before any decision (default: a full count
+                   window, 1 for time windows).
+
+    Ties between equally voted states go to the one listed first in labels
+    (only possible when enter <= 0.5).
+    """
+
+    def __init__(self, labels, window=None, seconds=None, enter=0.6, exit=None,
+                 default=None, min_samples=None):
+        if (window is None) == (seconds is None):
+            raise ValueError("give exactly one of window (votes) or seconds")
+        self.labels = list(labels)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.window = window
+        self.seconds = seconds
+        self.default = self.labels[0] if default is None else default
+        if min_samples is None:
+            min_samples = window if window is not None else 1
+        self.min_samples = min_samples
+
+        k = len(self.labels)
+        self.enter = self._per_state(enter, k)
+        self.exit = self.enter if exit is None else self._per_state(exit, k)
+
+        self._votes = deque()       # (timestamp, class index) or (timestamp, probabilities)
+        self._counts = [0] * k      # votes per class in the window (ints for hard votes)
+        self._total = 0             # sum of all weights (== number of hard votes)
+        self._current = None        # index of the held state, None -> default
+        self.state = self.default
+
+    def _per_state(self, value, k):
+        if isinstance(value, dict):
+            return [value.get(label, float("inf")) for label in self.labels]   # unlisted: never entered
+        return [value] * k
+
+    def __len__(self):
+        return len(self._votes)
+
+    # ================== Input ==================
+    def push(self, label, timestamp=None):
+        """
+        One hard vote (a label from labels). Returns the smoothed state.
+        """
+        i = self.index[label]
+        self._evict_for(timestamp)
+        self._votes.append((timestamp, i))
+        self._counts[i] += 1
+        self._total += 1
+        return self._decide()
+
+    def push_proba(self, proba, timestamp=None):
+        """
+        One soft vote: class probabilities in labels order (scaled to sum 1,
+        so every frame weighs the same). Returns the smoothed state.
+        """
+        proba = [float(p) for p in proba]
+        weight = sum(proba)
+        if weight > 0:
+            proba = [p / weight for p in proba]
+        self._evict_for(timestamp)
+        self._votes.append((timestamp, proba))
+        counts = self._counts
+        for i, p in enumerate(proba):
+            counts[i] += p
+        self._total += sum(proba)
+        return self._decide()
+
+    def _evict_for(self, timestamp):
+        if self.window is not None:
+            if len(self._votes) >= self.window:
+                self._pop()
+        else:
+            cutoff = timestamp - self.seconds
+            while self._votes and self._votes[0][0] <= cutoff:
+                self._pop()
+
+    def _pop(self):
+        _, vote = self._votes.popleft()
+        if isinstance(vote, int):
+            self._counts[vote] -= 1
+            self._total -= 1
+        else:
+            for i, p in enumerate(vote):
+                self._counts[i] -= p
+            self._total -= sum(vote)
+        if not self._votes:
+            self._counts = [0] * len(self.labels)       # no float residue on empty
+            self._total = 0
+
+    def reset(self):
+        self._votes.clear()
+        self._counts = [0] * len(self.labels)
+        self._total = 0
+        self._current = None
+        self.state = self.default
+
+    # ================== Decision ==================
+    def shares(self):
+        """
+        Share of the window per label.
+        """
+        total = self._total
+        return {label: (self._counts[i] / total if total else 0.0) for i, label in enumerate(self.labels)}
+
+    def _decide(self):
+        if len(self._votes) < self.min_samples or self._total <= 0:
+            self._current, self.state = None, self.default
+            return self.state
+
+        counts, total = self._counts, self._total
+        best = max(range(len(counts)), key=counts.__getitem__)   # first label wins ties
+
+        current = self._current
+        if current is not None and counts[current] / total >= self.exit[current]:
+            # held state still above its exit share; switch only if another
+            # state clearly qualifies to enter and leads
+            if best != current and counts[best] > counts[current] and counts[best] / total >= self.enter[best]:
+                current = best
+        elif counts[best] / total >= self.enter[best]:
+            current = best
+        else:
+            current = None
+
+        self._current = current
+        self.state = self.default if current is None else self.labels[current]
+        return self.state
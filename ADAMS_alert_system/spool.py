@@ -0,0 +1,293 @@
+# -----------------------------
+# spool.py
+# EventSpool:
+# - Append-only, crash-safe local store for backend payloads
+# - Segmented JSON-lines files with rotation (disk usage is bounded)
+# - Frame loop only appends one buffered line (a few microseconds)
+# - Uplink worker reads pending records, acks what the backend accepted
+#
+# Run directly to drain a spool directory without the camera:
+#   python spool.py --dir ./logs/spool
+# -----------------------------
+
+# ========== Imports ==========
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+
+class EventSpool:
+    """
+    Durable FIFO of (seq, kind, doc) records.
+
+    Layout inside spool_dir:
+    - seg-<first seq>.jsonl : one JSON record per line, appended in order
+    - ack                   : highest seq the backend has accepted
+
+    A process crash loses nothing that was appended (every line is flushed
+    to the OS); sync() fsyncs for power loss and is called from the worker.
+    """
+
+    SEGMENT_PREFIX = "seg-"
+    SEGMENT_SUFFIX = ".jsonl"
+
+    def __init__(self, spool_dir="./logs/spool", segment_bytes=1_000_000, max_segments=32):
+        self.dir = Path(spool_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        # ---------- Size limits (max disk = segment_bytes * max_segments) ----------
+        self.segment_bytes = segment_bytes
+        self.max_segments  = max_segments
+
+        self._lock = threading.Lock()
+        self._ack_path = self.dir / "ack"
+        self._acked = self._read_ack()
+        self._dropped = 0            # records deleted by rotation before being sent
+        self._unsynced = []          # sealed segments not fsynced yet
+
+        # ---------- Recover writer position ----------
+        self._segments = self._list_segments()   # [(first_seq, path)] oldest first
+        self._next_seq = self._recover_next_seq()
+        if not self._segments:
+            self._open_segment(self._next_seq)
+        else:
+            path = self._segments[-1][1]
+            self._fh = open(path, "a", encoding="utf-8")
+            self._bytes = path.stat().st_size
+
+        # ---------- Reader position (starts at first unacked record) ----------
+        self._read_seq = self._acked
+        self._read_path = None
+        self._read_off = 0
+
+    # ================== Recovery helpers ==================
+    def _read_ack(self):
+        try:
+            return int(self._ack_path.read_text().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _list_segments(self):
+        segments = []
+        for path in self.dir.glob(f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}"):
+            first = path.name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]
+            if first.isdigit():
+                segments.append((int(first), path))
+        segments.sort()
+        return segments
+
+    def _recover_next_seq(self):
+        """
+        Find the last complete record; a torn final line (crash mid-write) is cut off.
+        """
+        while self._segments:
+            first, path = self._segments[-1]
+            data = path.read_bytes()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+            last = None
+            for line in data[:end].splitlines():
+                try:
+                    last = json.loads(line)["seq"]
+                except (ValueError, KeyError):
+                    continue
+            if last is not None:
+                return last + 1
+            if len(self._segments) > 1:
+                path.unlink()            # empty segment left by a crash
+                self._segments.pop()
+            else:
+                return max(first, self._acked + 1)
+        return self._acked + 1
+
+    def _open_segment(self, first_seq):
+        path = self.dir / f"{self.SEGMENT_PREFIX}{first_seq:012d}{self.SEGMENT_SUFFIX}"
+        self._fh = open(path, "a", encoding="utf-8")
+        self._bytes = 0
+        self._segments.append((first_seq, path))
+
+    # ================== Writer side (frame loop) ==================
+    def append(self, kind, doc):
+        """
+        Append one record and return its sequence number.
+        """
+        with self._lock:
+            seq = self._next_seq
+            line = json.dumps({"seq": seq, "kind": kind, "doc": doc}, separators=(",", ":")) + "\n"
+            self._fh.write(line)
+            self._fh.flush()
+            self._next_seq += 1
+            self._bytes += len(line)
+            if self._bytes >= self.segment_bytes:
+                self._rotate()
+            return seq
+
+    def _rotate(self):
+        """
+        Seal the current segment, start a new one, and drop the oldest
+        segments if the spool is over its disk budget. Caller holds the lock.
+        """
+        self._fh.close()
+        self._unsynced.append(self._segments[-1][1])
+        self._open_segment(self._next_seq)
+
+        while len(self._segments) > self.max_segments:
+            first, path = self._segments.pop(0)
+            next_first = self._segments[0][0]
+            lost = max(0, next_first - 1 - max(self._acked, first - 1))
+            self._dropped += lost
+            self._acked = max(self._acked, next_first - 1)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        if self._dropped:
+            print(f"[WARN] Spool over budget, {self._dropped} unsent record(s) discarded so far")
+
+    # ================== Reader side (uplink worker) ==================
+    def read_pending(self, limit):
+        """
+        Return up to `limit` records after the last one handed out,
+        as a list of (seq, kind, doc). Only complete lines are returned.
+        """
+        records = []
+        with self._lock:
+            segments = list(self._segments)
+            if self._read_seq < self._acked:
+                # Rotation discarded records under the reader: skip ahead
+                self._read_seq = self._acked
+                self._read_path = None
+
+        for first, path in segments:
+            if len(records) >= limit:
+                break
+            next_index = segments.index((first, path)) + 1
+            if next_index < len(segments) and segments[next_index][0] <= self._read_seq + 1:
+                continue                 # every record in this segment was already read
+            offset = self._read_off if path == self._read_path else 0
+            try:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break        # writer has not finished this line yet
+                        offset += len(line)
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if record["seq"] <= self._read_seq:
+                            continue
+                        records.append((record["seq"], record["kind"], record["doc"]))
+                        self._read_seq = record["seq"]
+                        if len(records) >= limit:
+                            break
+            except FileNotFoundError:
+                continue                 # deleted by rotation, move on
+            self._read_path, self._read_off = path, offset
+        return records
+
+    def ack(self, seq):
+        """
+        Mark every record up to `seq` as delivered and delete fully-acked segments.
+        File work happens outside the lock so append() is never held up by it.
+        """
+        done = []
+        with self._lock:
+            if seq <= self._acked:
+                return
+            self._acked = seq
+
+            # A sealed segment is done once the next segment starts after the ack
+            while len(self._segments) > 1 and self._segments[1][0] - 1 <= self._acked:
+                _, path = self._segments.pop(0)
+                if path in self._unsynced:
+                    self._unsynced.remove(path)
+                done.append(path)
+
+        tmp = self._ack_path.with_suffix(".tmp")
+        tmp.write_text(str(seq))
+        os.replace(tmp, self._ack_path)
+        for path in done:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def sync(self):
+        """
+        fsync sealed segments and the active one (worker thread only;
+        fsync on an SD card can take milliseconds).
+        """
+        with self._lock:
+            sealed, self._unsynced = self._unsynced, []
+            fd = self._fh.fileno() if not self._fh.closed else None
+        for path in sealed:
+            try:
+                with open(path, "rb") as f:
+                    os.fsync(f.fileno())
+            except FileNotFoundError:
+                pass
+        if fd is None:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass                         # segment rotated while syncing
+
+    def close(self):
+        with self._lock:
+            if self._fh.closed:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+
+    # ================== Monitoring ==================
+    def pending(self):
+        """
+        Number of records not yet accepted by the backend.
+        """
+        with self._lock:
+            return self._next_seq - 1 - self._acked
+
+    def stats(self):
+        with self._lock:
+            return {
+                "spool_pending":  self._next_seq - 1 - self._acked,
+                "spool_segments": len(self._segments),
+                "spool_dropped":  self._dropped,
+                "spool_bytes":    sum(p.stat().st_size for _, p in self._segments if p.exists()),
+            }
+
+
+# ========== Standalone replay ==========
+if __name__ == "__main__":
+    import argparse
+    from uplink import EventUplink
+    from driver_alert_system_RF import DriverAlertSystem
+
+    parser = argparse.ArgumentParser(description="Drain a spool directory to the backend")
+    parser.add_argument("--dir", default="./logs/spool", help="spool directory")
+    parser.add_argument("--batch", type=int, default=200, help="records per request")
+    args = parser.parse_args()
+
+    spool = EventSpool(args.dir)
+    uplink = EventUplink(DriverAlertSystem.RES_URL, DriverAlertSystem.STATE_URL,
+                         batch_url=DriverAlertSystem.BATCH_URL,
+                         batch_size=args.batch, spool=spool)
+    print(f"[INFO] Replaying {spool.pending()} record(s) from {args.dir}")
+    uplink.start()
+    try:
+        while spool.pending():
+            time.sleep(1.0)
+            print("[INFO] Replay:", uplink.stats())
+    except KeyboardInterrupt:
+        pass
+    uplink.close(timeout=0)
+    spool.close()
+    print("[INFO] Replay finished, pending:", spool.pending())
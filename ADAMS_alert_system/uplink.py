@@ -0,0 +1,362 @@
+# -----------------------------
+# uplink.py
+# EventUplink:
+# - Background worker that ships events / states to the backend
+# - Bounded in-memory queue (frame loop only enqueues, never waits)
+# - One pooled keep-alive HTTP session for all requests
+# - Batches several documents per wake-up, retries with backoff
+# - Exposes queue depth, drop counts and send latency
+# - Optional EventSpool: documents go to disk first and are only
+#   removed once the backend accepted them (survives Wi-Fi loss)
+# - Documents the backend refuses for good (4xx / retry=false) are logged
+#   and dropped; storage or network failures are retried
+# -----------------------------
+
+# ========== Imports ==========
+import time
+import queue
+import random
+import threading
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class EventUplink:
+    """
+    Non-blocking sender for backend payloads.
+
+    Usage:
+        uplink = EventUplink(event_url, state_url)
+        uplink.start()
+        uplink.submit("event", {...})   # returns immediately
+        uplink.close()                  # flush what is left, stop worker
+
+    With spool=EventSpool(...), submit() appends to the spool instead of the
+    in-memory queue and the worker drains the spool in batches, retrying
+    until the backend is reachable again (nothing is dropped on failure).
+    """
+
+    def __init__(self, event_url, state_url, batch_url=None,
+                 max_queue=512, batch_size=32, linger=0.2,
+                 timeout=(2.0, 5.0), max_retries=5,
+                 backoff_base=0.5, backoff_max=30.0,
+                 spool=None, sync_interval=1.0):
+
+        # ---------- Endpoints ----------
+        self.event_url = event_url     # single event endpoint (/api/kucing-event)
+        self.state_url = state_url     # single state endpoint (/api/kucing-state)
+        self.batch_url = batch_url     # optional bulk endpoint (one POST per batch)
+
+        # ---------- Queue / batching ----------
+        self.max_queue  = max_queue    # bounded -> memory on the Pi stays fixed
+        self.batch_size = batch_size   # max documents per wake-up
+        self.linger     = linger       # seconds to wait for more documents before sending
+        self._queue = queue.Queue(maxsize=max_queue)
+
+        # ---------- Durable mode ----------
+        self.spool = spool               # EventSpool or None (memory only)
+        self.sync_interval = sync_interval
+        self._wake = threading.Event()   # set when a new record is spooled
+        self._last_sync = time.time()
+
+        # ---------- Network / retry ----------
+        self.timeout      = timeout    # (connect, read) seconds, never unbounded
+        self.max_retries  = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max  = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # ---------- Worker state ----------
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # ---------- Counters (read via stats()) ----------
+        self._enqueued       = 0
+        self._sent           = 0
+        self._batches        = 0
+        self._retries        = 0
+        self._dropped_full   = 0   # dropped because queue was full
+        self._dropped_failed = 0   # dropped after all retries failed
+        self._rejected       = 0   # refused by the backend (malformed / invalid), not retried
+        self._latency_last   = 0.0
+        self._latency_total  = 0.0
+        self._latency_max    = 0.0
+        self._last_error     = None
+        self._last_drop_warn = 0.0
+
+    # ================== Lifecycle ==================
+    def start(self):
+        """
+        Start the background worker thread (idempotent).
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="uplink", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout=5.0):
+        """
+        Flush remaining documents (up to `timeout` seconds) and stop the worker.
+        """
+        deadline = time.time() + timeout
+        while self._backlog() and time.time() < deadline:
+            time.sleep(0.05)
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(max(0.0, deadline - time.time()) + 0.5)
+        self.session.close()
+        if self.spool is not None:
+            self.spool.close()      # whatever is left is replayed on next start
+
+    def _backlog(self):
+        if self.spool is not None:
+            return self.spool.pending()
+        return self._queue.qsize()
+
+    # ================== Frame-loop side ==================
+    def submit(self, kind, doc):
+        """
+        Queue one document ("event" or "state") for sending.
+        Never blocks: if the queue is full the oldest document is dropped.
+        In durable mode the document is appended to the spool instead.
+        """
+        if self.spool is not None:
+            self.spool.append(kind, doc)
+            self._wake.set()
+            with self._lock:
+                self._enqueued += 1
+            return True
+
+        item = (kind, doc, None)
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    with self._lock:
+                        self._dropped_full += 1
+                except queue.Empty:
+                    pass
+        with self._lock:
+            self._enqueued += 1
+        self._warn_if_dropping()
+        return True
+
+    # ================== Worker side ==================
+    def _run(self):
+        if self.spool is not None:
+            while not self._stop.is_set():
+                batch = self._next_spool_batch()
+                if batch:
+                    self._send_with_retry(batch)
+                if time.time() - self._last_sync >= self.sync_interval:
+                    self.spool.sync()
+                    self._last_sync = time.time()
+            return
+
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if batch:
+                self._send_with_retry(batch)
+
+    def _next_spool_batch(self):
+        """
+        Read the next records from the spool; wait for the frame loop to
+        append more if it is empty, and linger briefly to fill the batch.
+        """
+        self._wake.clear()
+        records = self.spool.read_pending(self.batch_size)
+        if not records:
+            self._wake.wait(0.5)
+            return []
+        if len(records) < self.batch_size and not self._stop.is_set():
+            self._stop.wait(self.linger)
+            records += self.spool.read_pending(self.batch_size - len(records))
+        return [(kind, doc, seq) for seq, kind, doc in records]
+
+    def _next_batch(self):
+        """
+        Block for the first document, then collect whatever else arrives
+        within `linger` seconds (up to batch_size).
+        """
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.time() + self.linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0 and not self._stop.is_set():
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send_with_retry(self, batch):
+        """
+        Send a batch; on failure retry with exponential backoff + jitter.
+        Documents already accepted by the backend are not sent twice.
+        In durable mode accepted documents are acked in the spool and the
+        rest is retried until the backend answers (or the uplink is closed).
+        """
+        pending = list(batch)
+        attempt = 0
+        while pending:
+            start = time.perf_counter()
+            try:
+                sent, rejected = self._post(pending)
+            except Exception as e:
+                sent = rejected = 0
+                self._last_error = str(e)
+            else:
+                if sent == len(pending):
+                    self._record_success(pending, time.perf_counter() - start, rejected)
+                    return
+            if sent:
+                with self._lock:
+                    self._sent += sent - rejected
+                self._ack(pending[:sent])
+                attempt = 0              # progress was made, restart the backoff
+            pending = pending[sent:]
+
+            attempt += 1
+            if self.spool is not None:
+                if self._stop.is_set():
+                    return               # left in the spool for the next start
+            elif attempt > self.max_retries:
+                with self._lock:
+                    self._dropped_failed += len(pending)
+                print(f"[WARN] Uplink gave up on {len(pending)} payload(s):", self._last_error)
+                return
+
+            with self._lock:
+                self._retries += 1
+            # After close() the wait returns immediately, so shutdown is never held up
+            delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+            self._stop.wait(delay * random.uniform(0.5, 1.0))
+
+    def _post(self, batch):
+        """
+        POST the batch and return (handled, rejected): how many documents from
+        the front are done with (accepted or refused for good), and how many
+        of those were refused. Everything after them is retried.
+        - batch_url set   -> one request with all documents; the per-item
+                             results decide what is done (503 + items when
+                             the backend's storage failed)
+        - batch_url unset -> one request per document over the same keep-alive connection
+        """
+        if self.batch_url:
+            body = {"items": [{kind: doc} for kind, doc, _ in batch]}
+            response = self.session.post(self.batch_url, json=body, timeout=self.timeout)
+            try:
+                items = response.json().get("items")
+            except (ValueError, AttributeError):
+                items = None
+            if not isinstance(items, list):
+                if 400 <= response.status_code < 500:
+                    self._reject(batch, f"HTTP {response.status_code}")
+                    return len(batch), len(batch)
+                response.raise_for_status()
+                return len(batch), 0     # older backend without per-item results
+            return self._leading_done(batch, items)
+
+        sent = rejected = 0
+        for kind, doc, _ in batch:
+            url = self.event_url if kind == "event" else self.state_url
+            try:
+                response = self.session.post(url, json={kind: doc}, timeout=self.timeout)
+                if 400 <= response.status_code < 500:
+                    self._reject([(kind, doc, None)], f"HTTP {response.status_code}")
+                    rejected += 1
+                else:
+                    response.raise_for_status()
+            except Exception as e:
+                self._last_error = str(e)
+                break
+            sent += 1
+        return sent, rejected
+
+    def _leading_done(self, batch, items):
+        # walk the per-item results in order and stop at the first one worth retrying
+        results = sorted((r for r in items if isinstance(r, dict)), key=lambda r: r.get("index", 0))
+        handled = rejected = 0
+        for (kind, doc, seq), result in zip(batch, results):
+            if result.get("status") == "ok":
+                pass
+            elif result.get("retry", True):
+                self._last_error = str(result.get("error"))
+                break
+            else:
+                self._reject([(kind, doc, seq)], result.get("error"))
+                rejected += 1
+            handled += 1
+        return handled, rejected
+
+    def _reject(self, items, reason):
+        with self._lock:
+            self._rejected += len(items)
+        for kind, doc, _ in items:
+            print(f"[WARN] Backend refused {kind} {doc.get('type', '')} @ {doc.get('timestamp')}: {reason} — dropped")
+
+    def _ack(self, items):
+        if self.spool is not None and items:
+            self.spool.ack(items[-1][2])
+
+    def _record_success(self, batch, latency, rejected=0):
+        self._ack(batch)
+        count = len(batch) - rejected
+        with self._lock:
+            self._sent += count
+            self._batches += 1
+            self._latency_last = latency
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+
+    def _warn_if_dropping(self):
+        # Rate-limited so a long outage does not flood the terminal
+        now = time.time()
+        if self._dropped_full and now - self._last_drop_warn > 10:
+            self._last_drop_warn = now
+            print(f"[WARN] Uplink queue full, {self._dropped_full} payload(s) dropped so far")
+
+    # ================== Monitoring ==================
+    def stats(self):
+        """
+        Snapshot of uplink health (safe to call from any thread).
+        Latencies are per successful batch, in milliseconds.
+        """
+        spool_stats = self.spool.stats() if self.spool is not None else {}
+        with self._lock:
+            batches = self._batches
+            return {
+                "timestamp":       datetime.now().isoformat(),
+                "queue_depth":     self._backlog(),
+                "queue_max":       self.max_queue,
+                "enqueued":        self._enqueued,
+                "sent":            self._sent,
+                "batches":         batches,
+                "retries":         self._retries,
+                "dropped_full":    self._dropped_full,
+                "dropped_failed":  self._dropped_failed,
+                "rejected":        self._rejected,
+                "latency_last_ms": round(self._latency_last * 1000, 1),
+                "latency_avg_ms":  round(self._latency_total / batches * 1000, 1) if batches else 0.0,
+                "latency_max_ms":  round(self._latency_max * 1000, 1),
+                "last_error":      self._last_error,
+                **spool_stats,
+            }
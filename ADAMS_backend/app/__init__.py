@@ -1,8 +1,14 @@
 from flask import Flask
 from .api.routes import api_bp
+from .logging_config import setup_logging
+from .db.arango_db import init_db
+import os
 #from .extensions import socketio_obj
 
 def create_app():
+    setup_logging()
+    # one pooled connection per request thread + background job worker
+    init_db(pool_size=int(os.getenv("ADAMS_THREADS", "8")) + int(os.getenv("ADAMS_JOB_WORKERS", "2")))
     app = Flask(__name__)
     app.register_blueprint(api_bp, url_prefix="/api")
     return app
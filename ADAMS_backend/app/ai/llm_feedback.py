@@ -1,6 +1,8 @@
 import os
+import json
 import requests
 import re
+from abc import ABC, abstractmethod
 from typing import Dict
 from pydantic import BaseModel, Field
 
@@ -15,11 +17,7 @@ class DrivingFeedback(BaseModel):
     recommended_action: str = Field(..., description="1 sentence of simple, realistic action")
 
 
-def generate_driving_coach_feedback(session_summary_json: str, trend_json: str) -> Dict[str, str]:
-    if not API_KEY:
-        raise ValueError("PERPLEXITY_API_KEY not set")
-    
-    system_message = """You are a friendly, concise driving coach.
+SYSTEM_MESSAGE = """You are a friendly, concise driving coach.
         Your job is to generate short, human-like, motivating feedback based strictly on the provided JSON summaries.
 
         Follow these rules:
@@ -35,42 +33,130 @@ def generate_driving_coach_feedback(session_summary_json: str, trend_json: str)
         - Do not restate numeric values or mention trends literally.
         - Focus on interpreting the patterns naturally."""
 
-    user_message = f"Session: {session_summary_json}\nTrend: {trend_json}"
+
+#----------------------------------------------------------#
+#-------------------providers------------------------------#
+#----------------------------------------------------------#
+
+# A provider turns (session summary JSON, trend JSON) into
+# {"feedback": ..., "recommended_action": ...}. Selected with
+# ADAMS_FEEDBACK_PROVIDER: "perplexity" (default) or "local".
+
+class FeedbackProvider(ABC):
+    name = "base"
+
+    @abstractmethod
+    def generate(self, session_summary_json: str, trend_json: str) -> Dict[str, str]:
+        ...
+
+
+class PerplexityProvider(FeedbackProvider):
+    name = "perplexity"
     model = "sonar-pro"
 
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": user_message}
-        ],
-        "max_tokens": 300,
-        "temperature": 0.4, 
-        "response_format": {
-            "type": "json_schema",
-            "json_schema": {
-                "name": "driving_feedback",
-                "schema": DrivingFeedback.model_json_schema()
+    def __init__(self, api_key=None, timeout=30):
+        self.api_key = api_key or API_KEY
+        self.timeout = timeout
+        self.session = requests.Session()       # keep-alive across calls
+
+    def generate(self, session_summary_json: str, trend_json: str) -> Dict[str, str]:
+        if not self.api_key:
+            raise ValueError("PERPLEXITY_API_KEY not set")
+
+        user_message = f"Session: {session_summary_json}\nTrend: {trend_json}"
+
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_MESSAGE},
+                {"role": "user", "content": user_message}
+            ],
+            "max_tokens": 300,
+            "temperature": 0.4, 
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "driving_feedback",
+                    "schema": DrivingFeedback.model_json_schema()
+                }
             }
         }
-    }
 
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json",
-    }
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
 
-    response = requests.post(BASE_URL, json=payload, headers=headers, timeout=30)
-    response.raise_for_status()
-    
-    content = response.json()["choices"][0]["message"]["content"]
-    feedback_data = DrivingFeedback.model_validate_json(content)
-    
-    return {
-        "feedback": feedback_data.feedback.strip(),
-        "recommended_action": feedback_data.recommended_action.strip()
+        response = self.session.post(BASE_URL, json=payload, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        
+        content = response.json()["choices"][0]["message"]["content"]
+        feedback_data = DrivingFeedback.model_validate_json(content)
+        
+        return {
+            "feedback": feedback_data.feedback.strip(),
+            "recommended_action": feedback_data.recommended_action.strip()
+        }
+
+
+class LocalProvider(FeedbackProvider):
+    """Deterministic stand-in (no network): same input -> same text.
+        used for offline runs and load tests of the feedback pipeline
+    """
+    name = "local"
+
+    # summary event_counts key -> (area to work on, action)
+    ADVICE = {
+        "drowsiness_detected": ("staying alert", "Take a short break every two hours and stop as soon as you feel heavy-eyed."),
+        "eyes_closed_too_long": ("keeping your eyes open and on the road", "Get a full night of sleep before your next drive."),
+        "distraction_detected": ("keeping your attention forward", "Put your phone out of reach and set the navigation before you start."),
+        "yawn_detected": ("managing tiredness", "Open a window or pull over for fresh air when the yawns start."),
     }
 
+    def generate(self, session_summary_json: str, trend_json: str) -> Dict[str, str]:
+        summary = json.loads(session_summary_json) or {}
+        trend = json.loads(trend_json) or {}
+        counts = summary.get("event_counts") or {}
+
+        worst = max(sorted(self.ADVICE), key=lambda k: counts.get(k, 0))
+        if counts.get(worst, 0) == 0:
+            return {
+                "feedback": "That was a calm, focused drive. Keep the same routine next time.",
+                "recommended_action": "Keep taking regular breaks on longer trips."
+            }
+
+        area, action = self.ADVICE[worst]
+        total = (trend.get("events") or {}).get("total_events_trend") or [0, "stable"]
+        if total[1] == "decreasing":
+            opening = "You are having fewer alerts than in earlier drives, nice progress."
+        elif total[1] == "increasing":
+            opening = "Recent drives have been a bit more tiring than before."
+        else:
+            opening = "Thanks for driving with care today."
+        return {
+            "feedback": f"{opening} The main thing to work on next is {area}.",
+            "recommended_action": action
+        }
+
+
+PROVIDERS = {
+    "perplexity": PerplexityProvider,
+    "local": LocalProvider,
+}
+
+_provider = None
+
+def get_provider() -> FeedbackProvider:
+    global _provider
+    if _provider is None:
+        name = os.getenv("ADAMS_FEEDBACK_PROVIDER", "perplexity")
+        _provider = PROVIDERS[name]()
+    return _provider
+
+
+def generate_driving_coach_feedback(session_summary_json: str, trend_json: str) -> Dict[str, str]:
+    return get_provider().generate(session_summary_json, trend_json)
+
 
 def parse_feedback_response(feedback_dict: Dict[str, str]) -> Dict[str, str]:
     """Legacy fallback - now rarely needed with structured outputs.
@@ -1,73 +1,150 @@
 import numpy as np
-from sklearn.linear_model import LinearRegression
 
-def compute_linear_trend(values):
-    """
-    values = [v1, v2, v3, ...]
-    returns slope (positive/negative), and interpretation label
-    """
-    if len(values) < 3:
-        return 0, "not enough data"
+# (group, trend name, path into a session summary) - order fixes the metric vector layout
+METRICS = [
+    ("events", "total_events_trend", ("total_events",)),
+    ("events", "yawn_trend", ("event_counts", "yawn_detected")),
+    ("events", "eyes_closed_trend", ("event_counts", "eyes_closed_too_long")),
+    ("events", "distracted_eventsiation_trend", ("event_counts", "distraction_detected")),
+    ("events", "drowsiness_events_trend", ("event_counts", "drowsiness_detected")),
+    ("durations", "eyes_closed_duration_trend", ("episode_durations", "total_eyes_closed_seconds")),
+    ("durations", "drowsy_duration_trend", ("episode_durations", "total_drowsy_seconds")),
+    ("durations", "distracted_duration_trend", ("episode_durations", "total_distracted_seconds")),
+]
 
-    X = np.arange(len(values)).reshape(-1, 1)
-    y = np.array(values)
+MIN_SESSIONS = 3
 
-    model = LinearRegression().fit(X, y)
-    slope = model.coef_[0]
 
+def trend_label(slope):
     if slope > 0.5:
-        label = "increasing"
+        return "increasing"
     elif slope < -0.5:
-        label = "decreasing"
-    else:
-        label = "stable"
+        return "decreasing"
+    return "stable"
+
 
-    return slope, label
+def summary_vector(summary):
+    """
+    session_summary.json object -> float array of the METRICS values
+    """
+    values = []
+    for _, _, path in METRICS:
+        v = summary
+        for key in path:
+            v = v[key]
+        values.append(v)
+    return np.array(values, dtype=np.float64)
 
 
-def analyze_driver_trends(summary):
+class IncrementalTrend:
     """
-    summary = list of session_summary.json objects
+    Running least-squares trend of every metric against session index.
+
+    x is the session index counted from the device's first session (x = 0),
+    so it stays small however long the history. The statistics are kept
+    centred: weighted means of x and y plus the co-moments
+    sum(w*(x-mean_x)^2) and sum(w*(x-mean_x)*(y-mean_y)) per metric, updated
+    West/Welford style. That is O(1) per session like raw sums, but the slope
+    is cxy / cxx without the sw*sxx - sx^2 cancellation raw sums suffer as
+    the history grows. decay < 1 down-weights older sessions exponentially
+    (weight decay**age); decay = 1 is plain linear regression over all history.
     """
 
-    # === Extract Lists ===
-    total_events = [s["total_events"] for s in summary]
-
-    yawns = [s["event_counts"]["yawn_detected"] for s in summary]
-    eyes_closed = [s["event_counts"]["eyes_closed_too_long"] for s in summary]
-    distracted_events = [s["event_counts"]["distraction_detected"] for s in summary]
-    drowsy_events = [s["event_counts"]["drowsiness_detected"] for s in summary]
-
-    eyes_closed_seconds = [s["episode_durations"]["total_eyes_closed_seconds"] for s in summary]
-    drowsy_seconds = [s["episode_durations"]["total_drowsy_seconds"] for s in summary]
-    distracted_seconds = [s["episode_durations"]["total_distracted_seconds"] for s in summary]
-
-    # === Apply Linear Regression ===
-    total_events_trend = compute_linear_trend(total_events)
-    yawn_trend = compute_linear_trend(yawns)
-    eyes_closed_trend = compute_linear_trend(eyes_closed)
-    distracted_events_trend = compute_linear_trend(distracted_events)
-    drowsy_event_trend = compute_linear_trend(drowsy_events)
-
-    eyes_closed_duration_trend = compute_linear_trend(eyes_closed_seconds)
-    drowsy_duration_trend = compute_linear_trend(drowsy_seconds)
-    distracted_duration_trend = compute_linear_trend(distracted_seconds)
-
-    # === Build Result ===
-    trends = {
-        "events": {
-            "total_events_trend": total_events_trend,
-            "yawn_trend": yawn_trend,
-            "eyes_closed_trend": eyes_closed_trend,
-            "distracted_eventsiation_trend": distracted_events_trend,
-            "drowsiness_events_trend": drowsy_event_trend
-        },
-        "durations": {
-            "eyes_closed_duration_trend": eyes_closed_duration_trend,
-            "drowsy_duration_trend": drowsy_duration_trend,
-            "distracted_duration_trend": distracted_duration_trend
+    def __init__(self, decay=1.0):
+        self.decay = decay
+        self.n = 0                       # sessions seen (next x value)
+        self.sw = 0.0                    # total weight
+        self.mean_x = 0.0
+        self.cxx = 0.0
+        self.mean_y = np.zeros(len(METRICS))
+        self.cxy = np.zeros(len(METRICS))
+
+    def update(self, y):
+        x = float(self.n)
+        d = self.decay
+        self.sw = d * self.sw + 1.0
+        dx = x - self.mean_x
+        self.mean_x += dx / self.sw
+        dy = y - self.mean_y
+        self.mean_y = self.mean_y + dy / self.sw
+        self.cxx = d * self.cxx + dx * (x - self.mean_x)
+        self.cxy = d * self.cxy + dx * (y - self.mean_y)
+        self.n += 1
+
+    def slopes(self):
+        if self.n < MIN_SESSIONS or self.cxx <= 0:
+            return np.zeros(len(METRICS))
+        return self.cxy / self.cxx
+
+    def trends(self):
+        """
+        Same layout as before: {"events": {name: (slope, label)}, "durations": {...}}
+        """
+        result = {"events": {}, "durations": {}}
+        for (group, name, _), slope in zip(METRICS, self.slopes()):
+            if self.n < MIN_SESSIONS:
+                result[group][name] = (0, "not enough data")
+            else:
+                result[group][name] = (float(slope), trend_label(slope))
+        return result
+
+    def to_dict(self):
+        return {
+            "decay": self.decay,
+            "n": self.n,
+            "sw": self.sw,
+            "mean_x": self.mean_x,
+            "cxx": self.cxx,
+            "mean_y": self.mean_y.tolist(),
+            "cxy": self.cxy.tolist(),
         }
-    }
 
-    return trends
+    @classmethod
+    def from_dict(cls, data):
+        trend = cls(decay=data.get("decay", 1.0))
+        trend.n = data["n"]
+        trend.sw = data["sw"]
+        trend.mean_x = data["mean_x"]
+        trend.cxx = data["cxx"]
+        trend.mean_y = np.array(data["mean_y"], dtype=np.float64)
+        trend.cxy = np.array(data["cxy"], dtype=np.float64)
+        return trend
+
+
+def compute_linear_trend(values):
+    """
+    values = [v1, v2, v3, ...]
+    returns slope (positive/negative), and interpretation label
+    """
+    if len(values) < MIN_SESSIONS:
+        return 0, "not enough data"
+
+    x = np.arange(len(values), dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    slope = float(np.polyfit(x, y, 1)[0])
+    return slope, trend_label(slope)
+
+
+def analyze_driver_trends(summary, decay=1.0):
+    """
+    summary = list of session_summary.json objects (oldest first)
+    Full recompute (first trend of a device / rebuilt state): one weighted
+    least-squares solve over the stacked (sessions x metrics) matrix, with
+    session weights decay**age as in IncrementalTrend.
+    """
+    result = {"events": {}, "durations": {}}
+    if len(summary) < MIN_SESSIONS:
+        for group, name, _ in METRICS:
+            result[group][name] = (0, "not enough data")
+        return result
+
+    Y = np.array([summary_vector(s) for s in summary])
+    n = len(Y)
+    x = np.arange(n, dtype=np.float64)
+    sqrt_w = np.sqrt(float(decay) ** (n - 1 - x))[:, None]
+    A = np.column_stack([x, np.ones(n)])
+    coef = np.linalg.lstsq(A * sqrt_w, Y * sqrt_w, rcond=None)[0]
 
+    for (group, name, _), slope in zip(METRICS, coef[0]):
+        result[group][name] = (float(slope), trend_label(slope))
+    return result
@@ -1,11 +1,18 @@
+import json
+import queue
 import requests
-from flask import Blueprint, request, jsonify
-from app.services.auth_services import get_userid, is_userid_provided, auth_match, hash_password, is_authorized_device, get_deviceid
+from flask import Blueprint, request, jsonify, make_response, Response, stream_with_context
+from app.services.auth_services import get_userid, is_userid_provided, auth_match, hash_password, is_authorized_device, get_deviceid, get_device_cache_stats
 from app.services.storing_services import save_user, save_device
-from app.services.hardware_services import store_state ,store_event
-from app.services.client_services import get_today_log, get_event_count, get_driver_state, get_weekly_report, get_monthly_report, get_weekly_event, get_weekly_log
+from app.services.hardware_services import store_state ,store_event, store_batch
+from app.services.client_services import get_dashboard, get_dashboard_etag, get_today_log, get_event_count, get_driver_state, get_weekly_report, get_monthly_report, get_weekly_event, get_weekly_log
 from app.services.sessions_services import get_sessions
-from app.services.feedback_services import fetch_feedback
+from app.services.feedback_services import fetch_feedback, get_feedback_stats
+from app.services.job_services import get_job_status, get_job_metrics
+from app.services.rollup_services import get_rollup_stats
+from app.services.live_services import LIVE_STREAM_ENABLED, subscribe, unsubscribe, get_live_stats
+from app.services.time_services import return_day_bounds
+from app.db.arango_db import get_db_pool_stats
 
 api_bp = Blueprint("api", __name__)
 
@@ -28,6 +35,27 @@ def receive_state():
     result = store_state(data) 
     return jsonify(result)
 
+MAX_BATCH_ITEMS = 5000
+
+#body: {"items": [...]}, a bare JSON array, or NDJSON (one item per line)
+@api_bp.route("/kucing-batch", methods=["POST"])
+def receive_batch():
+    if request.mimetype in ("application/x-ndjson", "application/ndjson"):
+        try:
+            items = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        except ValueError:
+            return jsonify({"error": "Invalid NDJSON"}), 400
+    else:
+        data = request.get_json(silent=True)
+        items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return jsonify({"error": "Invalid JSON"}), 400
+    if len(items) > MAX_BATCH_ITEMS:
+        return jsonify({"error": f"Too many items (max {MAX_BATCH_ITEMS})"}), 413
+    result = store_batch(items)
+    # 503 when storage failed: per-item results still say which items were stored
+    return jsonify(result), (503 if result["status"] == "unavailable" else 200)
+
 #----------------------------------------------------------#
 #-------------------frontend route-------------------------#
 #----------------------------------------------------------#
@@ -95,6 +123,69 @@ def device_user():
     
 #-------------------homepage-------------------------#
 
+#one call for the home screen; a poll with If-None-Match is checked against
+#the newest event/state key of the day (two LIMIT 1 index lookups) and gets
+#304 without building the dashboard while nothing new was stored
+@api_bp.route('/dashboard', methods=["GET"])
+def fetch_dashboard():
+    user_id = request.args.get("userID", None)
+    if not user_id:
+        return jsonify({"error": "Username required"}), 400
+    device_id = get_deviceid(user_id)
+    day_start, day_end = return_day_bounds()
+
+    if request.if_none_match:
+        etag = get_dashboard_etag(device_id, day_start, day_end)
+        if etag in request.if_none_match:
+            response = make_response("", 304)
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+
+    data, etag = get_dashboard(device_id, day_start, day_end)
+    response = make_response(jsonify(data))
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+#server-sent events: every state/event stored for the user's device is pushed
+#as "event: state" / "event: event" with the document as JSON data
+LIVE_KEEPALIVE = 15
+
+@api_bp.route('/live-stream', methods=["GET"])
+def live_stream():
+    if not LIVE_STREAM_ENABLED:
+        return jsonify({"error": "Live stream disabled (ADAMS_LIVE_STREAM=0), poll /dashboard"}), 503
+    user_id = request.args.get("userID", None)
+    if not user_id:
+        return jsonify({"error": "Username required"}), 400
+    device_id = get_deviceid(user_id)
+    if not device_id:
+        return jsonify({"error": "No device registered"}), 404
+
+    q = subscribe(device_id)
+
+    def stream():
+        try:
+            yield f"event: ready\ndata: {json.dumps({'device_id': device_id})}\n\n"
+            while True:
+                try:
+                    item = q.get(timeout=LIVE_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"     # also detects clients that went away
+                    continue
+                if item is None:
+                    return                      # server shutting down, client reconnects
+                kind, doc = item
+                yield f"event: {kind}\ndata: {json.dumps(doc, default=str)}\n\n"
+        finally:
+            unsubscribe(device_id, q)
+
+    response = Response(stream_with_context(stream()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 @api_bp.route('/current-events-list', methods=["GET"])
 def fetch_homepage_log():
     user_id = request.args.get("userID", None)
@@ -166,6 +257,25 @@ def get_feedback():
     result = fetch_feedback(user_id)
     return jsonify(result)
 
+#----------------------background jobs---------------------------#
+@api_bp.route("/jobs/<job_id>", methods=["GET"])
+def fetch_job_status(job_id):
+    result = get_job_status(job_id)
+    if result is None:
+        return jsonify({"error": "Unknown job_id"}), 404
+    return jsonify(result)
+
+@api_bp.route("/stats", methods=["GET"])
+def fetch_stats():
+    return jsonify({
+        "jobs": get_job_metrics(),
+        "device_cache": get_device_cache_stats(),
+        "live": get_live_stats(),
+        "db": get_db_pool_stats(),
+        "feedback": get_feedback_stats(),
+        "rollup": get_rollup_stats()
+    })
+
 #----------------------future route---------------------------#
 HARDWARE_IP = "172.19.23.147"
 
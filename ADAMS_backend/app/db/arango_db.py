@@ -1,25 +1,103 @@
+import os
+import logging
+import threading
 from arango import ArangoClient
+from arango.http import DefaultHTTPClient
+from app.db.schema import migrate
 
-# Connect to ArangoDB server
-client = ArangoClient()
+log = logging.getLogger(__name__)
 
-# setup
-DB_NAME = "ADAMSdb"
-USERNAME = "root"
-PASSWORD = "123"
+# setup (overridable per deployment)
+ARANGO_URL = os.getenv("ARANGO_URL", "http://127.0.0.1:8529")
+DB_NAME = os.getenv("ADAMS_DB_NAME", "ADAMSdb")
+USERNAME = os.getenv("ARANGO_USER", "root")
+PASSWORD = os.getenv("ARANGO_PASSWORD", "123")
 
-# system connection
-sys_db = client.db("_system", username=USERNAME, password=PASSWORD)
+#----------------------------------------------------------#
+#-------------------connection manager---------------------#
+#----------------------------------------------------------#
 
-# if not exist, create
-if not sys_db.has_database(DB_NAME):
-    sys_db.create_database(DB_NAME)
+# Nothing connects at import time. The first attribute access on `db`
+# (from any thread) opens the client, creates the database if missing and
+# runs the schema migration once per process; after that `db` forwards to
+# one shared StandardDatabase whose HTTP pool is sized by init_db().
 
-# connect actual db
-db = client.db(DB_NAME, username=USERNAME, password=PASSWORD)
+class PooledHTTPClient(DefaultHTTPClient):
+    # DefaultHTTPClient that keeps its sessions so pool usage can be reported
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sessions = []
 
-# Create collections if missing
-for name in ["state", "event", "sessions", "summary", "trend", "users", 
-             "users_devices", "authorized_device", "feedback"]:
-    if not db.has_collection(name):
-        db.create_collection(name)
\ No newline at end of file
+    def create_session(self, host):
+        session = super().create_session(host)
+        self.sessions.append(session)
+        return session
+
+
+_settings = {"pool_size": int(os.getenv("ADAMS_DB_POOL", "10"))}
+_state = {"client": None, "http": None, "db": None}
+_init_lock = threading.Lock()
+
+def init_db(pool_size=None):
+    # called from create_app(); only records settings, the connection is lazy
+    if pool_size:
+        _settings["pool_size"] = pool_size
+
+def get_db():
+    database = _state["db"]
+    if database is not None:
+        return database
+    with _init_lock:
+        if _state["db"] is None:
+            _connect()
+        return _state["db"]
+
+def _connect():
+    pool_size = _settings["pool_size"]
+    http = PooledHTTPClient(pool_connections=1, pool_maxsize=pool_size)
+    client = ArangoClient(hosts=ARANGO_URL, http_client=http)
+
+    # system connection: create the database if it does not exist
+    sys_db = client.db("_system", username=USERNAME, password=PASSWORD)
+    if not sys_db.has_database(DB_NAME):
+        sys_db.create_database(DB_NAME)
+
+    database = client.db(DB_NAME, username=USERNAME, password=PASSWORD)
+    migrate(database)
+
+    _state.update(client=client, http=http, db=database)
+    log.info("database connected", extra={"db": DB_NAME, "hosts": ARANGO_URL, "pool_size": pool_size})
+
+def get_db_pool_stats():
+    http = _state["http"]
+    if http is None:
+        return {"connected": False, "pool_size": _settings["pool_size"]}
+    created = requests_sent = idle = 0
+    for session in http.sessions:
+        for adapter in {id(a): a for a in session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                created += pool.num_connections
+                requests_sent += pool.num_requests
+                idle += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+    return {
+        "connected": True,
+        "pool_size": _settings["pool_size"],
+        "connections_created": created,
+        "connections_idle": idle,
+        "requests": requests_sent
+    }
+
+
+class _LazyDatabase:
+    # stands in for the StandardDatabase until first use, then forwards to it
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+    def __repr__(self):
+        return f"<lazy ArangoDB {DB_NAME} ({'connected' if _state['db'] else 'not connected'})>"
+
+db = _LazyDatabase()
@@ -0,0 +1,117 @@
+import sys
+from contextlib import contextmanager
+from arango.aql import AQL
+from app.db.arango_db import db
+
+#----------------------------------------------------------#
+#-------------------EXPLAIN index check--------------------#
+#----------------------------------------------------------#
+
+# Runs the read paths of every service against the live database, records
+# each AQL query they issue, then EXPLAINs it. A plan that enumerates a
+# whole collection (EnumerateCollectionNode) instead of an IndexNode fails.
+# Write-path queries (session close, ingest rollup) are only EXPLAINed with
+# sample bind vars, never executed, so the check does not touch any data.
+#
+# usage (from ADAMS_backend/):  python -m app.db.index_check <user_id>
+
+@contextmanager
+def capture_queries():
+    captured = []
+    original = AQL.execute
+
+    def recording_execute(self, query, *args, **kwargs):
+        captured.append((query, kwargs.get("bind_vars") or {}))
+        return original(self, query, *args, **kwargs)
+
+    AQL.execute = recording_execute
+    try:
+        yield captured
+    finally:
+        AQL.execute = original
+
+def service_calls(user_id, device_id):
+    from app.services import auth_services, client_services, sessions_services, feedback_services, summary_services
+    from app.services.time_services import return_day_bounds
+
+    return [
+        ("auth_match", lambda: auth_services.auth_match("__index_check__", "x")),
+        ("get_userid", lambda: auth_services.get_userid("__index_check__")),
+        ("fetch_deviceid", lambda: auth_services.fetch_deviceid(user_id)),
+        ("is_authorized_device", lambda: auth_services.is_authorized_device(device_id)),
+        ("get_dashboard", lambda: client_services.get_dashboard(device_id, *return_day_bounds())),
+        ("get_dashboard_etag", lambda: client_services.get_dashboard_etag(device_id, *return_day_bounds())),
+        ("get_today_log", lambda: client_services.get_today_log(user_id)),
+        ("get_event_count", lambda: client_services.get_event_count(user_id)),
+        ("get_driver_state", lambda: client_services.get_driver_state(user_id)),
+        ("get_weekly_report", lambda: client_services.get_weekly_report(user_id)),
+        ("get_monthly_report", lambda: client_services.get_monthly_report(user_id)),
+        ("get_weekly_event", lambda: client_services.get_weekly_event(user_id)),
+        ("get_weekly_log", lambda: client_services.get_weekly_log(user_id)),
+        ("get_sessions", lambda: sessions_services.get_sessions(user_id)),
+        ("fetch_feedback", lambda: feedback_services.fetch_feedback(user_id)),
+        ("fetch_latest_summary", lambda: feedback_services.fetch_latest_summary(device_id)),
+        ("fetch_latest_trend", lambda: feedback_services.fetch_latest_trend(device_id)),
+        ("fetch_summary_trend", lambda: summary_services.fetch_summary_trend(device_id)),
+    ]
+
+def write_queries(device_id):
+    # (name, query, bind_vars) for queries that run on every session close / ingest batch
+    from datetime import datetime
+    from app.services import sessions_services, rollup_services
+
+    now = datetime.now()
+    sample_row = {"device_id": device_id, "date": now.date().isoformat(), "day": now.strftime("%A"),
+                  "type": "__index_check__", "count": 1, "first_time": "00:00:00", "last_time": "00:00:00"}
+    return [
+        ("materialise_session", sessions_services.SESSION_WINDOW_QUERY,
+         {"device_id": device_id, "off_time": now.isoformat()}),
+        ("update_daily_rollup", rollup_services.ROLLUP_UPSERT, {"rows": [sample_row]}),
+        ("rollup_repair (count)", rollup_services.DAY_COUNTS_QUERY, {"device_id": device_id, "date": sample_row["date"]}),
+        ("rollup_repair (replace)", rollup_services.ROLLUP_REPLACE, {"rows": [sample_row]}),
+        ("rollup_repair (prune)", rollup_services.ROLLUP_PRUNE_DAY,
+         {"device_id": device_id, "date": sample_row["date"], "types": [sample_row["type"]]}),
+    ]
+
+def plan_scans(plan):
+    # -> (collections read by full scan, index names used)
+    scans, used = [], []
+    for node in plan.get("nodes", []):
+        if node.get("type") == "EnumerateCollectionNode":
+            scans.append(node.get("collection"))
+        elif node.get("type") == "IndexNode":
+            used += [idx.get("name") or idx.get("type") for idx in node.get("indexes", [])]
+    return scans, used
+
+def explain_ok(name, query, bind_vars):
+    scans, used = plan_scans(db.aql.explain(query, bind_vars=bind_vars))
+    if scans:
+        print(f"[FAIL] {name}: full scan of {', '.join(scans)}")
+        return False
+    print(f"[OK]   {name}: {', '.join(used) or 'no collection access'}")
+    return True
+
+def check_service_queries(user_id):
+    from app.services.auth_services import get_deviceid
+    device_id = get_deviceid(user_id) or "__index_check__"
+
+    failures = 0
+    for name, call in service_calls(user_id, device_id):
+        with capture_queries() as captured:
+            try:
+                call()
+            except Exception as e:
+                print(f"[WARN] {name} raised {e!r} (queries issued so far are still checked)")
+        for query, bind_vars in captured:
+            failures += not explain_ok(name, query, bind_vars)
+    for name, query, bind_vars in write_queries(device_id):
+        failures += not explain_ok(name, query, bind_vars)
+    return failures
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python -m app.db.index_check <user_id>")
+        sys.exit(2)
+    failed = check_service_queries(sys.argv[1])
+    print(f"{failed} quer{'y' if failed == 1 else 'ies'} without an index")
+    sys.exit(1 if failed else 0)
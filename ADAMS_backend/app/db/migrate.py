@@ -0,0 +1,16 @@
+import sys
+from app.db.arango_db import get_db
+from app.db.schema import migrate
+
+#----------------------------------------------------------#
+#-------------------schema migration-----------------------#
+#----------------------------------------------------------#
+
+# Applies collections + indexes now instead of on the first request
+# (e.g. in a deploy step before starting gunicorn).
+#
+# usage (from ADAMS_backend/):  python -m app.db.migrate [--force]
+
+if __name__ == "__main__":
+    applied = migrate(get_db(), force="--force" in sys.argv[1:])
+    print("schema applied" if applied else "schema already up to date")
@@ -0,0 +1,122 @@
+import json
+import hashlib
+import logging
+
+log = logging.getLogger(__name__)
+
+#----------------------------------------------------------#
+#-------------------collections + indexes------------------#
+#----------------------------------------------------------#
+
+COLLECTIONS = ["state", "event", "sessions", "summary", "trend", "users",
+               "users_devices", "authorized_device", "feedback", "trend_state",
+               "daily_rollup"]
+
+# persistent indexes per collection, matching the FILTER/SORT fields the
+# services use (compound indexes also serve their leading-field prefixes)
+INDEXES = {
+    "event": [
+        # today / weekly / session windows: device + timestamp range
+        {"name": "idx_event_device_timestamp", "fields": ["device_id", "timestamp"]},
+        # ON lookup and episode pairing: device + type (+ timestamp range)
+        {"name": "idx_event_device_type_timestamp", "fields": ["device_id", "type", "timestamp"]},
+        # date-bounded reports
+        {"name": "idx_event_device_date_type", "fields": ["device_id", "date", "type"]},
+    ],
+    "daily_rollup": [
+        # one row per device/day/type; unique so concurrent UPSERTs cannot duplicate it
+        {"name": "idx_daily_rollup_device_date_type", "fields": ["device_id", "date", "type"], "unique": True},
+    ],
+    "state": [
+        {"name": "idx_state_device_timestamp", "fields": ["device_id", "timestamp"]},
+    ],
+    "sessions": [
+        {"name": "idx_sessions_device", "fields": ["device_id"]},
+    ],
+    "summary": [
+        {"name": "idx_summary_device_end", "fields": ["device_id", "end_time"]},
+    ],
+    "trend": [
+        {"name": "idx_trend_device_timestamp", "fields": ["device_id", "timestamp"]},
+    ],
+    "feedback": [
+        {"name": "idx_feedback_device_timestamp", "fields": ["device_id", "timestamp"]},
+    ],
+    "users": [
+        {"name": "idx_users_username", "fields": ["username"], "unique": True},
+        {"name": "idx_users_email", "fields": ["email"], "sparse": True},
+    ],
+    "users_devices": [
+        {"name": "idx_users_devices_user", "fields": ["user_id"]},
+    ],
+    "authorized_device": [
+        {"name": "idx_authorized_device", "fields": ["device_id"]},
+    ],
+}
+
+def ensure_collections(db):
+    for name in COLLECTIONS:
+        if not db.has_collection(name):
+            db.create_collection(name)
+
+def ensure_indexes(db):
+    # idempotent: indexes already present (by name) are skipped
+    # returns the number of indexes that could not be created
+    failed = 0
+    for collection, indexes in INDEXES.items():
+        col = db.collection(collection)
+        existing = {idx.get("name") for idx in col.indexes()}
+        for spec in indexes:
+            if spec["name"] in existing:
+                continue
+            try:
+                col.add_index({
+                    "type": "persistent",
+                    "name": spec["name"],
+                    "fields": spec["fields"],
+                    "unique": spec.get("unique", False),
+                    "sparse": spec.get("sparse", False),
+                })
+                log.info("index created", extra={"collection": collection, "index": spec["name"]})
+            except Exception as e:
+                # e.g. duplicate usernames already stored block a unique index
+                log.error("could not create index: %s", e, extra={"collection": collection, "index": spec["name"]})
+                failed += 1
+    return failed
+
+
+#----------------------------------------------------------#
+#-------------------migration------------------------------#
+#----------------------------------------------------------#
+
+# The applied schema is recorded in schema_meta as a fingerprint of
+# COLLECTIONS + INDEXES. Startup compares it with one document read and
+# only walks collections/indexes when the definitions above changed (or
+# an earlier run could not create everything). Safe to run concurrently
+# from several workers: every step is idempotent.
+
+META_COLLECTION = "schema_meta"
+META_KEY = "schema"
+
+def schema_fingerprint():
+    spec = json.dumps([COLLECTIONS, INDEXES], sort_keys=True)
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()
+
+def migrate(db, force=False):
+    # -> True if the schema was (re)applied
+    fingerprint = schema_fingerprint()
+    if not db.has_collection(META_COLLECTION):
+        db.create_collection(META_COLLECTION)
+    meta = db.collection(META_COLLECTION)
+    applied = meta.get(META_KEY)
+    if applied and applied.get("fingerprint") == fingerprint and not force:
+        return False
+
+    ensure_collections(db)
+    failed = ensure_indexes(db)
+    if failed:
+        log.warning("schema applied with missing indexes, will retry on next start", extra={"failed": failed})
+        return True
+    meta.insert({"_key": META_KEY, "fingerprint": fingerprint}, overwrite=True)
+    log.info("schema applied", extra={"fingerprint": fingerprint})
+    return True
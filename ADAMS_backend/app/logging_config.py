@@ -0,0 +1,77 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+#----------------------------------------------------------#
+#-------------------structured logging---------------------#
+#----------------------------------------------------------#
+
+# Request threads only put records on an in-memory queue (QueueHandler);
+# one listener thread formats them as JSON lines and writes to stderr, so
+# a slow terminal or log pipe never holds up ingest.
+#
+# ADAMS_LOG_LEVEL   INFO by default; DEBUG also logs every stored document
+# ADAMS_LOG_FORMAT  "json" (default) or "text"
+
+# LogRecord attributes that are not user supplied `extra=` fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(level=None, fmt=None):
+    # idempotent; configures the "app" logger tree (every app.* module)
+    global _listener, _handler
+    if _listener is not None:
+        return
+    level = (level or os.getenv("ADAMS_LOG_LEVEL", "INFO")).upper()
+    fmt = fmt or os.getenv("ADAMS_LOG_FORMAT", "json")
+
+    stream = logging.StreamHandler()
+    if fmt == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("app")
+    logger.setLevel(level)
+    _handler = logging.handlers.QueueHandler(log_queue)
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    # flush queued records (called on worker exit)
+    global _listener, _handler
+    if _listener is not None:
+        logging.getLogger("app").removeHandler(_handler)
+        logging.getLogger("app").propagate = True
+        _listener.stop()
+        _listener, _handler = None, None
@@ -1,5 +1,8 @@
 from flask import jsonify
 from app.db.arango_db import db
+import os
+import time
+import threading
 import bcrypt
 
 #-------------------------------------------------------
@@ -52,8 +55,24 @@ def get_userid(username):
     else:
         return None  
 
-#use for mapping
-def get_deviceid(user_id):
+#user -> device cache: every frontend route resolves the device first,
+#so one dashboard refresh would otherwise repeat the same lookup per call.
+#entries expire after DEVICE_CACHE_TTL seconds (other workers may register
+#a device) and save_device drops the entry for the user it updates.
+#the db lookup runs outside the lock, so invalidation also bumps a
+#generation: a lookup that started before it does not write its (stale)
+#result back. "no device yet" (None) is never cached, so a device paired
+#a moment later shows up on the next call.
+DEVICE_CACHE_TTL = float(os.getenv("ADAMS_DEVICE_CACHE_TTL", "60"))
+DEVICE_CACHE_MAX = 10000
+
+_device_cache = {}                  # user_id -> (device_id, expires_at)
+_device_generation = {}             # user_id -> invalidation count
+_device_epoch = [0]                 # bumped when the whole cache is cleared
+_device_cache_lock = threading.Lock()
+_device_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+def fetch_deviceid(user_id):
     query = """
     FOR device IN users_devices
     FILTER device.user_id == @user_id
@@ -63,6 +82,51 @@ def get_deviceid(user_id):
     cursor = db.aql.execute(query, bind_vars={"user_id": user_id})
     return next(cursor, None)
 
+#use for mapping
+def get_deviceid(user_id):
+    now = time.monotonic()
+    with _device_cache_lock:
+        entry = _device_cache.get(user_id)
+        if entry is not None and entry[1] > now:
+            _device_cache_stats["hits"] += 1
+            return entry[0]
+        _device_cache_stats["misses"] += 1
+        generation = (_device_epoch[0], _device_generation.get(user_id, 0))
+
+    device_id = fetch_deviceid(user_id)
+    if device_id is None:
+        return None
+
+    with _device_cache_lock:
+        if generation != (_device_epoch[0], _device_generation.get(user_id, 0)):
+            return device_id                # invalidated meanwhile: answer, but do not cache
+        if len(_device_cache) >= DEVICE_CACHE_MAX:
+            _device_cache.pop(next(iter(_device_cache)))     # oldest entry
+        _device_cache[user_id] = (device_id, now + DEVICE_CACHE_TTL)
+    return device_id
+
+def invalidate_device_cache(user_id=None):
+    # None clears every entry
+    with _device_cache_lock:
+        if user_id is None:
+            _device_cache.clear()
+            _device_generation.clear()
+            _device_epoch[0] += 1
+        else:
+            _device_cache.pop(user_id, None)
+            _device_generation[user_id] = _device_generation.get(user_id, 0) + 1
+        _device_cache_stats["invalidations"] += 1
+
+def get_device_cache_stats():
+    with _device_cache_lock:
+        lookups = _device_cache_stats["hits"] + _device_cache_stats["misses"]
+        return {
+            **_device_cache_stats,
+            "size": len(_device_cache),
+            "ttl_s": DEVICE_CACHE_TTL,
+            "hit_ratio": round(_device_cache_stats["hits"] / lookups, 3) if lookups else 0.0
+        }
+
 #--------------------------------------------------
 #---------------validate ----------------------------
 #--------------------------------------------------
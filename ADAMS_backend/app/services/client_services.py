@@ -1,5 +1,6 @@
+import hashlib
 from app.db.arango_db import db
-from app.services.time_services import return_today, return_from_monday
+from app.services.time_services import return_today, return_from_monday, return_day_bounds
 from app.services.auth_services import get_deviceid
 
 #----------------------------------------------------------#
@@ -12,13 +13,12 @@ from app.services.auth_services import get_deviceid
 #/current-events-list 
 def get_today_log(user_id):
     device_id = get_deviceid(user_id)
-    today = return_today().strftime('%Y-%m-%d')
+    day_start, day_end = return_day_bounds()
 
     query = """
     FOR e IN event
         FILTER e.device_id == @device_id
-        LET eventDate = SUBSTRING(e.timestamp, 0, 10)
-        FILTER eventDate == @today
+        FILTER e.timestamp >= @day_start AND e.timestamp < @day_end
         FILTER e.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
         SORT e.timestamp ASC
         RETURN {
@@ -27,7 +27,7 @@ def get_today_log(user_id):
         }
     """
 
-    cursor = db.aql.execute(query, bind_vars={'today': today, 'device_id': device_id})
+    cursor = db.aql.execute(query, bind_vars={'day_start': day_start, 'day_end': day_end, 'device_id': device_id})
     result = list(cursor)
     return result
 
@@ -35,19 +35,18 @@ def get_today_log(user_id):
 #/real-time-status
 def get_event_count(user_id):
     device_id = get_deviceid(user_id)
-    today = return_today().strftime('%Y-%m-%d')
+    day_start, day_end = return_day_bounds()
 
     query = """
     FOR e IN event
         FILTER e.device_id == @device_id
-        LET eventDate = SUBSTRING(e.timestamp, 0, 10)
-        FILTER eventDate == @today
+        FILTER e.timestamp >= @day_start AND e.timestamp < @day_end
         FILTER e.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
         COLLECT type = e.type WITH COUNT INTO freq
         RETURN { type: type, freq: freq }
     """
 
-    cursor = db.aql.execute(query, bind_vars={'today': today, 'device_id':device_id})
+    cursor = db.aql.execute(query, bind_vars={'day_start': day_start, 'day_end': day_end, 'device_id':device_id})
 
     result = {}
     for item in cursor:
@@ -59,22 +58,108 @@ def get_event_count(user_id):
 #/current-driver-status (state: normal, drowsy, distracted)
 def get_driver_state(user_id):
     device_id = get_deviceid(user_id)
-    today = return_today().strftime('%Y-%m-%d')
+    day_start, day_end = return_day_bounds()
 
     query = """
     FOR s IN state
         FILTER s.device_id == @device_id
-        LET eventDate = SUBSTRING(s.timestamp, 0, 10)
-        FILTER eventDate == @today
+        FILTER s.timestamp >= @day_start AND s.timestamp < @day_end
         SORT s.timestamp DESC
         LIMIT 1
         RETURN s.driver_state
     """
-    cursor = db.aql.execute(query, bind_vars={'today': today,'device_id': device_id})
+    cursor = db.aql.execute(query, bind_vars={'day_start': day_start, 'day_end': day_end, 'device_id': device_id})
     state = next(cursor, None)
     return {"driver_state": state}
 
 
+#/dashboard (today log + counts + driver state in one round trip)
+#the ETag is derived from the newest event and newest state key of the day;
+#DASHBOARD_TAG_QUERY fetches just those two keys (LIMIT 1 each on the
+#(device_id, timestamp) indexes) so a revalidating poll skips the full query
+DASHBOARD_TAG_QUERY = """
+RETURN {
+    event: FIRST(
+        FOR e IN event
+            FILTER e.device_id == @device_id
+            FILTER e.timestamp >= @day_start AND e.timestamp < @day_end
+            SORT e.timestamp DESC
+            LIMIT 1
+            RETURN e._key
+    ),
+    state: FIRST(
+        FOR s IN state
+            FILTER s.device_id == @device_id
+            FILTER s.timestamp >= @day_start AND s.timestamp < @day_end
+            SORT s.timestamp DESC
+            LIMIT 1
+            RETURN s._key
+    )
+}
+"""
+
+DASHBOARD_QUERY = """
+LET events = (
+    FOR e IN event
+        FILTER e.device_id == @device_id
+        FILTER e.timestamp >= @day_start AND e.timestamp < @day_end
+        SORT e.timestamp ASC
+        RETURN { timestamp: e.timestamp, type: e.type }
+)
+LET state = FIRST(
+    FOR s IN state
+        FILTER s.device_id == @device_id
+        FILTER s.timestamp >= @day_start AND s.timestamp < @day_end
+        SORT s.timestamp DESC
+        LIMIT 1
+        RETURN { key: s._key, driver_state: s.driver_state }
+)
+LET newest_event = FIRST(
+    FOR e IN event
+        FILTER e.device_id == @device_id
+        FILTER e.timestamp >= @day_start AND e.timestamp < @day_end
+        SORT e.timestamp DESC
+        LIMIT 1
+        RETURN e._key
+)
+RETURN { events, state, newest_event }
+"""
+
+NON_ALERT_TYPES = ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
+
+def dashboard_etag(device_id, day_start, event_key, state_key):
+    tag_src = f"{device_id}|{day_start}|{event_key or ''}|{state_key or ''}"
+    return hashlib.sha1(tag_src.encode("utf-8")).hexdigest()[:20]
+
+def get_dashboard_etag(device_id, day_start, day_end):
+    # ETag the dashboard would have now, without building it
+    cursor = db.aql.execute(DASHBOARD_TAG_QUERY, bind_vars={'day_start': day_start, 'day_end': day_end, 'device_id': device_id})
+    keys = next(cursor, None) or {}
+    return dashboard_etag(device_id, day_start, keys.get("event"), keys.get("state"))
+
+def get_dashboard(device_id, day_start, day_end):
+    # -> (data, etag); the ETag covers the newest event/state key of the day
+    cursor = db.aql.execute(DASHBOARD_QUERY, bind_vars={'day_start': day_start, 'day_end': day_end, 'device_id': device_id})
+    row = next(cursor, None) or {"events": [], "state": None, "newest_event": None}
+
+    log, counts = [], {}
+    for e in row["events"]:
+        if e["type"] in NON_ALERT_TYPES:
+            continue
+        log.append({"time": e["timestamp"][11:16], "type": e["type"]})
+        key = e["type"] or 'Other'
+        counts[key] = counts.get(key, 0) + 1
+
+    state = row["state"] or {}
+    data = {
+        "date": day_start,
+        "events": log,
+        "event_count": counts,
+        "driver_state": state.get("driver_state")
+    }
+    return data, dashboard_etag(device_id, day_start, row["newest_event"], state.get("key"))
+
+
 #-----------------------------------------------
 #report
 #-----------------------------------------------
@@ -93,19 +178,20 @@ def get_weekly_report(user_id):
         "Sunday": "Sun"
     }
 
-    weekdays = list(day_map.keys())
-    today_index = return_today().weekday()
-    valid_days = weekdays[:today_index + 1]
+    today = return_today()
+    today_str = today.strftime('%Y-%m-%d')
+    monday_str = return_from_monday().strftime('%Y-%m-%d')
 
+    # this week only (monday..today), read from the daily rollup
     query = """
-    FOR e IN event
-        FILTER e.device_id == @device_id
-        FILTER e.day IN @valid_days
-        FILTER e.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
-        COLLECT day = e.day WITH COUNT INTO freq
+    FOR r IN daily_rollup
+        FILTER r.device_id == @device_id
+        FILTER r.date >= @monday AND r.date <= @today
+        FILTER r.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
+        COLLECT day = r.day AGGREGATE freq = SUM(r.count)
         RETURN { day, freq }
     """
-    cursor = db.aql.execute(query, bind_vars={'valid_days': valid_days, 'device_id':device_id})
+    cursor = db.aql.execute(query, bind_vars={'monday': monday_str, 'today': today_str, 'device_id':device_id})
 
     result = {}
     for item in cursor:
@@ -124,12 +210,12 @@ def get_monthly_report(user_id):
     month_start_str = month_start.strftime('%Y-%m-%d')
 
     query = """
-    FOR e IN event
-        FILTER e.device_id == @device_id
-        FILTER e.date >= @month_start AND e.date <= @today
-        LET dateStr = CONCAT(SUBSTRING(e.date, 8, 2), "/", SUBSTRING(e.date, 5, 2))
-        FILTER e.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
-        COLLECT date_str = dateStr WITH COUNT INTO freq
+    FOR r IN daily_rollup
+        FILTER r.device_id == @device_id
+        FILTER r.date >= @month_start AND r.date <= @today
+        FILTER r.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
+        LET dateStr = CONCAT(SUBSTRING(r.date, 8, 2), "/", SUBSTRING(r.date, 5, 2))
+        COLLECT date_str = dateStr AGGREGATE freq = SUM(r.count)
         RETURN { date_str, freq }
     """
     cursor = db.aql.execute(query, bind_vars={'month_start': month_start_str, 'today': today_str, 'device_id':device_id})
@@ -144,7 +230,7 @@ def get_monthly_report(user_id):
 #weekly activities
 #-----------------------------------------------
 
-#/event-log-list
+#/event-log-list (lists individual events, so this one stays on the raw collection)
 def get_weekly_log(user_id):
     device_id = get_deviceid(user_id)
     today = return_today()
@@ -200,12 +286,11 @@ def get_weekly_event(user_id):
     monday_str = last_monday.strftime('%Y-%m-%d')
 
     query = """
-    FOR e IN event
-        FILTER e.device_id == @device_id
-        FILTER e.date >= @monday AND e.date <= @today
-        FILTER e.type != null
-        FILTER e.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
-        COLLECT day = e.day, type = e.type WITH COUNT INTO freq
+    FOR r IN daily_rollup
+        FILTER r.device_id == @device_id
+        FILTER r.date >= @monday AND r.date <= @today
+        FILTER r.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
+        COLLECT day = r.day, type = r.type AGGREGATE freq = SUM(r.count)
         RETURN {day, type, freq}
     """
 
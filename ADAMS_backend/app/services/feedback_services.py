@@ -1,12 +1,60 @@
+import os
 import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
 from typing import Dict, Any, Optional
 from app.db.arango_db import db
 from app.services.auth_services import get_deviceid
 from app.services.storing_services import save_feedback
-from app.ai.llm_feedback import generate_driving_coach_feedback, parse_feedback_response
+from app.ai.llm_feedback import get_provider, parse_feedback_response
 
-def generate_feedback(device_id) -> Dict[str, Any]:
+log = logging.getLogger(__name__)
+
+#----------------------------------------------------------#
+#-------------------coaching feedback----------------------#
+#----------------------------------------------------------#
+
+# Provider calls run on a small executor: at most FEEDBACK_CONCURRENCY at
+# once and FEEDBACK_MAX_PENDING waiting; beyond that the call is refused.
+# The feedback stage of a finalised session waits for its call (up to
+# FEEDBACK_TIMEOUT seconds) and returns an error dict if the provider
+# failed, timed out or the feedback could not be stored, so the job queue
+# retries the stage and /jobs reports the failure. A timed-out call keeps
+# running; the retry joins it (or hits the cache) instead of calling again.
+# Callers that pass wait=None get the old fire-and-forget behaviour
+# (result stored from a callback, failures only logged).
+#
+# Results are cached by a hash of the provider input with identity and
+# time fields removed, so two sessions with the same counts/durations and
+# trend reuse one response (and the same input in flight is called once).
+FEEDBACK_CONCURRENCY = int(os.getenv("ADAMS_FEEDBACK_CONCURRENCY", "2"))
+FEEDBACK_MAX_PENDING = int(os.getenv("ADAMS_FEEDBACK_MAX_PENDING", "64"))
+FEEDBACK_TIMEOUT = float(os.getenv("ADAMS_FEEDBACK_TIMEOUT", "60"))
+FEEDBACK_CACHE_MAX = 1024
+
+# not part of what the feedback says, so not part of the cache key
+VOLATILE_FIELDS = {"_key", "_id", "_rev", "device_id", "timestamp", "start_time", "end_time"}
+
+_executor = ThreadPoolExecutor(max_workers=FEEDBACK_CONCURRENCY, thread_name_prefix="feedback")
+_cache = OrderedDict()          # cache key -> parsed feedback (LRU)
+_in_flight = {}                 # cache key -> Future
+_lock = threading.Lock()
+_stats = {"requested": 0, "cache_hits": 0, "joined": 0, "calls": 0, "failed": 0, "rejected": 0, "total_ms": 0.0}
+
+def _strip(doc):
+    return {k: v for k, v in (doc or {}).items() if k not in VOLATILE_FIELDS}
+
+def feedback_cache_key(provider_name, summary, trend):
+    payload = json.dumps([provider_name, _strip(summary), _strip(trend)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def generate_feedback(device_id, wait: Optional[float] = None) -> Dict[str, Any]:
+    # wait: seconds to wait for the provider (job stage), None = fire-and-forget
     summary = fetch_latest_summary(device_id)
     trend = fetch_latest_trend(device_id)
     
@@ -15,37 +63,106 @@ def generate_feedback(device_id) -> Dict[str, Any]:
             "error": "No recent session summary found",
             "device_id": device_id
         }
-    
-    session_json = json.dumps(summary)
-    trend_json = json.dumps(trend)
-    
+
+    provider = get_provider()
+    session_json = json.dumps(_strip(summary), sort_keys=True)
+    trend_json = json.dumps(_strip(trend), sort_keys=True)
+    key = feedback_cache_key(provider.name, summary, trend)
+    # stamped now so feedback for consecutive sessions keeps session order
+    timestamp = datetime.now().isoformat()
+
+    with _lock:
+        _stats["requested"] += 1
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            _stats["cache_hits"] += 1
+        elif key in _in_flight:
+            future = _in_flight[key]
+            _stats["joined"] += 1
+        elif len(_in_flight) >= FEEDBACK_MAX_PENDING:
+            _stats["rejected"] += 1
+            return {"error": "Feedback queue full", "device_id": device_id}
+        else:
+            future = _executor.submit(_call_provider, provider, key, session_json, trend_json)
+            _in_flight[key] = future
+
+    if cached is not None:
+        error = _store_feedback(device_id, cached, provider.name, timestamp)
+        return error or {"status": "cached", "device_id": device_id}
+
+    if wait is None:
+        future.add_done_callback(lambda f: _on_done(f, device_id, provider.name, timestamp))
+        return {"status": "queued", "device_id": device_id}
+
     try:
-        feedback_text = generate_driving_coach_feedback(session_json, trend_json)
-        print(f"Feedback text: {feedback_text}")
-        print(feedback_text["feedback"])  
-        print(feedback_text["recommended_action"])
-        parsed_feedback = parse_feedback_response(feedback_text)
+        parsed_feedback = future.result(timeout=wait)
+    except FutureTimeout:
+        return {"error": f"feedback provider timed out after {wait:g}s", "device_id": device_id}
     except Exception as e:
-        return {
-            "error": "Failed to generate feedback",
-            "details": str(e),
-            "device_id": device_id,
-        }
+        log.error("failed to generate feedback: %s", e, extra={"device_id": device_id, "provider": provider.name})
+        return {"error": f"feedback provider failed: {e}", "device_id": device_id}
+    error = _store_feedback(device_id, parsed_feedback, provider.name, timestamp)
+    return error or {"status": "processed", "device_id": device_id}
+
+def _call_provider(provider, key, session_json, trend_json):
+    start = time.perf_counter()
+    try:
+        feedback_text = provider.generate(session_json, trend_json)
+        log.debug("feedback generated", extra={"provider": provider.name, "feedback": feedback_text})
+        parsed_feedback = parse_feedback_response(feedback_text)
+    except Exception:
+        with _lock:
+            _stats["failed"] += 1
+            _in_flight.pop(key, None)
+        raise
+    with _lock:
+        _stats["calls"] += 1
+        _stats["total_ms"] += (time.perf_counter() - start) * 1000
+        _cache[key] = parsed_feedback
+        if len(_cache) > FEEDBACK_CACHE_MAX:
+            _cache.popitem(last=False)
+        _in_flight.pop(key, None)
+    return parsed_feedback
+
+def _on_done(future, device_id, provider_name, timestamp):
+    error = future.exception()
+    if error is not None:
+        log.error("failed to generate feedback: %s", error, extra={"device_id": device_id, "provider": provider_name})
+        return
+    _store_feedback(device_id, future.result(), provider_name, timestamp)
 
+def _store_feedback(device_id, parsed_feedback, provider_name, timestamp):
     feedback_doc = {
         "device_id": device_id,
         "feedback": parsed_feedback["feedback"],
         "recommended_action": parsed_feedback["recommended_action"],
-        "timestamp": datetime.now().isoformat()
+        "provider": provider_name,
+        "timestamp": timestamp
     }
 
-    save_feedback(feedback_doc)
+    return save_feedback(feedback_doc)
+
+def get_feedback_stats():
+    with _lock:
+        calls = _stats["calls"]
+        return {
+            **{k: v for k, v in _stats.items() if k != "total_ms"},
+            "avg_call_ms": round(_stats["total_ms"] / calls, 1) if calls else 0.0,
+            "in_flight": len(_in_flight),
+            "cache_size": len(_cache),
+            "concurrency": FEEDBACK_CONCURRENCY
+        }
+
+def shutdown_feedback(wait=True):
+    # let queued provider calls finish and store their feedback
+    _executor.shutdown(wait=wait)
 
 def fetch_latest_summary(device_id: str) -> Optional[Dict]:
     summary_query = """
     FOR s IN summary
         FILTER s.device_id == @device_id
-        SORT s.timestamp DESC
+        SORT s.end_time DESC
         LIMIT 1
         RETURN s
     """
@@ -1,9 +1,14 @@
-from app.services.storing_services import save_state, save_event
-from app.services.sessions_services import create_session
-from app.services.summary_services import create_summary, store_trends_summary
-from app.services.feedback_services import generate_feedback
+import logging
+from app.services.storing_services import save_state, save_event, save_bulk
+from app.services.sessions_services import materialise_session
+from app.services.summary_services import store_trends_summary
+from app.services.feedback_services import generate_feedback, FEEDBACK_TIMEOUT
+from app.services.job_services import session_jobs
+from app.services.live_services import note_ingest
 from datetime import datetime
 
+log = logging.getLogger(__name__)
+
 
 #----------------------------------------------------------#
 #-------------------hardware ingest------------------------#
@@ -13,24 +18,103 @@ from datetime import datetime
 def store_state(payload: dict):
     state_data = payload.get("state")
     save_state(state_data)
+    note_ingest("state", state_data)
     return {"status": "processed"}
 
 #/kucing-event
 def store_event(payload: dict):
     result_data = payload.get("event")
     save_event(result_data)
+    note_ingest("event", result_data)
     
     if result_data.get("type") == "OFF":
-        device_id = result_data.get("device_id")
-        timestamp_str = result_data.get("timestamp")
-        off_time = None
-        if timestamp_str:
-            dt = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-            off_time = dt.time().isoformat(timespec='minutes')
-        if device_id and off_time:
-            create_session(device_id, off_time)
-            create_summary(device_id, timestamp_str)
-            store_trends_summary(device_id)
-            generate_feedback(device_id)
+        job_id = finalise_session(result_data)
+        return {"status": "processed", "job_id": job_id}
     
     return {"status": "processed"}
+
+#/kucing-batch
+def store_batch(items: list):
+    # items: [{"event": {...}} | {"state": {...}}, ...] in device order
+    results = [None] * len(items)
+    events, event_idx = [], []
+    states, state_idx = [], []
+
+    for i, item in enumerate(items):
+        kind = _item_kind(item)
+        if kind == "event":
+            events.append(item["event"])
+            event_idx.append(i)
+        elif kind == "state":
+            states.append(item["state"])
+            state_idx.append(i)
+        else:
+            results[i] = {"index": i, "status": "error", "error": kind, "retry": False}
+
+    for idx, res in zip(state_idx, save_bulk("state", states)):
+        results[idx] = _item_status(idx, res)
+    for idx, res in zip(event_idx, save_bulk("event", events)):
+        results[idx] = _item_status(idx, res)
+
+    for idx, doc in zip(state_idx, states):
+        if results[idx]["status"] == "ok":
+            note_ingest("state", doc)
+    for idx, doc in zip(event_idx, events):
+        if results[idx]["status"] == "ok":
+            note_ingest("event", doc)
+
+    # sessions are finalised after the whole batch is stored,
+    # so a replayed drive has all its events in place first
+    for idx, doc in zip(event_idx, events):
+        if doc.get("type") == "OFF" and results[idx]["status"] == "ok":
+            results[idx]["job_id"] = finalise_session(doc)
+
+    # "unavailable" (HTTP 503): storage failed for some items, the device keeps
+    # them spooled and resends; items with retry=False are refused for good
+    accepted = sum(1 for r in results if r["status"] == "ok")
+    retryable = sum(1 for r in results if r.get("retry"))
+    return {
+        "status": "unavailable" if retryable else "processed",
+        "accepted": accepted,
+        "rejected": len(items) - accepted - retryable,
+        "retryable": retryable,
+        "items": results
+    }
+
+def _item_kind(item):
+    # "event" / "state", or an error message for a malformed item
+    if not isinstance(item, dict):
+        return "item must be an object"
+    for kind in ("event", "state"):
+        doc = item.get(kind)
+        if isinstance(doc, dict):
+            if not isinstance(doc.get("timestamp"), str):
+                return "missing or invalid timestamp"
+            return kind
+    return "expected {'event': {...}} or {'state': {...}}"
+
+def _item_status(index, res):
+    if "error" in res:
+        return {"index": index, "status": "error", "error": res["error"], "retry": res.get("retry", False)}
+    return {"index": index, "status": "ok", "_key": res["_key"]}
+
+#OFF event -> queue session, summary, trend and feedback in the background
+#returns the job_id (poll /api/jobs/<job_id>) or None if the event is incomplete
+def finalise_session(event: dict):
+    device_id = event.get("device_id")
+    timestamp_str = event.get("timestamp")
+    if not (device_id and timestamp_str):
+        return None
+    try:
+        datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
+    except ValueError:
+        log.warning("invalid OFF timestamp, session not finalised", extra={"device_id": device_id, "timestamp": timestamp_str})
+        return None
+
+    stages = [
+        ("materialise", lambda: materialise_session(device_id, timestamp_str)),
+        ("trend", lambda: store_trends_summary(device_id)),
+        ("feedback", lambda: generate_feedback(device_id, wait=FEEDBACK_TIMEOUT)),
+    ]
+    return session_jobs.submit("finalise_session", stages, key=device_id,
+                               device_id=device_id, off_timestamp=timestamp_str)
@@ -0,0 +1,218 @@
+import logging
+import os
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+
+#----------------------------------------------------------#
+#-------------------background jobs------------------------#
+#----------------------------------------------------------#
+
+# A job is a list of (stage_name, fn) run in order on a worker thread.
+# Each stage is retried with backoff; if it still fails the job stops
+# there (later stages depend on earlier ones). Jobs sharing a key
+# (device_id) never run at the same time, so a device's sessions are
+# finalised in the order their OFF events arrived: only the oldest job
+# of a key is on the run queue, the rest wait in that key's deque and
+# are handed back one by one as each finishes (no worker ever sits
+# blocked behind a busy device).
+
+class StageFailed(Exception):
+    pass
+
+
+class JobQueue:
+    def __init__(self, workers=2, max_attempts=3, retry_delay=2.0, max_history=500):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_history = max_history
+
+        self._queue = queue.Queue()         # jobs ready to run (at most one per key)
+        self._jobs = OrderedDict()          # job_id -> status dict (bounded)
+        self._stage_stats = {}              # stage -> {"count", "failed", "total_ms", "max_ms"}
+        self._waiting = {}                  # key -> deque of jobs queued behind the active one
+        self._outstanding = 0               # submitted and not finished yet
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._threads = []
+        self._stopping = False
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, name, stages, key=None, **meta):
+        if self._stopping:
+            raise RuntimeError("job queue is shutting down")
+        self.start()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "name": name,
+            "key": key,
+            "status": "queued",
+            "created": datetime.now().isoformat(),
+            "started": None,
+            "finished": None,
+            "stages": {stage: {"status": "pending", "attempts": 0, "duration_ms": None, "error": None}
+                       for stage, _ in stages},
+            **meta
+        }
+        item = (job_id, stages, key)
+        with self._lock:
+            self._jobs[job_id] = job
+            self._trim_history()
+            self._outstanding += 1
+            if key is not None and key in self._waiting:
+                self._waiting[key].append(item)     # runs after the key's current job
+                return job_id
+            if key is not None:
+                self._waiting[key] = deque()        # key is now active
+        self._queue.put(item)
+        return job_id
+
+    def status(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "stages": {k: dict(v) for k, v in job["stages"].items()}}
+
+    def metrics(self):
+        with self._lock:
+            by_status = {}
+            for job in self._jobs.values():
+                by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+            stages = {}
+            for stage, s in self._stage_stats.items():
+                stages[stage] = {
+                    "count": s["count"],
+                    "failed": s["failed"],
+                    "avg_ms": round(s["total_ms"] / s["count"], 1) if s["count"] else 0.0,
+                    "max_ms": round(s["max_ms"], 1)
+                }
+            return {
+                "workers": self.workers,
+                "queue_depth": self._queue.qsize() + sum(len(d) for d in self._waiting.values()),
+                "jobs": by_status,
+                "stages": stages
+            }
+
+    def shutdown(self, timeout=30.0):
+        # stop accepting work and wait for queued jobs to finish
+        # (including jobs still waiting behind a busy key)
+        self._stopping = True
+        deadline = time.time() + timeout
+        with self._idle:
+            self._idle.wait_for(lambda: self._outstanding == 0, max(0.0, deadline - time.time()))
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.time()))
+
+    #-------------------worker side------------------------#
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            job_id, stages, key = item
+            try:
+                self._run_job(job_id, stages)
+            finally:
+                self._release(key)
+
+    def _release(self, key):
+        # hand the key's next job to the run queue, or retire the key
+        with self._lock:
+            self._outstanding -= 1
+            if key is not None:
+                waiting = self._waiting.get(key)
+                if waiting:
+                    self._queue.put(waiting.popleft())
+                else:
+                    self._waiting.pop(key, None)
+            if self._outstanding == 0:
+                self._idle.notify_all()
+
+    def _run_job(self, job_id, stages):
+        self._update(job_id, status="running", started=datetime.now().isoformat())
+        for stage, fn in stages:
+            if not self._run_stage(job_id, stage, fn):
+                self._update(job_id, status="failed", finished=datetime.now().isoformat())
+                return
+        self._update(job_id, status="done", finished=datetime.now().isoformat())
+
+    def _run_stage(self, job_id, stage, fn):
+        for attempt in range(1, self.max_attempts + 1):
+            self._update_stage(job_id, stage, status="running", attempts=attempt)
+            start = time.perf_counter()
+            try:
+                result = fn()
+                if isinstance(result, dict) and "error" in result:
+                    raise StageFailed(result["error"])
+            except Exception as e:
+                elapsed = (time.perf_counter() - start) * 1000
+                self._record_stage(stage, elapsed, failed=True)
+                self._update_stage(job_id, stage, status="retrying", duration_ms=round(elapsed, 1), error=str(e))
+                log.warning("job stage failed: %s", e, extra={"stage": stage, "job_id": job_id, "attempt": attempt, "max_attempts": self.max_attempts})
+                if attempt < self.max_attempts:
+                    time.sleep(self.retry_delay * (2 ** (attempt - 1)))
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            self._record_stage(stage, elapsed, failed=False)
+            self._update_stage(job_id, stage, status="done", duration_ms=round(elapsed, 1), error=None)
+            return True
+        self._update_stage(job_id, stage, status="failed")
+        return False
+
+    #-------------------bookkeeping------------------------#
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _update_stage(self, job_id, stage, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id]["stages"][stage].update(fields)
+
+    def _record_stage(self, stage, elapsed_ms, failed):
+        with self._lock:
+            s = self._stage_stats.setdefault(stage, {"count": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0})
+            s["count"] += 1
+            s["failed"] += int(failed)
+            s["total_ms"] += elapsed_ms
+            s["max_ms"] = max(s["max_ms"], elapsed_ms)
+
+    def _trim_history(self):
+        # drop the oldest finished jobs once over max_history (caller holds lock)
+        if len(self._jobs) <= self.max_history:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_history:
+                break
+            if self._jobs[job_id]["status"] in ("done", "failed"):
+                del self._jobs[job_id]
+
+
+# shared queue for post-drive processing (OFF events)
+session_jobs = JobQueue(workers=int(os.getenv("ADAMS_JOB_WORKERS", "2")))
+
+def get_job_status(job_id):
+    return session_jobs.status(job_id)
+
+def get_job_metrics():
+    return session_jobs.metrics()
@@ -0,0 +1,98 @@
+import os
+import queue
+import threading
+
+
+#----------------------------------------------------------#
+#-------------------live pub/sub---------------------------#
+#----------------------------------------------------------#
+
+# /live-stream subscribers get their own bounded queue per device. publish()
+# never blocks ingest: a client that stops reading loses its oldest
+# messages instead of holding up the request that stored the document.
+#
+# Subscribers live in the worker process that accepted the stream and only
+# documents ingested by that same process reach them. Streaming therefore
+# requires a single worker: check_single_worker() refuses to serve more
+# than one while ADAMS_LIVE_STREAM is on (the default). Set
+# ADAMS_LIVE_STREAM=0 to run several workers; /live-stream then answers 503
+# and the app falls back to polling.
+LIVE_STREAM_ENABLED = os.getenv("ADAMS_LIVE_STREAM", "1") != "0"
+SUBSCRIBER_QUEUE_MAX = 100
+
+_subscribers = {}               # device_id -> set of Queue
+_sub_lock = threading.Lock()
+_pubsub_stats = {"published": 0, "delivered": 0, "dropped": 0}
+
+def note_ingest(kind, doc):
+    # called once per stored document ("event" / "state"): pushes it to the
+    # device's live subscribers
+    device_id = (doc or {}).get("device_id")
+    if not device_id or not LIVE_STREAM_ENABLED:
+        return
+    publish(device_id, kind, doc)
+
+def check_single_worker(workers):
+    # called by the server before forking workers
+    if LIVE_STREAM_ENABLED and workers > 1:
+        raise RuntimeError(f"/live-stream needs a single worker process (got {workers}): "
+                           "ingest and streams in different workers never meet. "
+                           "Set ADAMS_WORKERS=1, or ADAMS_LIVE_STREAM=0 to disable streaming.")
+
+def subscribe(device_id):
+    q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_MAX)
+    with _sub_lock:
+        _subscribers.setdefault(device_id, set()).add(q)
+    return q
+
+def unsubscribe(device_id, q):
+    with _sub_lock:
+        subs = _subscribers.get(device_id)
+        if subs is None:
+            return
+        subs.discard(q)
+        if not subs:
+            del _subscribers[device_id]
+
+def publish(device_id, kind, doc):
+    with _sub_lock:
+        subs = list(_subscribers.get(device_id, ()))
+        _pubsub_stats["published"] += 1
+    dropped = 0
+    for q in subs:
+        while True:
+            try:
+                q.put_nowait((kind, doc))
+                break
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                    dropped += 1
+                except queue.Empty:
+                    pass
+    with _sub_lock:
+        _pubsub_stats["delivered"] += len(subs)
+        _pubsub_stats["dropped"] += dropped
+
+def close_streams():
+    # worker shutdown: wake every open /live-stream so it ends its response
+    with _sub_lock:
+        subs = [q for qs in _subscribers.values() for q in qs]
+    for q in subs:
+        try:
+            q.put_nowait(None)
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+            q.put_nowait(None)
+
+def get_live_stats():
+    with _sub_lock:
+        return {
+            "enabled": LIVE_STREAM_ENABLED,
+            **_pubsub_stats,
+            "devices": len(_subscribers),
+            "subscribers": sum(len(s) for s in _subscribers.values())
+        }
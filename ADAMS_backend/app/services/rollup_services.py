@@ -0,0 +1,155 @@
+import logging
+import threading
+from app.db.arango_db import db
+from app.services.job_services import session_jobs
+
+log = logging.getLogger(__name__)
+
+
+#----------------------------------------------------------#
+#-------------------daily rollup---------------------------#
+#----------------------------------------------------------#
+
+# daily_rollup holds one row per (device_id, date, type):
+#   {device_id, date, day, type, count, first_time, last_time}
+# It is kept up to date on ingest so the weekly/monthly reports read
+# at most (days x types) rows instead of every raw event in range.
+# scripts/backfill_daily_rollup.py rebuilds it from the event collection.
+#
+# When an update still fails after MAX_ROLLUP_ATTEMPTS the events are
+# stored but not counted. The (device_id, date) pairs are kept as pending,
+# counted under "rollup" in /stats, and a background job rebuilds those days
+# from the raw events (repair_days) with the job queue's retries.
+# Pairs still pending after that stay listed in /stats for the backfill script.
+
+ROLLUP_UPSERT = """
+FOR r IN @rows
+    UPSERT { device_id: r.device_id, date: r.date, type: r.type }
+    INSERT r
+    UPDATE {
+        count: OLD.count + r.count,
+        first_time: MIN([OLD.first_time, r.first_time]),
+        last_time: MAX([OLD.last_time, r.last_time])
+    }
+    IN daily_rollup
+"""
+
+# repair of one device/day from the raw events (idx_event_device_date_type):
+# count the day's events, replace its rows, drop rows of types no longer
+# present. Running it again is harmless. An event whose own rollup upsert
+# lands after the recount is counted twice; the backfill script corrects that.
+DAY_COUNTS_QUERY = """
+FOR e IN event
+    FILTER e.device_id == @device_id AND e.date == @date
+    FILTER e.type != null
+    COLLECT type = e.type
+    AGGREGATE count = LENGTH(1), first_time = MIN(e.time), last_time = MAX(e.time), day = MAX(e.day)
+    RETURN { device_id: @device_id, date: @date, day, type, count, first_time, last_time }
+"""
+
+ROLLUP_REPLACE = """
+FOR r IN @rows
+    UPSERT { device_id: r.device_id, date: r.date, type: r.type }
+    INSERT r
+    REPLACE r
+    IN daily_rollup
+"""
+
+ROLLUP_PRUNE_DAY = """
+FOR r IN daily_rollup
+    FILTER r.device_id == @device_id AND r.date == @date
+    FILTER r.type NOT IN @types
+    REMOVE r IN daily_rollup
+"""
+
+# concurrent ingest of the same (device, date, type) row can hit a write
+# conflict / unique violation on the first try; the retry sees the new row
+MAX_ROLLUP_ATTEMPTS = 3
+
+def rollup_rows(events: list):
+    # pre-aggregate a list of stored (preprocessed) events -> one row per key
+    rows = {}
+    for e in events:
+        device_id, date, event_type = e.get("device_id"), e.get("date"), e.get("type")
+        if not device_id or not date or not event_type:
+            continue
+        key = (device_id, date, event_type)
+        time = e.get("time")
+        row = rows.get(key)
+        if row is None:
+            rows[key] = {
+                "device_id": device_id,
+                "date": date,
+                "day": e.get("day"),
+                "type": event_type,
+                "count": 1,
+                "first_time": time,
+                "last_time": time
+            }
+        else:
+            row["count"] += 1
+            if time and (row["first_time"] is None or time < row["first_time"]):
+                row["first_time"] = time
+            if time and (row["last_time"] is None or time > row["last_time"]):
+                row["last_time"] = time
+    return list(rows.values())
+
+_pending = set()                # (device_id, date) whose rollup missed events
+_pending_lock = threading.Lock()
+_rollup_stats = {"updates": 0, "failed": 0, "repaired": 0}
+
+def update_daily_rollup(events: list):
+    rows = rollup_rows(events)
+    if not rows:
+        return
+    for attempt in range(1, MAX_ROLLUP_ATTEMPTS + 1):
+        try:
+            db.aql.execute(ROLLUP_UPSERT, bind_vars={"rows": rows})
+            with _pending_lock:
+                _rollup_stats["updates"] += 1
+            return
+        except Exception as e:
+            if attempt == MAX_ROLLUP_ATTEMPTS:
+                log.error("failed to update daily rollup: %s", e, extra={"rows": len(rows)})
+                schedule_repair({(r["device_id"], r["date"]) for r in rows})
+
+def schedule_repair(days):
+    # days: {(device_id, date)} -> one rebuild job per device
+    by_device = {}
+    with _pending_lock:
+        _rollup_stats["failed"] += 1
+        for device_id, date in days:
+            _pending.add((device_id, date))
+            by_device.setdefault(device_id, []).append(date)
+    for device_id, dates in by_device.items():
+        try:
+            session_jobs.submit("rollup_repair", [("rollup_repair", lambda d=device_id, ds=sorted(dates): repair_days(d, ds))],
+                                key=device_id, device_id=device_id)
+        except RuntimeError as e:       # shutting down: stays pending
+            log.error("rollup repair not scheduled: %s", e, extra={"device_id": device_id, "dates": dates})
+
+def repair_days(device_id, dates):
+    for date in dates:
+        try:
+            rows = list(db.aql.execute(DAY_COUNTS_QUERY, bind_vars={"device_id": device_id, "date": date}))
+            if rows:
+                db.aql.execute(ROLLUP_REPLACE, bind_vars={"rows": rows})
+            db.aql.execute(ROLLUP_PRUNE_DAY, bind_vars={"device_id": device_id, "date": date,
+                                                        "types": [r["type"] for r in rows]})
+        except Exception as e:
+            log.error("rollup repair failed: %s", e, extra={"device_id": device_id, "date": date})
+            return {"error": str(e)}
+        with _pending_lock:
+            if (device_id, date) in _pending:
+                _pending.discard((device_id, date))
+                _rollup_stats["repaired"] += 1
+        log.info("daily rollup rebuilt", extra={"device_id": device_id, "date": date})
+    return {"status": "processed"}
+
+def get_rollup_stats():
+    with _pending_lock:
+        return {
+            **_rollup_stats,
+            "pending": len(_pending),
+            "pending_days": [{"device_id": d, "date": date} for d, date in sorted(_pending)[:50]]
+        }
@@ -1,57 +1,121 @@
+import logging
+import re
+from datetime import datetime
 from app.db.arango_db import db
 from app.services.auth_services import get_deviceid
-from app.services.storing_services import save_session
+from app.services.storing_services import save_session, save_summary
+from app.services.summary_services import EpisodeTracker
 
-def create_session(device_id, off_time):
-    # Find the latest ON event before the OFF event time
-    query_on = """
+log = logging.getLogger(__name__)
+
+# types that mark system/recovery transitions rather than alerts
+NON_ALERT_TYPES = {"ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"}
+
+# event type -> summary event_counts key
+COUNTED_TYPES = {
+    "Yawn": "yawn_detected",
+    "Eyes closed for too long": "eyes_closed_too_long",
+    "Distraction": "distraction_detected",
+    "Drowsiness": "drowsiness_detected",
+}
+
+# latest ON before the OFF, then every event of the drive in order (one round trip)
+SESSION_WINDOW_QUERY = """
+LET on_time = FIRST(
     FOR e IN event
         FILTER e.device_id == @device_id
         FILTER e.type == "ON"
-        FILTER e.time <= @off_time
-        SORT e.time DESC
+        FILTER e.timestamp <= @off_time
+        SORT e.timestamp DESC
         LIMIT 1
-        RETURN { "start_time": e.time, "date": e.date }
+        RETURN e.timestamp
+)
+FOR e IN event
+    FILTER on_time != null
+    FILTER e.device_id == @device_id
+    FILTER e.timestamp >= on_time AND e.timestamp <= @off_time
+    SORT e.timestamp ASC
+    RETURN { "timestamp": e.timestamp, "date": e.date, "time": e.time, "type": e.type }
+"""
+
+def session_key(device_id, off_time):
+    # one drive = one device + one OFF event; characters ArangoDB does not
+    # allow in a _key are replaced
+    return re.sub(r"[^A-Za-z0-9_\-:.@()+,=;$!*'%]", "_", f"{device_id}_{off_time}")
+
+def materialise_session(device_id, off_time):
     """
-    bind_vars_on = {
-        'device_id': device_id,
-        'off_time': off_time
-    }
-    on_events = list(db.aql.execute(query_on, bind_vars=bind_vars_on))
-    
-    if not on_events:
-        print("[Warning] No ON event found for device_id:", device_id, "before OFF time:", off_time)
-        return
-    
-    on_event = on_events[0]
-    start_time = on_event["start_time"]
-    date = on_event["date"]
-    
-    events_query = """
-    FOR e IN event
-        FILTER e.device_id == @device_id
-        FILTER e.time >= @start_time AND e.time <= @off_time
-        FILTER e.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", 
-        "Recovered from distraction"]
-        SORT e.time ASC
-        RETURN { "time": e.time, "event": e.type }
+    Build and store the session and summary documents for the drive that
+    ends at off_time (ISO timestamp of the OFF event) from one streamed
+    fetch of the drive's events. Only the session's event list is kept
+    in memory; everything else is accumulated while streaming.
+    Both documents use session_key() and overwrite, so running this again
+    for the same OFF (job retry) replaces them instead of adding copies.
     """
-    bind_vars_events = {
+    cursor = db.aql.execute(SESSION_WINDOW_QUERY, bind_vars={
         'device_id': device_id,
-        'start_time': start_time,
         'off_time': off_time
-    }
-    event_list = list(db.aql.execute(events_query, bind_vars=bind_vars_events))
-    
+    }, stream=True, batch_size=1000)
+
+    start_time = date = start_hm = None
+    session_events = []
+    event_counts = {key: 0 for key in COUNTED_TYPES.values()}
+    total_events = 0
+    episodes = EpisodeTracker()
+
+    for e in cursor:
+        if start_time is None:
+            # first row is the ON event itself (nothing earlier is in the window)
+            start_time, date, start_hm = e["timestamp"], e.get("date"), e.get("time")
+
+        event_type = e.get("type")
+        episodes.add(event_type, e["timestamp"])
+        if event_type in COUNTED_TYPES:
+            event_counts[COUNTED_TYPES[event_type]] += 1
+        if event_type not in NON_ALERT_TYPES:
+            total_events += 1
+            session_events.append({"time": e.get("time"), "event": event_type})
+
+    if start_time is None:
+        log.warning("no ON event before OFF", extra={"device_id": device_id, "off_time": off_time})
+        return
+
+    dt_start = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
+    dt_end = datetime.fromisoformat(off_time.replace("Z", "+00:00"))
+
+    key = session_key(device_id, off_time)
     session_doc = {
+        "_key": key,
         "device_id": device_id,
         "date": date,
-        "start": start_time,
-        "end": off_time,
-        "events": event_list
+        "start": start_hm,
+        "end": dt_end.time().isoformat(timespec='minutes'),
+        "events": session_events
     }
-    
-    save_session(session_doc)
+
+    #episodes still open at OFF are closed at the OFF timestamp
+    durations = episodes.totals(session_end=off_time)
+
+    summary_doc = {
+        "_key": key,
+        "device_id": device_id,
+        "start_time": start_time,
+        "end_time": off_time,
+        "duration_min": round((dt_end - dt_start).total_seconds() / 60, 2),
+        "total_events": total_events,
+
+        "event_counts": event_counts,
+
+        #total duration in seconds
+        "episode_durations": {
+            "total_eyes_closed_seconds": durations["Eyes closed for too long"],
+            "total_drowsy_seconds": durations["Drowsiness"],
+            "total_distracted_seconds": durations["Distraction"]
+        },
+    }
+
+    # an error dict makes the job stage retry (safe: the writes are idempotent)
+    return save_session(session_doc) or save_summary(summary_doc) or {"status": "processed"}
 
 def get_sessions(user_id):
     device_id = get_deviceid(user_id)
@@ -1,7 +1,12 @@
+import logging
 from app.db.arango_db import db
-from app.services.time_services import preprocess_timestamp
+from app.services.time_services import preprocess_timestamp, preprocess_timestamps
+from app.services.rollup_services import update_daily_rollup
+from app.services.auth_services import invalidate_device_cache
 from arango.exceptions import DocumentInsertError
 
+log = logging.getLogger(__name__)
+
 
 #----------------------------------------------------------#
 #-------------------hardware ingest------------------------#
@@ -11,9 +16,9 @@ def save_state(data: dict):
     try:
         col = db.collection("state")  
         col.insert(data)  
-        print("[DB] State saved:", data)
+        log.debug("state saved", extra={"doc": data})
     except Exception as e:
-        print("[Error] Failed to save state:", e)
+        log.error("failed to save state: %s", e, extra={"device_id": data.get("device_id")})
 
 
 def save_event(data: dict): 
@@ -21,9 +26,40 @@ def save_event(data: dict):
     try:
         col = db.collection("event")  
         col.insert(data)  
-        print("[DB] Event saved:", data)
+        log.debug("event saved", extra={"doc": data})
+    except Exception as e:
+        log.error("failed to save event: %s", e, extra={"device_id": data.get("device_id")})
+        return
+    update_daily_rollup([data])
+
+
+#/kucing-batch
+def save_bulk(collection: str, docs: list):
+    # one insert_many round trip; returns one result per doc, in order:
+    # {"_key": ...} on success or {"error": ..., "retry": bool} on failure
+    # retry=True: the database failed (down, timeout, 5xx), sending the doc again may work
+    # retry=False: the doc itself was refused (validation, unique constraint)
+    if not docs:
+        return []
+    docs = preprocess_timestamps(docs)
+    try:
+        col = db.collection(collection)
+        results = col.insert_many(docs)
     except Exception as e:
-        print("[Error] Failed to save event:", e)
+        log.error("bulk insert failed: %s", e, extra={"collection": collection, "count": len(docs)})
+        return [{"error": str(e), "retry": True} for _ in docs]
+
+    out = []
+    for res in results:
+        if isinstance(res, Exception):
+            http_code = getattr(res, "http_code", None)
+            out.append({"error": str(res), "retry": http_code is None or http_code >= 500})
+        else:
+            out.append({"_key": res.get("_key")})
+    log.info("bulk saved", extra={"collection": collection, "saved": sum('_key' in r for r in out), "count": len(docs)})
+    if collection == "event":
+        update_daily_rollup([doc for doc, r in zip(docs, out) if "_key" in r])
+    return out
 
 #----------------------------------------------------------#
 #-------------------frontend ingest------------------------#
@@ -34,15 +70,15 @@ def save_user(data: dict):
     try:
         col = db.collection("users")
         col.insert(data)
-        print("[DB] User saved:", data)
+        log.info("user saved", extra={"username": data.get("username")})
         return True, "User saved successfully"
     except DocumentInsertError as e:
-        print("[DB ERROR] Insert failed:", e)
+        log.warning("user insert failed: %s", e)
         if 'unique constraint violated' in str(e).lower():
             return False, "Username already exists"
         return False, "Insert failed"
     except Exception as e:
-        print("[ERROR]", e)
+        log.error("user insert failed: %s", e)
         return False, str(e)
 
 
@@ -63,6 +99,7 @@ def save_device(data: dict):
         bind_vars = {"user_id": user_id, "data": data}
 
         db.aql.execute(query, bind_vars=bind_vars)
+        invalidate_device_cache(user_id)
         return {"status": "success", "user_id": user_id}
     except Exception as e:
         return {"error": str(e)}
@@ -71,24 +108,45 @@ def save_device(data: dict):
 #----------------------------------------------------------#
 #-------------------session ingest-------------------------#
 #----------------------------------------------------------#
+# session / summary docs carry a deterministic _key (see sessions_services.session_key)
+# and are written with overwrite, so a retried materialise replaces instead of duplicating
 def save_session(data: dict): 
     try:
         col = db.collection('sessions')
-        col.insert(data)
-        print("[DB] Session saved:", data)
+        col.insert(data, overwrite=True)
+        log.info("session saved", extra={"device_id": data.get("device_id"), "date": data.get("date")})
     except Exception as e:
-        print("[Error] Failed to save session:", e)
+        log.error("failed to save session: %s", e, extra={"device_id": data.get("device_id")})
+        return {"error": str(e)}
 
 #----------------------------------------------------------#
 #-------------------summary ingest-------------------------#
 #----------------------------------------------------------#
+def save_summary(data: dict): 
+    try:
+        col = db.collection("summary")  
+        col.insert(data, overwrite=True)  
+        log.info("summary saved", extra={"device_id": data.get("device_id")})
+    except Exception as e:
+        log.error("could not save summary: %s", e, extra={"device_id": data.get("device_id")})
+        return {"error": str(e)}
+
 def save_trend(data: dict): 
     try:
         col = db.collection("trend")  
         col.insert(data)  
-        print("[DB] Trend generated:", data)
+        log.info("trend generated", extra={"device_id": data.get("device_id")})
+    except Exception as e:
+        log.error("failed to store trend summary: %s", e, extra={"device_id": data.get("device_id")})
+
+def save_trend_state(data: dict):
+    # one running-statistics document per device (_key = device_id), replaced in place
+    try:
+        col = db.collection("trend_state")
+        col.insert(data, overwrite=True)
+        log.debug("trend state updated", extra={"device_id": data.get("device_id")})
     except Exception as e:
-        print("[Error] Failed to store trend summary:", e)
+        log.error("failed to store trend state: %s", e, extra={"device_id": data.get("device_id")})
 
 #----------------------------------------------------------#
 #-------------------feedback ingest-------------------------#
@@ -97,6 +155,7 @@ def save_feedback(data: dict):
     try:
         col = db.collection("feedback")  
         col.insert(data)  
-        print("[DB] Feedback stored:", data)
+        log.info("feedback stored", extra={"device_id": data.get("device_id")})
     except Exception as e:
-        print("[Error] Failed to store feedback:", e)
\ No newline at end of file
+        log.error("failed to store feedback: %s", e, extra={"device_id": data.get("device_id")})
+        return {"error": str(e)}
\ No newline at end of file
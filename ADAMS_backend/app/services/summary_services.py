@@ -1,172 +1,111 @@
-from app.ai.trend_analysis import analyze_driver_trends
+import logging
+import os
+from app.ai.trend_analysis import IncrementalTrend, summary_vector, analyze_driver_trends
 from app.db.arango_db import db
-from app.services.storing_services import save_trend
-from datetime import datetime
-
-def create_summary(device_id, off_time):
-    # Find the latest ON event before the OFF event time (off_time is ISO timestamp string)
-    query_on = """
-    FOR e IN event
-        FILTER e.device_id == @device_id
-        FILTER e.type == "ON"
-        FILTER e.timestamp <= @off_time
-        SORT e.timestamp DESC
-        LIMIT 1
-        RETURN { "start_time": e.timestamp, "date": e.date }
+from app.services.storing_services import save_trend, save_trend_state
+from datetime import datetime, timezone
+
+log = logging.getLogger(__name__)
+
+# weight of the previous session in the running trend (1.0 = all history counts equally)
+TREND_DECAY = float(os.getenv("ADAMS_TREND_DECAY", "1.0"))
+
+# start type -> recovery type; the start type is also the summary category
+EPISODE_PAIRS = {
+    "Eyes closed for too long": "Eyes reopened",
+    "Drowsiness": "Recovered from drowsiness",
+    "Distraction": "Recovered from distraction",
+}
+RECOVERY_TO_START = {end: start for start, end in EPISODE_PAIRS.items()}
+
+def _to_ms(timestamp):
+    # ISO string -> epoch milliseconds (AQL date functions work at ms precision)
+    dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp()) * 1000 + dt.microsecond // 1000
+
+class EpisodeTracker:
     """
-    bind_vars_on = {
-        'device_id': device_id,
-        'off_time': off_time
-    }
-    on_events = list(db.aql.execute(query_on, bind_vars=bind_vars_on))
-    if not on_events:
-        print("[Warning] No ON event found before OFF timestamp for device:", device_id)
-        return
-
-    on_event = on_events[0]
-    start_time = on_event["start_time"]
-
-    event_query = """
-    FOR e IN event
-        FILTER e.device_id == @device_id
-        FILTER e.timestamp >= @start_time AND e.timestamp <= @off_time
-        FILTER e.type NOT IN ["ON", "OFF"]
-        RETURN {
-            "timestamp": e.timestamp,
-            "ear": e.ear,
-            "mar": e.mar,
-            "perclos": e.perclos,
-            "pitch": e.pitch,
-            "yaw": e.yaw,
-            "roll": e.roll,
-            "type": e.type
-        }
+    Pairs episode start/recovery events fed in timestamp order.
+    Every start waiting when its recovery arrives is closed by that recovery
+    (same pairing as the old per-episode subquery); starts still open at the
+    end are closed at session_end, or ignored if session_end is None.
     """
-    event_data = list(db.aql.execute(event_query, bind_vars={
-        'device_id': device_id,
-        'start_time': start_time,
-        'off_time': off_time
-    }))
-
-    event_count_query = """
-    FOR e IN event
-        FILTER e.device_id == @device_id
-        FILTER e.timestamp >= @start_time AND e.timestamp <= @off_time
-        FILTER e.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
-        RETURN {
-            "timestamp": e.timestamp
-        }
-    """
-    event_count = list(db.aql.execute(event_count_query, bind_vars={
-        'device_id': device_id,
-        'start_time': start_time,
-        'off_time': off_time
-    }))
-
-    #event count
-    yawn_count = sum(1 for e in event_data if e.get("type") == "Yawn")
-    eyes_closed_count = sum(1 for e in event_data if e.get("type") == "Eyes closed for too long")
-    distraction_count = sum(1 for e in event_data if e.get("type") == "Distraction")
-    drowsiness_count = sum(1 for e in event_data if e.get("type") == "Drowsiness")
-
-    #total duration in seconds
-    duration_query = """
-    LET typePairs = [
-        { start: "Eyes closed for too long", end: "Eyes reopened", category: "Eyes closed for too long" },
-        { start: "Drowsiness", end: "Recovered from drowsiness", category: "Drowsiness" },
-        { start: "Distraction", end: "Recovered from distraction", category: "Distraction" }
-        ]
-
-    FOR p IN typePairs
-        FOR e IN event
-            FILTER e.type == p.start
-            FILTER e.device_id == @device_id
-            FILTER e.timestamp >= @start_time AND e.timestamp <= @off_time
-            LET recovery = FIRST(
-                FOR r IN event
-                    FILTER r.type == p.end
-                    FILTER r.device_id == @device_id
-                    FILTER r.timestamp > e.timestamp
-                    SORT r.timestamp ASC
-                    LIMIT 1
-                    RETURN r
-            )
-            FILTER recovery != null
-            LET durationMs = DATE_DIFF(
-                e.timestamp,
-                recovery.timestamp,
-                "millisecond"
-            )
-            COLLECT category = p.category INTO group
-            LET totalDurationMs = SUM(group[*].durationMs)
-            RETURN {
-                category,
-                totalDurationSeconds: totalDurationMs / 1000
-            }
-    """
-
-    duration_data = list(db.aql.execute(duration_query, bind_vars={
-        'device_id': device_id,
-        'start_time': start_time,
-        'off_time': off_time
-    }))
-
-
-    duration_seconds_map = {item["category"]: item["totalDurationSeconds"] for item in duration_data}
-
-    eyes_close_duration = duration_seconds_map.get("Eyes closed for too long", 0)
-    drowsy_duration = duration_seconds_map.get("Drowsiness", 0)
-    distracted_duration = duration_seconds_map.get("Distraction", 0)
-
-    # Calculate duration in minutes
-    dt_start = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
-    dt_end = datetime.fromisoformat(off_time.replace("Z", "+00:00"))
-    duration_min = round((dt_end - dt_start).total_seconds() / 60, 2)
-
-    summary_doc = {
-        "device_id": device_id,
-        "start_time": start_time,
-        "end_time": off_time,
-        "duration_min": duration_min,
-        "total_events": len(event_count),
-
-        "event_counts": {
-            "yawn_detected": yawn_count,
-            "eyes_closed_too_long": eyes_closed_count,
-            "distraction_detected": distraction_count,
-            "drowsiness_detected": drowsiness_count
-        },
-
-        #total duration in seconds
-        "episode_durations": {
-            "total_eyes_closed_seconds": eyes_close_duration,  
-            "total_drowsy_seconds": drowsy_duration,
-            "total_distracted_seconds": distracted_duration
-        },
-    }
-
-    try:
-        db.collection("summary").insert(summary_doc)
-        print("[DB] Summary saved for device:", device_id)
-    except Exception as e:
-        print("[Error] Could not save summary:", e)
-
-def fetch_summary_trend(device_id):
-
+    def __init__(self):
+        self.open_starts = {category: [] for category in EPISODE_PAIRS}
+        self.total_ms = {category: 0 for category in EPISODE_PAIRS}
+
+    def add(self, event_type, timestamp):
+        if event_type in EPISODE_PAIRS:
+            self.open_starts[event_type].append(_to_ms(timestamp))
+        elif event_type in RECOVERY_TO_START:
+            category = RECOVERY_TO_START[event_type]
+            if self.open_starts[category]:
+                end_ms = _to_ms(timestamp)
+                self.total_ms[category] += sum(end_ms - start for start in self.open_starts[category])
+                self.open_starts[category] = []
+
+    def totals(self, session_end=None):
+        # -> {category: total seconds}
+        total_ms = dict(self.total_ms)
+        if session_end is not None:
+            end_ms = _to_ms(session_end)
+            for category, starts in self.open_starts.items():
+                total_ms[category] += sum(max(0, end_ms - start) for start in starts)
+        return {category: ms / 1000 for category, ms in total_ms.items()}
+
+def compute_episode_durations(events, session_end=None):
+    # single ordered pass over a session's events (sorted by timestamp)
+    tracker = EpisodeTracker()
+    for e in events:
+        tracker.add(e.get("type"), e.get("timestamp"))
+    return tracker.totals(session_end)
+
+def fetch_summary_trend(device_id, after=""):
+    # summaries ending after `after`, oldest first ("" -> whole history)
     query = """
     FOR s IN summary
-    FILTER s.device_id == @device_id
+    FILTER s.device_id == @device_id AND s.end_time > @after
+    SORT s.end_time ASC
     return s
     """
 
-    summary = list(db.aql.execute(query, bind_vars={'device_id': device_id}))
+    summary = list(db.aql.execute(query, bind_vars={'device_id': device_id, 'after': after}))
 
     return summary
 
-def store_trends_summary(device_id):
-    user_summary_list = fetch_summary_trend(device_id)
-    trends = analyze_driver_trends(user_summary_list)
+def fetch_trend_state(device_id):
+    try:
+        return db.collection("trend_state").get(device_id)
+    except Exception as e:
+        log.error("could not load trend state: %s", e, extra={"device_id": device_id})
+        return None
 
+#/trend update
+#only summaries newer than the stored state are folded in (O(1) per new session);
+#the first run for a device bootstraps the state from its full history and
+#reports the exact full refit (analyze_driver_trends) for that run
+def store_trends_summary(device_id):
+    state = fetch_trend_state(device_id)
+    if state and state.get("decay", 1.0) == TREND_DECAY:
+        trend = IncrementalTrend.from_dict(state)
+        last_end = state.get("last_end_time", "")
+    else:
+        trend = IncrementalTrend(decay=TREND_DECAY)
+        last_end = ""
+
+    rebuild = not last_end
+    new_summaries = fetch_summary_trend(device_id, last_end)
+    for s in new_summaries:
+        trend.update(summary_vector(s))
+        last_end = s["end_time"]
+
+    if new_summaries:
+        save_trend_state({"_key": device_id, "device_id": device_id,
+                          "last_end_time": last_end, **trend.to_dict()})
+
+    trends = analyze_driver_trends(new_summaries, TREND_DECAY) if rebuild else trend.trends()
     trends["device_id"] = device_id
     trends["timestamp"] = datetime.now().isoformat()
     
@@ -1,6 +1,9 @@
+import logging
 import datetime
 from datetime import datetime, timedelta
 
+log = logging.getLogger(__name__)
+
 def preprocess_timestamp(data: dict):
     if "timestamp" in data:
         try:
@@ -9,12 +12,26 @@ def preprocess_timestamp(data: dict):
             data["time"] = dt.time().isoformat(timespec='minutes') #minutes
             data["day"] = dt.strftime("%A")
         except ValueError:
-            print("[Warning] Invalid timestamp format:", data["timestamp"])
+            log.warning("invalid timestamp format", extra={"timestamp": data["timestamp"]})
     return data
 
+def preprocess_timestamps(docs: list):
+    # batch version of preprocess_timestamp: one pass, in place
+    for data in docs:
+        preprocess_timestamp(data)
+    return docs
+
 def return_today():
     return datetime.today()
 
+def return_day_bounds(day=None):
+    # ISO prefix range covering one calendar day: start <= timestamp < end
+    # (timestamps are ISO strings, so this is an index-friendly string range)
+    day = day or return_today()
+    start = day.strftime('%Y-%m-%d')
+    end = (day + timedelta(days=1)).strftime('%Y-%m-%d')
+    return start, end
+
 def return_from_monday():
     today = return_today()
     weekday = today.weekday()
@@ -0,0 +1,65 @@
+import os
+import signal
+
+#----------------------------------------------------------#
+#-------------------production server----------------------#
+#----------------------------------------------------------#
+
+# gunicorn picks this file up automatically when started from ADAMS_backend/:
+#   gunicorn wsgi:app
+#
+# ADAMS_BIND     address to listen on            (default 0.0.0.0:5000)
+# ADAMS_WORKERS  worker processes                (default 1)
+# ADAMS_THREADS  request threads per worker      (default 8)
+#
+# Each /live-stream client holds one thread while connected, so size
+# ADAMS_THREADS for expected app clients plus ingest traffic. Live pub/sub,
+# the device cache and the job queue are per worker process, and a device's
+# uploads and its app's stream must meet in the same one: on_starting
+# refuses more than one worker while streaming is on. ADAMS_LIVE_STREAM=0
+# disables /live-stream so ADAMS_WORKERS can be raised.
+
+bind = os.getenv("ADAMS_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("ADAMS_WORKERS", "1"))
+threads = int(os.getenv("ADAMS_THREADS", "8"))
+worker_class = "gthread"
+
+# SIGTERM: stop accepting, let in-flight requests finish for up to
+# graceful_timeout, then drain the background job queue (worker_exit)
+graceful_timeout = int(os.getenv("ADAMS_GRACEFUL_TIMEOUT", "30"))
+timeout = 60
+keepalive = 5
+
+# access log off: ingest is one request per event, request details are in
+# the app's own JSON log when ADAMS_LOG_LEVEL=DEBUG
+accesslog = None
+errorlog = "-"
+
+
+def on_starting(server):
+    # cfg.workers includes a -w / --workers override from the command line
+    from app.services.live_services import check_single_worker
+    check_single_worker(server.cfg.workers)
+
+
+def post_worker_init(worker):
+    # open SSE streams never finish on their own; end them when the worker
+    # is told to stop so they do not hold up the graceful shutdown
+    handle_exit = signal.getsignal(signal.SIGTERM)
+
+    def on_term(sig, frame):
+        from app.services.live_services import close_streams
+        close_streams()
+        if callable(handle_exit):
+            handle_exit(sig, frame)
+
+    signal.signal(signal.SIGTERM, on_term)
+
+
+def worker_exit(server, worker):
+    from app.services.job_services import session_jobs
+    from app.services.feedback_services import shutdown_feedback
+    from app.logging_config import stop_logging
+    session_jobs.shutdown(timeout=graceful_timeout)
+    shutdown_feedback(wait=True)
+    stop_logging()
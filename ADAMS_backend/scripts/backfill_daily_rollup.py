@@ -0,0 +1,59 @@
+import sys
+
+from app.db.arango_db import db
+
+#----------------------------------------------------------#
+#-------------------daily rollup backfill------------------#
+#----------------------------------------------------------#
+
+# Rebuilds daily_rollup from the raw event collection, for databases that
+# have events from before the rollup existed (or after a failed rollup
+# update). Rows for the selected device(s) are deleted and recomputed in
+# one COLLECT each, so run it while the device is not uploading.
+#
+# usage (from ADAMS_backend/):  python -m scripts.backfill_daily_rollup [device_id ...]
+
+DEVICES_QUERY = """
+FOR e IN event
+    COLLECT device_id = e.device_id
+    FILTER device_id != null
+    RETURN device_id
+"""
+
+CLEAR_QUERY = """
+FOR r IN daily_rollup
+    FILTER r.device_id == @device_id
+    REMOVE r IN daily_rollup
+"""
+
+REBUILD_QUERY = """
+LET inserted = (
+    FOR e IN event
+        FILTER e.device_id == @device_id
+        FILTER e.date != null AND e.type != null
+        COLLECT date = e.date, type = e.type
+        AGGREGATE count = LENGTH(1), first_time = MIN(e.time), last_time = MAX(e.time), day = MAX(e.day)
+        INSERT {
+            device_id: @device_id, date, day, type,
+            count, first_time, last_time
+        } INTO daily_rollup
+        RETURN 1
+)
+RETURN LENGTH(inserted)
+"""
+
+def backfill(device_id):
+    db.aql.execute(CLEAR_QUERY, bind_vars={"device_id": device_id})
+    rows = next(db.aql.execute(REBUILD_QUERY, bind_vars={"device_id": device_id}), 0)
+    print(f"[DB] daily_rollup rebuilt for {device_id}: {rows} row(s)")
+    return rows
+
+def main(argv):
+    devices = argv or list(db.aql.execute(DEVICES_QUERY))
+    total = 0
+    for device_id in devices:
+        total += backfill(device_id)
+    print(f"[DB] daily_rollup backfill done: {len(devices)} device(s), {total} row(s)")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,120 @@
+import sys
+import time
+import random
+import statistics
+from datetime import datetime, timedelta
+from arango import ArangoClient
+
+from app.db.schema import ensure_collections, ensure_indexes
+from app.services import auth_services, client_services
+
+#----------------------------------------------------------#
+#-------------------today-query benchmark------------------#
+#----------------------------------------------------------#
+
+# Seeds a separate database with synthetic history (oldest data added in
+# steps) and times the homepage endpoints after each step. The range
+# queries should stay flat as history grows; the old SUBSTRING version
+# is timed alongside for comparison.
+#
+# usage (from ADAMS_backend/):  python -m scripts.bench_today_queries [devices] [events_per_day]
+
+BENCH_DB = "ADAMSbench"
+USERNAME = "root"
+PASSWORD = "123"
+HISTORY_STEPS_DAYS = [30, 90, 180, 365]
+REQUESTS_PER_POINT = 50
+
+EVENT_TYPES = ["Yawn", "Eyes closed for too long", "Eyes reopened", "Drowsiness",
+               "Recovered from drowsiness", "Distraction", "Recovered from distraction"]
+STATES = ["normal", "drowsy", "distracted"]
+
+OLD_TODAY_LOG = """
+FOR e IN event
+    FILTER e.device_id == @device_id
+    LET eventDate = SUBSTRING(e.timestamp, 0, 10)
+    FILTER eventDate == @today
+    FILTER e.type NOT IN ["ON", "OFF", "Eyes reopened", "Recovered from drowsiness", "Recovered from distraction"]
+    SORT e.timestamp ASC
+    RETURN { "time": SUBSTRING(e.timestamp, 11, 5), "type": e.type }
+"""
+
+def connect():
+    client = ArangoClient()
+    sys_db = client.db("_system", username=USERNAME, password=PASSWORD)
+    if sys_db.has_database(BENCH_DB):
+        sys_db.delete_database(BENCH_DB)
+    sys_db.create_database(BENCH_DB)
+    db = client.db(BENCH_DB, username=USERNAME, password=PASSWORD)
+    ensure_collections(db)
+    ensure_indexes(db)
+    return db
+
+def make_docs(device_id, day, events_per_day):
+    events, states = [], []
+    for _ in range(events_per_day):
+        ts = datetime.combine(day, datetime.min.time()) + timedelta(seconds=random.randint(0, 86399))
+        iso = ts.isoformat()
+        base = {"device_id": device_id, "timestamp": iso, "date": ts.date().isoformat(),
+                "time": ts.time().isoformat(timespec='minutes'), "day": ts.strftime("%A")}
+        events.append({**base, "type": random.choice(EVENT_TYPES), "ear": 0.2, "mar": 0.3})
+        states.append({**base, "driver_state": random.choice(STATES)})
+    return events, states
+
+def seed_days(db, devices, days, events_per_day):
+    events, states = [], []
+    for day in days:
+        for device_id in devices:
+            e, s = make_docs(device_id, day, events_per_day)
+            events += e
+            states += s
+    db.collection("event").import_bulk(events, batch_size=10000)
+    db.collection("state").import_bulk(states, batch_size=10000)
+    return len(events)
+
+def timed(fn, n=REQUESTS_PER_POINT):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+def main():
+    n_devices = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    events_per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    db = connect()
+    # point the services at the bench database
+    auth_services.db = db
+    client_services.db = db
+
+    devices = [f"BENCH-{i:03d}" for i in range(n_devices)]
+    db.collection("users_devices").import_bulk(
+        [{"user_id": f"user-{i}", "device_id": d} for i, d in enumerate(devices)])
+    user_id, device_id = "user-0", devices[0]
+
+    today = datetime.today().date()
+    total = seed_days(db, devices, [today], events_per_day)
+    seeded = 0
+
+    print(f"{'history':>8} {'events':>10} | {'today_log':>14} {'event_count':>14} {'driver_state':>14} | {'old today_log':>14}")
+    print(f"{'(days)':>8} {'':>10} | {'p50/p95 ms':>14} {'p50/p95 ms':>14} {'p50/p95 ms':>14} | {'p50/p95 ms':>14}")
+    for days in HISTORY_STEPS_DAYS:
+        older = [today - timedelta(days=d) for d in range(seeded + 1, days + 1)]
+        total += seed_days(db, devices, older, events_per_day)
+        seeded = days
+
+        results = [
+            timed(lambda: client_services.get_today_log(user_id)),
+            timed(lambda: client_services.get_event_count(user_id)),
+            timed(lambda: client_services.get_driver_state(user_id)),
+            timed(lambda: list(db.aql.execute(OLD_TODAY_LOG, bind_vars={
+                "device_id": device_id, "today": today.isoformat()}))),
+        ]
+        cells = " ".join(f"{p50:>6.2f}/{p95:<7.2f}" for p50, p95 in results[:3])
+        print(f"{days:>8} {total:>10} | {cells} | {results[3][0]:>6.2f}/{results[3][1]:<7.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import sys
+
+from app.db.arango_db import db
+from app.services.summary_services import compute_episode_durations, EpisodeTracker, EPISODE_PAIRS, _to_ms
+
+#----------------------------------------------------------#
+#-------------------episode duration check-----------------#
+#----------------------------------------------------------#
+
+# Regression check for compute_episode_durations / EpisodeTracker.
+#
+# 1) Fixture events (no database): open/close pairs, an episode still open
+#    at OFF, duplicate recoveries, several starts before one recovery and
+#    mixed timestamp formats (Z, offsets, naive, fractional seconds).
+# 2) Recorded sessions: for every session in `summary`, compare the
+#    single-pass pairing against the old per-episode AQL (kept below
+#    verbatim). The old subquery was not bounded to the session, so a start
+#    still open at OFF was paired with the next recovery after OFF; those
+#    sessions are expected to differ and are reported as POST-OFF (with the
+#    old value reproduced from the post-OFF recovery), not as mismatches.
+#
+# usage (from ADAMS_backend/):
+#   python -m scripts.check_episode_durations --fixtures      (fixtures only, no db)
+#   python -m scripts.check_episode_durations [device_id]     (fixtures, then recorded sessions)
+
+OLD_DURATION_QUERY = """
+LET typePairs = [
+    { start: "Eyes closed for too long", end: "Eyes reopened", category: "Eyes closed for too long" },
+    { start: "Drowsiness", end: "Recovered from drowsiness", category: "Drowsiness" },
+    { start: "Distraction", end: "Recovered from distraction", category: "Distraction" }
+    ]
+
+FOR p IN typePairs
+    FOR e IN event
+        FILTER e.type == p.start
+        FILTER e.device_id == @device_id
+        FILTER e.timestamp >= @start_time AND e.timestamp <= @off_time
+        LET recovery = FIRST(
+            FOR r IN event
+                FILTER r.type == p.end
+                FILTER r.device_id == @device_id
+                FILTER r.timestamp > e.timestamp
+                SORT r.timestamp ASC
+                LIMIT 1
+                RETURN r
+        )
+        FILTER recovery != null
+        LET durationMs = DATE_DIFF(
+            e.timestamp,
+            recovery.timestamp,
+            "millisecond"
+        )
+        COLLECT category = p.category INTO group
+        LET totalDurationMs = SUM(group[*].durationMs)
+        RETURN {
+            category,
+            totalDurationSeconds: totalDurationMs / 1000
+        }
+"""
+
+SESSIONS_QUERY = """
+FOR s IN summary
+    FILTER @device_id == null OR s.device_id == @device_id
+    SORT s.device_id, s.start_time
+    RETURN { device_id: s.device_id, start_time: s.start_time, end_time: s.end_time }
+"""
+
+EVENTS_QUERY = """
+FOR e IN event
+    FILTER e.device_id == @device_id
+    FILTER e.timestamp >= @start_time AND e.timestamp <= @off_time
+    SORT e.timestamp ASC
+    RETURN { timestamp: e.timestamp, type: e.type }
+"""
+
+POST_OFF_RECOVERY_QUERY = """
+FOR r IN event
+    FILTER r.device_id == @device_id
+    FILTER r.type == @type
+    FILTER r.timestamp > @off_time
+    SORT r.timestamp ASC
+    LIMIT 1
+    RETURN r.timestamp
+"""
+
+#-------------------fixtures (no db)-----------------------#
+EYES, REOPENED = "Eyes closed for too long", "Eyes reopened"
+DROWSY, DROWSY_END = "Drowsiness", "Recovered from drowsiness"
+DISTRACTED, DISTRACTED_END = "Distraction", "Recovered from distraction"
+
+def _events(*pairs):
+    return [{"timestamp": ts, "type": event_type} for ts, event_type in pairs]
+
+def _totals(eyes=0, drowsy=0, distracted=0):
+    return {EYES: eyes, DROWSY: drowsy, DISTRACTED: distracted}
+
+# (name, events, session_end, expected seconds per category)
+FIXTURES = [
+    ("open/close pairs",
+     _events(("2025-01-01T08:00:00Z", "ON"),
+             ("2025-01-01T08:00:05Z", EYES), ("2025-01-01T08:00:08Z", REOPENED),
+             ("2025-01-01T08:01:00Z", DROWSY), ("2025-01-01T08:01:05Z", DROWSY_END),
+             ("2025-01-01T08:02:00Z", DISTRACTED), ("2025-01-01T08:02:02.500Z", DISTRACTED_END)),
+     "2025-01-01T08:10:00Z", _totals(eyes=3, drowsy=5, distracted=2.5)),
+    ("open at OFF, closed at OFF",
+     _events(("2025-01-01T08:00:00Z", "ON"), ("2025-01-01T08:09:30Z", DISTRACTED),
+             ("2025-01-01T08:10:00Z", "OFF")),
+     "2025-01-01T08:10:00Z", _totals(distracted=30)),
+    ("open at OFF, left open",
+     _events(("2025-01-01T08:00:00Z", "ON"), ("2025-01-01T08:09:30Z", DISTRACTED),
+             ("2025-01-01T08:10:00Z", "OFF")),
+     None, _totals()),
+    ("duplicate recovery",
+     _events(("2025-01-01T08:00:00Z", EYES), ("2025-01-01T08:00:02Z", REOPENED),
+             ("2025-01-01T08:00:04Z", REOPENED)),
+     "2025-01-01T08:10:00Z", _totals(eyes=2)),
+    ("recovery without start",
+     _events(("2025-01-01T08:00:00Z", DROWSY_END), ("2025-01-01T08:00:01Z", REOPENED)),
+     "2025-01-01T08:10:00Z", _totals()),
+    ("two starts, one recovery",
+     _events(("2025-01-01T08:00:00Z", DROWSY), ("2025-01-01T08:00:01Z", DROWSY),
+             ("2025-01-01T08:00:03Z", DROWSY_END)),
+     "2025-01-01T08:10:00Z", _totals(drowsy=5)),
+    ("mixed timestamp formats",
+     _events(("2025-01-01T08:00:00Z", EYES),                         # Z
+             ("2025-01-01T16:00:02.500000+08:00", REOPENED),         # offset, microseconds
+             ("2025-01-01T08:00:10", DROWSY),                        # naive -> UTC
+             ("2025-01-01T08:00:11.750+00:00", DROWSY_END)),         # explicit UTC, milliseconds
+     "2025-01-01T08:10:00Z", _totals(eyes=2.5, drowsy=1.75)),
+]
+
+TO_MS_FIXTURES = [
+    ("2025-01-01T00:00:00Z", 1735689600000),
+    ("2025-01-01T00:00:00+00:00", 1735689600000),
+    ("2025-01-01T08:00:00+08:00", 1735689600000),
+    ("2025-01-01T00:00:00", 1735689600000),
+    ("2025-01-01T00:00:00.999999Z", 1735689600999),
+]
+
+def check_fixtures():
+    failures = 0
+    for timestamp, expected in TO_MS_FIXTURES:
+        got = _to_ms(timestamp)
+        if got != expected:
+            failures += 1
+            print(f"[FAIL] _to_ms({timestamp!r}) = {got}, expected {expected}")
+    for name, events, session_end, expected in FIXTURES:
+        got = compute_episode_durations(events, session_end=session_end)
+        if any(abs(got[c] - expected[c]) > 1e-9 for c in EPISODE_PAIRS):
+            failures += 1
+            print(f"[FAIL] {name}: {got}, expected {expected}")
+        else:
+            print(f"[OK]   {name}")
+    print(f"{len(FIXTURES) + len(TO_MS_FIXTURES)} fixture check(s), {failures} failure(s)")
+    return failures
+
+#-------------------recorded sessions----------------------#
+def post_off_durations(device_id, off_time, tracker):
+    # what the old query added for starts still open at OFF: each paired with
+    # the first recovery of its type after OFF (or nothing if there is none)
+    extra = {category: 0 for category in EPISODE_PAIRS}
+    for category, starts in tracker.open_starts.items():
+        if not starts:
+            continue
+        recovery = next(db.aql.execute(POST_OFF_RECOVERY_QUERY, bind_vars={
+            "device_id": device_id, "type": EPISODE_PAIRS[category], "off_time": off_time}), None)
+        if recovery is not None:
+            end_ms = _to_ms(recovery)
+            extra[category] = sum(end_ms - start for start in starts) / 1000
+    return extra
+
+def old_durations(bind_vars):
+    rows = db.aql.execute(OLD_DURATION_QUERY, bind_vars=bind_vars)
+    result = {category: 0 for category in EPISODE_PAIRS}
+    for row in rows:
+        result[row["category"]] = row["totalDurationSeconds"]
+    return result
+
+def _same(a, b):
+    return all(abs(a[c] - b[c]) < 1e-6 for c in EPISODE_PAIRS)
+
+def check_sessions(device_id=None):
+    sessions = list(db.aql.execute(SESSIONS_QUERY, bind_vars={"device_id": device_id}))
+
+    mismatches = post_off = 0
+    for s in sessions:
+        bind_vars = {"device_id": s["device_id"], "start_time": s["start_time"], "off_time": s["end_time"]}
+        events = list(db.aql.execute(EVENTS_QUERY, bind_vars=bind_vars))
+
+        tracker = EpisodeTracker()
+        for e in events:
+            tracker.add(e.get("type"), e.get("timestamp"))
+        old = old_durations(bind_vars)
+        new = tracker.totals()
+        closed = tracker.totals(session_end=s["end_time"])
+
+        if _same(old, new):
+            label = "OK      "
+        else:
+            extra = post_off_durations(s["device_id"], s["end_time"], tracker)
+            if _same(old, {c: new[c] + extra[c] for c in EPISODE_PAIRS}):
+                label = "POST-OFF"      # expected: the rewrite closes these at OFF
+                post_off += 1
+            else:
+                label = "DIFF    "
+                mismatches += 1
+        print(f"[{label}] {s['device_id']} {s['start_time']} -> {s['end_time']}")
+        if label != "OK      ":
+            print(f"       old: {old}")
+            print(f"       new: {new}")
+        if closed != new:
+            print(f"       closed at OFF (stored): {closed}")
+
+    print(f"{len(sessions)} session(s) checked, {post_off} expected post-OFF difference(s), "
+          f"{mismatches} mismatch(es)")
+    return mismatches
+
+def main():
+    args = sys.argv[1:]
+    failures = check_fixtures()
+    if "--fixtures" not in args:
+        device_id = args[0] if args else None
+        failures += check_sessions(device_id)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+#----------------------------------------------------------#
+#-------------------ingest load test-----------------------#
+#----------------------------------------------------------#
+
+# Drives /kucing-event, /kucing-state or /kucing-batch from many threads
+# (one keep-alive session each, like the Pi's uplink) and reports the
+# sustained request and document rate plus latency percentiles.
+#
+# Run the backend against a throwaway ArangoDB, e.g.
+#   docker run -d -p 8529:8529 -e ARANGO_ROOT_PASSWORD=123 arangodb:3.11
+#   gunicorn wsgi:app
+# then (from ADAMS_backend/):
+#   python -m scripts.loadtest_ingest --mode event --threads 16 --duration 30
+#
+# Devices are named loadtest-<n>; no OFF events are sent, so no session
+# jobs are queued. --cleanup removes the generated documents afterwards.
+
+EVENT_TYPES = ["Yawn", "Eyes closed for too long", "Eyes reopened", "Drowsiness",
+               "Recovered from drowsiness", "Distraction", "Recovered from distraction"]
+STATES = ["normal", "drowsy", "distracted"]
+
+
+def make_event(device_id):
+    return {"device_id": device_id, "timestamp": datetime.now().isoformat(),
+            "type": random.choice(EVENT_TYPES), "ear": 0.21, "mar": 0.35,
+            "perclos": 0.1, "pitch": -3.0, "yaw": 2.0, "roll": 0.5}
+
+def make_state(device_id):
+    return {"device_id": device_id, "timestamp": datetime.now().isoformat(),
+            "driver_state": random.choice(STATES)}
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class Worker(threading.Thread):
+    def __init__(self, args, device_id, stop_at):
+        super().__init__(daemon=True)
+        self.args = args
+        self.device_id = device_id
+        self.stop_at = stop_at
+        self.latencies = []
+        self.docs = 0
+        self.errors = 0
+
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
+    def request(self):
+        mode, url = self.args.mode, self.args.url
+        if mode == "event":
+            return self.session.post(f"{url}/kucing-event", json={"event": make_event(self.device_id)}, timeout=10), 1
+        if mode == "state":
+            return self.session.post(f"{url}/kucing-state", json={"state": make_state(self.device_id)}, timeout=10), 1
+        items = [{"event": make_event(self.device_id)} if random.random() < 0.5
+                 else {"state": make_state(self.device_id)} for _ in range(self.args.batch_size)]
+        return self.session.post(f"{url}/kucing-batch", json={"items": items}, timeout=30), len(items)
+
+    def run(self):
+        while time.perf_counter() < self.stop_at:
+            start = time.perf_counter()
+            try:
+                response, count = self.request()
+                response.raise_for_status()
+            except Exception:
+                self.errors += 1
+                continue
+            self.latencies.append((time.perf_counter() - start) * 1000)
+            self.docs += count
+
+
+def cleanup():
+    from app.db.arango_db import db
+    for collection in ("event", "state", "daily_rollup"):
+        cursor = db.aql.execute(f"""
+        LET removed = (
+            FOR d IN {collection}
+                FILTER STARTS_WITH(d.device_id, 'loadtest-')
+                REMOVE d IN {collection}
+                RETURN 1
+        )
+        RETURN LENGTH(removed)
+        """)
+        print(f"[cleanup] {collection}: {next(cursor, 0)} removed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sustained ingest load test")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/api")
+    parser.add_argument("--mode", choices=["event", "state", "batch"], default="event")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    stop_at = time.perf_counter() + args.duration
+    workers = [Worker(args, f"loadtest-{i:03d}", stop_at) for i in range(args.threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(l for w in workers for l in w.latencies)
+    requests_ok = len(latencies)
+    docs = sum(w.docs for w in workers)
+    errors = sum(w.errors for w in workers)
+
+    print(f"mode={args.mode} threads={args.threads} duration={elapsed:.1f}s")
+    print(f"requests: {requests_ok} ok, {errors} failed -> {requests_ok / elapsed:.0f} req/s")
+    print(f"documents: {docs} -> {docs / elapsed:.0f} docs/s")
+    print(f"latency ms: p50={percentile(latencies, 0.50):.1f} "
+          f"p95={percentile(latencies, 0.95):.1f} p99={percentile(latencies, 0.99):.1f} "
+          f"max={latencies[-1] if latencies else 0.0:.1f}")
+
+    if args.cleanup:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+from flask_cors import CORS
+from app import create_app
+
+# production entry point (see gunicorn.conf.py):
+#   gunicorn wsgi:app
+app = create_app()
+CORS(app)